@@ -1,5 +1,8 @@
+import asyncio
 import json
 import logging
+import time
+from collections.abc import AsyncIterator, Callable
 from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,26 +13,83 @@ from core.sanitization import (
     detect_leaked_system_prompt,
     sanitize_sender_name,
     wrap_user_content,
+    wrap_user_messages,
+)
+from core import tracing
+from core.container import container
+from core.database import get_db
+from core.token_budget import get_token_counter
+from core.metrics import (
+    LLM_ERRORS,
+    LLM_FIRST_TOKEN_SECONDS,
+    LLM_GENERATE_SECONDS,
+    LLM_IN_FLIGHT,
+    LLM_TOKENS,
+    TOOL_ERRORS,
+    TOOL_SECONDS,
+)
+from llm import (
+    ChatMessage,
+    LLMResponse,
+    StreamChunk,
+    ToolCall,
+    ToolDefinition,
+    Usage,
+    collect_stream,
+)
+from prompts.main_agent import (
+    MAIN_AGENT_SYSTEM_PROMPT,
+    build_club_context,
+    build_dynamic_context,
 )
-from llm import ChatMessage, ToolDefinition, create_llm_provider
-from prompts.main_agent import MAIN_AGENT_SYSTEM_PROMPT, build_club_context
 from tools.definitions import TOOLS_DEFINITIONS
 
 logger = logging.getLogger(__name__)
 
+# Metric label for tool names; anything the model invents is "unknown"
+_TOOL_NAMES = {t["name"] for t in TOOLS_DEFINITIONS}
+# Tools that change club data: run one at a time on the request session, in
+# the order the model called them. Reads never write: details a read
+# fetches are stored once the request session commits, so a read running on
+# a separate session (movie_search) cannot wait on a lock held by the
+# request session while the request waits on it
+_WRITE_TOOLS = {"mark_as_watched", "rate_movie", "create_poll", "vote_on_poll", "close_poll"}
+# Tool schemas count towards every prompt the provider reports
+_TOOLS_CHARS = len(json.dumps(TOOLS_DEFINITIONS))
+
+# Built once: with the tools, the system prompt is the byte-stable prefix
+# providers cache across messages and groups
+TOOLS = [
+    ToolDefinition(name=t["name"], description=t["description"], parameters=t["parameters"])
+    for t in TOOLS_DEFINITIONS
+]
+PROMPT_PREFIX = [ChatMessage(role="system", content=MAIN_AGENT_SYSTEM_PROMPT, cache=True)]
+
 
 class MainAgent:
     def __init__(self, db_session: AsyncSession):
-        self.llm = create_llm_provider()
+        # Provider and HTTP clients are process-wide: building an agent per
+        # message only allocates these thin wrappers
+        self.llm = container.llm
 
-        self.subagents = {
-            "movie": MovieAgent(settings.TMDB_API_KEY),
-            "recommendation": RecommendationAgent(settings.TMDB_API_KEY, db_session),
-            "stats": StatsAgent(db_session, settings.TMDB_API_KEY),
-            "poll": PollAgent(db_session),
-        }
+        self.subagents = self._build_subagents(db_session)
 
         self.db = db_session
+        # Summed over every generate call of process()
+        self.usage = Usage(calls=0)
+        # Set once a write tool ran: its changes are only visible to the
+        # request session until the webhook commits
+        self._wrote = False
+
+    def _build_subagents(self, db_session: AsyncSession) -> dict:
+        return {
+            "movie": MovieAgent(db_session, container.tmdb),
+            "recommendation": RecommendationAgent(
+                db_session, container.tmdb, container.utility_llm
+            ),
+            "stats": StatsAgent(db_session, container.tmdb),
+            "poll": PollAgent(db_session),
+        }
 
     async def process(
         self,
@@ -37,36 +97,28 @@ class MainAgent:
         sender_name: str,
         conversation_history: list | None = None,
         excluded_titles: list[str] | None = None,
+        burst: list[tuple[str, str]] | None = None,
+        summary: str | None = None,
+        on_delta: Callable[[str], None] | None = None,
     ) -> str:
-        # Build system prompt with club context
-        club_context = await build_club_context(self.subagents["stats"])
-        system_prompt = MAIN_AGENT_SYSTEM_PROMPT.format(club_context=club_context)
-
-        # Inject exclusion list so the LLM avoids repeating recent suggestions
-        if excluded_titles:
-            titles_str = ", ".join(excluded_titles)
-            system_prompt += (
-                f"\n\n## FILMS DEJA SUGGERES\n"
-                f"Ne propose PAS ces films, ils ont deja ete suggeres recemment : "
-                f"{titles_str}"
-            )
+        """Answer one message. With ``on_delta`` the answer is streamed: every
+        text delta is passed on as it arrives, including the text the model
+        writes before calling tools, and the returned text is everything
+        that was passed on."""
+        with tracing.span("build_club_context"):
+            club_context = await build_club_context(self.subagents["stats"])
 
-        # Sanitize and wrap user content in XML tags for clear separation
-        full_message = wrap_user_content(sender_name, user_message)
-
-        # Build tool definitions
-        tools = [
-            ToolDefinition(
-                name=t["name"],
-                description=t["description"],
-                parameters=t["parameters"],
-            )
-            for t in TOOLS_DEFINITIONS
-        ]
+        # Sanitize and wrap user content in XML tags for clear separation.
+        # Coalesced messages (burst) come first, each with its own sender.
+        full_message = wrap_user_messages([*(burst or []), (sender_name, user_message)])
 
-        # Build messages: system + history + current
+        # Build messages: cacheable prefix + per-message context + history + current
         messages: list[ChatMessage] = [
-            ChatMessage(role="system", content=system_prompt),
+            *PROMPT_PREFIX,
+            ChatMessage(
+                role="system",
+                content=build_dynamic_context(club_context, summary, excluded_titles),
+            ),
         ]
 
         if conversation_history:
@@ -80,12 +132,7 @@ class MainAgent:
         messages.append(ChatMessage(role="user", content=full_message))
 
         try:
-            response = await self.llm.generate(
-                messages=messages,
-                tools=tools,
-                temperature=0.7,
-                max_tokens=settings.LLM_MAX_TOKENS,
-            )
+            response = await self._generate(messages, TOOLS, iteration=0, on_delta=on_delta)
         except Exception as e:
             logger.error("LLM API error: %s", e)
             return "Oups, j'ai eu un souci technique. Reessaie dans quelques secondes !"
@@ -93,12 +140,17 @@ class MainAgent:
         # ReAct loop: handle tool calls
         max_iterations = 5
         iteration = 0
+        # Streamed text already shown in front of the final answer
+        shown: list[str] = []
 
         while iteration < max_iterations:
             iteration += 1
 
             if not response.has_tool_calls:
                 break
+            if on_delta and response.content:
+                shown.append(response.content)
+                on_delta("\n\n")
 
             # Add assistant message with all tool calls
             messages.append(
@@ -109,10 +161,9 @@ class MainAgent:
                 )
             )
 
-            # Execute every tool call and append a result for each
-            for tool_call in response.tool_calls:
-                logger.info("Tool call: %s(%s)", tool_call.name, tool_call.arguments)
-                tool_result = await self._execute_tool(tool_call.name, tool_call.arguments)
+            # Execute every tool call and append a result for each, in call order
+            tool_results = await self._run_tools(response.tool_calls)
+            for tool_call, tool_result in zip(response.tool_calls, tool_results):
                 messages.append(
                     ChatMessage(
                         role="tool",
@@ -123,11 +174,8 @@ class MainAgent:
                 )
 
             try:
-                response = await self.llm.generate(
-                    messages=messages,
-                    tools=tools,
-                    temperature=0.7,
-                    max_tokens=settings.LLM_MAX_TOKENS,
+                response = await self._generate(
+                    messages, TOOLS, iteration=iteration, on_delta=on_delta
                 )
             except Exception as e:
                 logger.error("LLM API error during tool loop: %s", e)
@@ -135,6 +183,8 @@ class MainAgent:
 
         try:
             response_text = response.content
+            if shown and response_text:
+                response_text = "\n\n".join([*shown, response_text])
             if not response_text:
                 return "Hmm, j'ai pas reussi a formuler ma reponse. Tu peux reformuler ?"
 
@@ -147,58 +197,150 @@ class MainAgent:
         except (IndexError, AttributeError):
             return "Hmm, j'ai pas reussi a formuler ma reponse. Tu peux reformuler ?"
 
-    async def _execute_tool(self, tool_name: str, args: dict) -> Any:
+    async def _generate(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition],
+        iteration: int,
+        on_delta: Callable[[str], None] | None = None,
+    ) -> LLMResponse:
+        labels = {"provider": settings.LLM_PROVIDER, "model": self.llm.model}
+        try:
+            with (
+                tracing.span("llm.generate", {**labels, "iteration": iteration}),
+                LLM_IN_FLIGHT.track_inprogress(),
+                LLM_GENERATE_SECONDS.time(**labels, iteration=str(iteration)),
+            ):
+                if on_delta is None:
+                    response = await self.llm.generate(
+                        messages=messages,
+                        tools=tools,
+                        temperature=0.7,
+                        max_tokens=settings.LLM_MAX_TOKENS,
+                    )
+                else:
+                    stream = self.llm.generate_stream(
+                        messages=messages,
+                        tools=tools,
+                        temperature=0.7,
+                        max_tokens=settings.LLM_MAX_TOKENS,
+                    )
+                    response = await collect_stream(_forward(stream, on_delta, labels))
+        except Exception:
+            LLM_ERRORS.inc(**labels)
+            raise
+
+        usage = response.usage
+        if usage is not None:
+            self.usage += usage
+            LLM_TOKENS.inc(usage.prompt_tokens, **labels, kind="prompt")
+            LLM_TOKENS.inc(usage.completion_tokens, **labels, kind="completion")
+            LLM_TOKENS.inc(usage.cached_tokens, **labels, kind="cached")
+            chars = _TOOLS_CHARS + sum(len(m.content or "") for m in messages)
+            get_token_counter().calibrate(chars, usage.prompt_tokens)
+        return response
+
+    async def _run_tools(self, tool_calls: list[ToolCall]) -> list[Any]:
+        """Run one turn's tool calls and return their results in call order.
+
+        The request session can't be shared between tasks: several calls
+        run concurrently, each read on its own session, while the writes
+        run one after another on the request session. After a write, later
+        calls stay on the request session, the only one that sees it.
+        """
+        for tool_call in tool_calls:
+            logger.info("Tool call: %s(%s)", tool_call.name, tool_call.arguments)
+
+        if len(tool_calls) == 1 or self._wrote:
+            self._wrote = self._wrote or any(tc.name in _WRITE_TOOLS for tc in tool_calls)
+            return [await self._timed_tool(tc.name, tc.arguments) for tc in tool_calls]
+
+        results: list[Any] = [None] * len(tool_calls)
+        writes = [i for i, tc in enumerate(tool_calls) if tc.name in _WRITE_TOOLS]
+        reads = [i for i, tc in enumerate(tool_calls) if tc.name not in _WRITE_TOOLS]
+        semaphore = asyncio.Semaphore(settings.TOOL_CONCURRENCY)
+
+        async def run_writes() -> None:
+            for i in writes:
+                results[i] = await self._timed_tool(tool_calls[i].name, tool_calls[i].arguments)
+
+        async def run_read(i: int) -> None:
+            async with semaphore, get_db(parent=self.db) as db:
+                results[i] = await self._timed_tool(
+                    tool_calls[i].name, tool_calls[i].arguments, self._build_subagents(db)
+                )
+
+        outcomes = await asyncio.gather(
+            run_writes(), *(run_read(i) for i in reads), return_exceptions=True
+        )
+        self._wrote = bool(writes)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                raise outcome
+        return results
+
+    async def _timed_tool(self, tool_name: str, args: dict, subagents: dict | None = None) -> Any:
+        label = tool_name if tool_name in _TOOL_NAMES else "unknown"
+        try:
+            with tracing.span(f"tool {label}"), TOOL_SECONDS.time(tool=label):
+                return await self._execute_tool(tool_name, args, subagents or self.subagents)
+        except Exception:
+            TOOL_ERRORS.inc(tool=label)
+            raise
+
+    async def _execute_tool(self, tool_name: str, args: dict, subagents: dict | None = None) -> Any:
+        subagents = subagents or self.subagents
         if tool_name == "movie_search":
-            return await self.subagents["movie"].search(
+            return await subagents["movie"].search(
                 query=args["query"], year=args.get("year")
             )
         elif tool_name == "get_recommendations":
-            return await self.subagents["recommendation"].get(
+            return await subagents["recommendation"].get(
                 rec_type=args["rec_type"],
                 reference=args.get("reference"),
                 genre=args.get("genre"),
                 mood=args.get("mood"),
             )
         elif tool_name == "get_club_history":
-            return await self.subagents["stats"].get_history(
+            return await subagents["stats"].get_history(
                 limit=int(args.get("limit", 10))
             )
         elif tool_name == "get_club_stats":
-            return await self.subagents["stats"].get_stats()
+            return await subagents["stats"].get_stats()
         elif tool_name == "mark_as_watched":
-            return await self.subagents["stats"].mark_watched(
+            return await subagents["stats"].mark_watched(
                 movie_title=args["movie_title"]
             )
         elif tool_name == "rate_movie":
-            return await self.subagents["stats"].rate(
+            return await subagents["stats"].rate(
                 movie_title=args["movie_title"],
                 score=int(args["score"]),
                 member_name=args["member_name"],
             )
         elif tool_name == "create_poll":
-            return await self.subagents["poll"].create_poll(
+            return await subagents["poll"].create_poll(
                 question=args["question"],
                 options=list(args["options"]),
                 member_name=args["member_name"],
             )
         elif tool_name == "vote_on_poll":
-            return await self.subagents["poll"].vote(
+            return await subagents["poll"].vote(
                 poll_id=args.get("poll_id") or None,
                 option_id=args["option_id"],
                 member_name=args["member_name"],
             )
         elif tool_name == "get_poll_results":
-            return await self.subagents["poll"].get_results(
+            return await subagents["poll"].get_results(
                 poll_id=args.get("poll_id"),
             )
         elif tool_name == "close_poll":
-            return await self.subagents["poll"].close_poll(
+            return await subagents["poll"].close_poll(
                 poll_id=args.get("poll_id"),
             )
         elif tool_name == "get_now_playing":
-            return await self.subagents["movie"].now_playing()
+            return await subagents["movie"].now_playing()
         elif tool_name == "discover_movies":
-            return await self.subagents["movie"].discover(
+            return await subagents["movie"].discover(
                 genre=args.get("genre"),
                 year_min=args.get("year_min"),
                 year_max=args.get("year_max"),
@@ -208,7 +350,22 @@ class MainAgent:
                 language=args.get("language"),
             )
         elif tool_name == "get_trending":
-            return await self.subagents["movie"].trending(
+            return await subagents["movie"].trending(
                 window=args.get("window", "week"),
             )
         return {"error": f"Outil inconnu: {tool_name}"}
+
+
+async def _forward(
+    stream: AsyncIterator[StreamChunk], on_delta: Callable[[str], None], labels: dict
+) -> AsyncIterator[StreamChunk]:
+    """Pass ``stream`` through, handing each text delta to ``on_delta``."""
+    start = time.perf_counter()
+    first = True
+    async for chunk in stream:
+        if chunk.text:
+            if first:
+                LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, **labels)
+                first = False
+            on_delta(chunk.text)
+        yield chunk
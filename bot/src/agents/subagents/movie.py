@@ -1,105 +1,81 @@
 import logging
 from typing import Optional
 
-import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from constants.tmdb import GENRE_MAP, PROVIDER_MAP
+from core.container import container
+from services.movie_store import MovieStore, movie_store
+from services.tmdb import TMDB_UNAVAILABLE, TMDbClient, TMDbError
 
 logger = logging.getLogger(__name__)
 
+# Query params shared with the prefetcher (services/prefetch.py), which
+# keeps the matching cache entries warm
+NOW_PLAYING_PARAMS = {"language": "fr-FR", "region": "FR"}
+TRENDING_PARAMS = {"language": "fr-FR"}
+
+
+def discover_params(
+    genre_id: int | None = None,
+    provider_id: int | None = None,
+    sort_by: str = "popularity.desc",
+) -> dict:
+    params: dict = {
+        "language": "fr-FR",
+        "sort_by": sort_by,
+        "vote_count.gte": 50,
+    }
+    if genre_id:
+        params["with_genres"] = genre_id
+    if provider_id:
+        params["with_watch_providers"] = provider_id
+        params["watch_region"] = "FR"
+    return params
+
 
 class MovieAgent:
-    def __init__(self, tmdb_api_key: str):
-        self.api_key = tmdb_api_key
-        self.base_url = "https://api.themoviedb.org/3"
-        self.client = httpx.AsyncClient(timeout=10.0)
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        tmdb: TMDbClient | None = None,
+        store: MovieStore | None = None,
+    ):
+        self.db = db_session
+        self.tmdb = tmdb or container.tmdb
+        self.store = store or movie_store
 
     async def search(self, query: str, year: Optional[int] = None) -> dict:
         params = {
-            "api_key": self.api_key,
             "query": query,
             "language": "fr-FR",
         }
         if year:
             params["year"] = year
 
-        response = await self.client.get(
-            f"{self.base_url}/search/movie", params=params
-        )
-        results = response.json().get("results", [])
+        try:
+            data = await self.tmdb.get("/search/movie", params)
+            results = data.get("results", [])
 
-        if not results:
-            return {"error": f"Aucun film trouve pour '{query}'"}
+            if not results:
+                return {"error": f"Aucun film trouve pour '{query}'"}
 
-        movie_id = results[0]["id"]
-        return await self._get_details(movie_id)
+            movie_id = results[0]["id"]
+            return await self._get_details(movie_id)
+        except TMDbError as e:
+            logger.error("TMDb search failed: %s", e)
+            return {"error": TMDB_UNAVAILABLE}
 
     async def _get_details(self, movie_id: int) -> dict:
-        params = {
-            "api_key": self.api_key,
-            "language": "fr-FR",
-            "append_to_response": "credits,videos,watch/providers",
-        }
-
-        response = await self.client.get(
-            f"{self.base_url}/movie/{movie_id}", params=params
-        )
-        data = response.json()
-
-        director = next(
-            (
-                p["name"]
-                for p in data.get("credits", {}).get("crew", [])
-                if p["job"] == "Director"
-            ),
-            "Inconnu",
-        )
-
-        cast = [a["name"] for a in data.get("credits", {}).get("cast", [])[:5]]
-
-        trailer = next(
-            (
-                f"https://youtu.be/{v['key']}"
-                for v in data.get("videos", {}).get("results", [])
-                if v["type"] == "Trailer" and v["site"] == "YouTube"
-            ),
-            None,
-        )
-
-        providers = data.get("watch/providers", {}).get("results", {}).get("FR", {})
-        streaming = [p["provider_name"] for p in providers.get("flatrate", [])]
-
-        return {
-            "title": data.get("title"),
-            "original_title": data.get("original_title"),
-            "year": data.get("release_date", "")[:4],
-            "runtime": data.get("runtime"),
-            "genres": [g["name"] for g in data.get("genres", [])],
-            "overview": data.get("overview"),
-            "vote_average": data.get("vote_average"),
-            "vote_count": data.get("vote_count"),
-            "director": director,
-            "cast": cast,
-            "trailer": trailer,
-            "streaming": streaming,
-            "poster": (
-                f"https://image.tmdb.org/t/p/w500{data.get('poster_path')}"
-                if data.get("poster_path")
-                else None
-            ),
-        }
+        return await self.store.get_details(self.db, movie_id)
 
     async def now_playing(self) -> dict:
-        params = {
-            "api_key": self.api_key,
-            "language": "fr-FR",
-            "region": "FR",
-        }
-
-        response = await self.client.get(
-            f"{self.base_url}/movie/now_playing", params=params
-        )
-        results = response.json().get("results", [])
+        try:
+            data = await self.tmdb.get("/movie/now_playing", NOW_PLAYING_PARAMS)
+        except TMDbError as e:
+            logger.error("TMDb now_playing failed: %s", e)
+            return {"error": TMDB_UNAVAILABLE}
+        results = data.get("results", [])
 
         if not results:
             return {"error": "Aucun film a l'affiche trouve"}
@@ -130,29 +106,17 @@ class MovieAgent:
         min_rating: Optional[float] = None,
         language: Optional[str] = None,
     ) -> dict:
-        params: dict = {
-            "api_key": self.api_key,
-            "language": "fr-FR",
-            "sort_by": sort_by,
-            "vote_count.gte": 50,
-        }
-
-        if genre:
-            genre_id = GENRE_MAP.get(genre.lower())
-            if genre_id:
-                params["with_genres"] = genre_id
+        params = discover_params(
+            genre_id=GENRE_MAP.get(genre.lower()) if genre else None,
+            provider_id=PROVIDER_MAP.get(platform.lower()) if platform else None,
+            sort_by=sort_by,
+        )
 
         if year_min:
             params["primary_release_date.gte"] = f"{year_min}-01-01"
         if year_max:
             params["primary_release_date.lte"] = f"{year_max}-12-31"
 
-        if platform:
-            provider_id = PROVIDER_MAP.get(platform.lower())
-            if provider_id:
-                params["with_watch_providers"] = provider_id
-                params["watch_region"] = "FR"
-
         if min_rating is not None:
             params["vote_average.gte"] = min_rating
             params["vote_count.gte"] = 200
@@ -160,10 +124,12 @@ class MovieAgent:
         if language:
             params["with_original_language"] = language
 
-        response = await self.client.get(
-            f"{self.base_url}/discover/movie", params=params
-        )
-        results = response.json().get("results", [])
+        try:
+            data = await self.tmdb.get("/discover/movie", params)
+        except TMDbError as e:
+            logger.error("TMDb discover failed: %s", e)
+            return {"error": TMDB_UNAVAILABLE}
+        results = data.get("results", [])
 
         if not results:
             return {"error": "Aucun film trouve avec ces criteres"}
@@ -188,15 +154,12 @@ class MovieAgent:
         if window not in ("day", "week"):
             window = "week"
 
-        params = {
-            "api_key": self.api_key,
-            "language": "fr-FR",
-        }
-
-        response = await self.client.get(
-            f"{self.base_url}/trending/movie/{window}", params=params
-        )
-        results = response.json().get("results", [])
+        try:
+            data = await self.tmdb.get(f"/trending/movie/{window}", TRENDING_PARAMS)
+        except TMDbError as e:
+            logger.error("TMDb trending failed: %s", e)
+            return {"error": TMDB_UNAVAILABLE}
+        results = data.get("results", [])
 
         if not results:
             return {"error": "Aucun film tendance trouve"}
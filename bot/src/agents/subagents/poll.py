@@ -1,7 +1,9 @@
 import logging
+import uuid
 from typing import Optional
 
 from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.member import Member
@@ -10,6 +12,13 @@ from models.poll import Poll, PollVote
 logger = logging.getLogger(__name__)
 
 
+def _poll_uuid(poll_id: str) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(str(poll_id))
+    except ValueError:
+        return None
+
+
 class PollAgent:
     def __init__(self, db_session: AsyncSession):
         self.db = db_session
@@ -49,7 +58,7 @@ class PollAgent:
     ) -> dict:
         if poll_id:
             poll = await self.db.scalar(
-                select(Poll).where(Poll.id == poll_id)
+                select(Poll).where(Poll.id == _poll_uuid(poll_id))
             )
         else:
             poll = await self.db.scalar(
@@ -84,13 +93,19 @@ class PollAgent:
                 "message": f"{member_name} a change son vote pour : {poll.options[option_id]}",
             }
 
-        vote = PollVote(
+        # The same member's vote may land concurrently (native poll
+        # updates): the last one wins instead of breaking the unique key
+        stmt = insert(PollVote).values(
             poll_id=poll.id,
             member_id=member.id,
             option_id=option_id,
         )
-        self.db.add(vote)
-        await self.db.flush()
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[PollVote.poll_id, PollVote.member_id],
+                set_={"option_id": stmt.excluded.option_id},
+            )
+        )
 
         return {
             "success": True,
@@ -100,7 +115,7 @@ class PollAgent:
     async def get_results(self, poll_id: Optional[str] = None) -> dict:
         if poll_id:
             poll = await self.db.scalar(
-                select(Poll).where(Poll.id == poll_id)
+                select(Poll).where(Poll.id == _poll_uuid(poll_id))
             )
         else:
             # Get the latest open poll
@@ -146,7 +161,7 @@ class PollAgent:
     async def close_poll(self, poll_id: Optional[str] = None) -> dict:
         if poll_id:
             poll = await self.db.scalar(
-                select(Poll).where(Poll.id == poll_id)
+                select(Poll).where(Poll.id == _poll_uuid(poll_id))
             )
         else:
             poll = await self.db.scalar(
@@ -168,7 +183,7 @@ class PollAgent:
 
     async def set_wa_message_id(self, poll_id: str, wa_message_id: str) -> dict:
         poll = await self.db.scalar(
-            select(Poll).where(Poll.id == poll_id)
+            select(Poll).where(Poll.id == _poll_uuid(poll_id))
         )
         if not poll:
             return {"error": "Sondage non trouve."}
@@ -210,10 +225,16 @@ class PollAgent:
             select(Member).where(Member.display_name == member_name)
         )
         if not member:
-            member = Member(
-                phone_hash=member_name.lower().replace(" ", "_"),
-                display_name=member_name,
+            # Another message from the same member may create it meanwhile
+            phone_hash = member_name.lower().replace(" ", "_")
+            member = await self.db.scalar(
+                insert(Member)
+                .values(phone_hash=phone_hash, display_name=member_name)
+                .on_conflict_do_nothing(index_elements=[Member.phone_hash])
+                .returning(Member)
             )
-            self.db.add(member)
-            await self.db.flush()
+            if member is None:
+                member = await self.db.scalar(
+                    select(Member).where(Member.phone_hash == phone_hash)
+                )
         return member
@@ -1,26 +1,52 @@
 import logging
 from typing import Optional
 
-import httpx
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
 from constants.tmdb import GENRE_MAP
-from llm import create_llm_provider
+from core.cache import TTLCache
+from core.container import container
+from core.singleflight import SingleFlight
+from llm import LLMProvider
 from models.movie import Movie
 from models.watchlist import Watchlist
+from services.tmdb import TMDB_UNAVAILABLE, TMDbClient, TMDbError
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_GENRES = [35]  # comedy
+MOOD_CACHE_TTL = 24 * 3600
+
+# Mood -> genre mappings are shared by every group: identical moods asked
+# at the same time make one LLM call, and answers are reused for a day
+_mood_cache = TTLCache(maxsize=512)
+_mood_flight = SingleFlight()
+
+
+def genre_params(genre_id: int) -> dict:
+    """Discover query behind genre and mood recommendations."""
+    return {
+        "language": "fr-FR",
+        "with_genres": genre_id,
+        "sort_by": "vote_average.desc",
+        "vote_count.gte": 500,
+    }
+
 
 class RecommendationAgent:
 
-    def __init__(self, tmdb_api_key: str, db_session: AsyncSession):
-        self.api_key = tmdb_api_key
-        self.base_url = "https://api.themoviedb.org/3"
-        self.client = httpx.AsyncClient(timeout=10.0)
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        tmdb: TMDbClient | None = None,
+        llm: LLMProvider | None = None,
+    ):
+        self.tmdb = tmdb or container.tmdb
         self.db = db_session
-        self.llm = create_llm_provider()
+        # Auxiliary calls (mood -> genres) go to the utility tier
+        self.llm = llm or container.utility_llm
 
     async def get(
         self,
@@ -32,16 +58,20 @@ class RecommendationAgent:
         watched_ids = await self._get_watched_tmdb_ids()
         candidates = []
 
-        if rec_type == "similar" and reference:
-            candidates = await self._get_similar(reference)
-        elif rec_type == "genre" and genre:
-            genre_id = GENRE_MAP.get(genre.lower())
-            if genre_id:
-                candidates = await self._discover_by_genre(genre_id)
-        elif rec_type == "mood" and mood:
-            genre_ids = await self._mood_to_genres(mood)
-            for gid in genre_ids[:2]:
-                candidates.extend(await self._discover_by_genre(gid))
+        try:
+            if rec_type == "similar" and reference:
+                candidates = await self._get_similar(reference)
+            elif rec_type == "genre" and genre:
+                genre_id = GENRE_MAP.get(genre.lower())
+                if genre_id:
+                    candidates = await self._discover_by_genre(genre_id)
+            elif rec_type == "mood" and mood:
+                genre_ids = await self._mood_to_genres(mood)
+                for gid in genre_ids[:2]:
+                    candidates.extend(await self._discover_by_genre(gid))
+        except TMDbError as e:
+            logger.error("TMDb recommendations failed: %s", e)
+            return {"error": TMDB_UNAVAILABLE}
 
         seen: set[int] = set()
         results = []
@@ -65,35 +95,33 @@ class RecommendationAgent:
         }
 
     async def _get_similar(self, reference: str) -> list:
-        params = {"api_key": self.api_key, "query": reference, "language": "fr-FR"}
-        response = await self.client.get(
-            f"{self.base_url}/search/movie", params=params
-        )
-        results = response.json().get("results", [])
+        params = {"query": reference, "language": "fr-FR"}
+        data = await self.tmdb.get("/search/movie", params)
+        results = data.get("results", [])
         if not results:
             return []
 
         movie_id = results[0]["id"]
-        params = {"api_key": self.api_key, "language": "fr-FR"}
-        response = await self.client.get(
-            f"{self.base_url}/movie/{movie_id}/similar", params=params
-        )
-        return response.json().get("results", [])
+        params = {"language": "fr-FR"}
+        data = await self.tmdb.get(f"/movie/{movie_id}/similar", params)
+        return data.get("results", [])
 
     async def _discover_by_genre(self, genre_id: int) -> list:
-        params = {
-            "api_key": self.api_key,
-            "language": "fr-FR",
-            "with_genres": genre_id,
-            "sort_by": "vote_average.desc",
-            "vote_count.gte": 500,
-        }
-        response = await self.client.get(
-            f"{self.base_url}/discover/movie", params=params
-        )
-        return response.json().get("results", [])
+        data = await self.tmdb.get("/discover/movie", genre_params(genre_id))
+        return data.get("results", [])
 
     async def _mood_to_genres(self, mood: str) -> list[int]:
+        key = " ".join(mood.lower().split())
+        cached = _mood_cache.get(key, "mood")
+        if cached is not None:
+            return cached
+        genres = await _mood_flight.do(key, lambda: self._ask_mood_genres(mood))
+        # Fallbacks are cached briefly so a failing LLM is not hammered
+        ttl = settings.TMDB_NEGATIVE_TTL if genres is FALLBACK_GENRES else MOOD_CACHE_TTL
+        _mood_cache.set(key, genres, ttl, "mood")
+        return genres
+
+    async def _ask_mood_genres(self, mood: str) -> list[int]:
         prompt = f"""Map this movie mood to TMDb genre IDs.
         Mood: "{mood}"
         Available genres: Action(28), Comedy(35), Drama(18), Horror(27),
@@ -102,10 +130,14 @@ class RecommendationAgent:
         Return ONLY comma-separated genre IDs. Example: 35,10749"""
 
         try:
-            text = await self.llm.generate_text(prompt)
+            text = await self.llm.generate_text(prompt, max_tokens=32)
             return [int(x.strip()) for x in text.split(",")]
         except (ValueError, AttributeError):
-            return [35]  # Fallback: comedy
+            return FALLBACK_GENRES
+        except Exception as e:
+            # Timeout or outage of the utility tier: the answer can do without
+            logger.warning("Mood mapping failed for %r: %s", mood, e)
+            return FALLBACK_GENRES
 
     async def _get_watched_tmdb_ids(self) -> set[int]:
         result = await self.db.execute(
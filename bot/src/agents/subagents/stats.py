@@ -1,23 +1,29 @@
 import logging
 
-import httpx
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.container import container
 from models.member import Member
 from models.movie import Movie
 from models.rating import Rating
 from models.watchlist import Watchlist
+from services.movie_store import MovieStore, movie_store
+from services.tmdb import TMDB_UNAVAILABLE, TMDbClient, TMDbError
 
 logger = logging.getLogger(__name__)
 
 
 class StatsAgent:
-    def __init__(self, db_session: AsyncSession, tmdb_api_key: str):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        tmdb: TMDbClient | None = None,
+        store: MovieStore | None = None,
+    ):
         self.db = db_session
-        self.api_key = tmdb_api_key
-        self.base_url = "https://api.themoviedb.org/3"
-        self.client = httpx.AsyncClient(timeout=10.0)
+        self.tmdb = tmdb or container.tmdb
+        self.store = store or movie_store
 
     async def get_history(self, limit: int = 10) -> list[dict]:
         query = (
@@ -75,14 +81,15 @@ class StatsAgent:
     async def mark_watched(self, movie_title: str) -> dict:
         # Search TMDb to get movie info
         params = {
-            "api_key": self.api_key,
             "query": movie_title,
             "language": "fr-FR",
         }
-        response = await self.client.get(
-            f"{self.base_url}/search/movie", params=params
-        )
-        results = response.json().get("results", [])
+        try:
+            data = await self.tmdb.get("/search/movie", params)
+        except TMDbError as e:
+            logger.error("TMDb search failed: %s", e)
+            return {"error": TMDB_UNAVAILABLE}
+        results = data.get("results", [])
 
         if not results:
             return {"error": f"Film '{movie_title}' non trouve sur TMDb"}
@@ -90,27 +97,21 @@ class StatsAgent:
         tmdb_movie = results[0]
         tmdb_id = tmdb_movie["id"]
 
-        # Check if movie exists in DB
-        movie = await self.db.scalar(select(Movie).where(Movie.tmdb_id == tmdb_id))
-        if not movie:
-            genres = [g["name"] for g in tmdb_movie.get("genre_ids", [])] if tmdb_movie.get("genre_ids") else []
-            # Fetch full details for genre names
-            detail_resp = await self.client.get(
-                f"{self.base_url}/movie/{tmdb_id}",
-                params={"api_key": self.api_key, "language": "fr-FR"},
-            )
-            detail_data = detail_resp.json()
-            genres = [g["name"] for g in detail_data.get("genres", [])]
-
-            movie = Movie(
-                tmdb_id=tmdb_id,
-                title=tmdb_movie.get("title", movie_title),
-                original_title=tmdb_movie.get("original_title"),
-                year=int(tmdb_movie.get("release_date", "0000")[:4]) or None,
-                genres=genres,
-            )
-            self.db.add(movie)
-            await self.db.flush()
+        # The watchlist entry needs the movie row now, on the request
+        # session; freshly fetched details are stored once it commits
+        try:
+            genres = (await self.store.get_details(self.db, tmdb_id))["genres"]
+        except TMDbError as e:
+            logger.warning("TMDb details failed, storing without genres: %s", e)
+            genres = []
+        movie = await self.store.ensure_movie(
+            self.db,
+            tmdb_id,
+            tmdb_movie.get("title", movie_title),
+            tmdb_movie.get("original_title"),
+            int(tmdb_movie.get("release_date", "0000")[:4] or 0) or None,
+            genres,
+        )
 
         # Check if already in watchlist
         existing = await self.db.scalar(
@@ -129,9 +130,14 @@ class StatsAgent:
         if not 1 <= score <= 5:
             return {"error": "La note doit etre entre 1 et 5"}
 
-        # Find movie
+        # Find movie among watched ones: the movies table also holds
+        # details for films the club only looked up
         movie = await self.db.scalar(
-            select(Movie).where(Movie.title.ilike(f"%{movie_title}%"))
+            select(Movie)
+            .join(Watchlist, Movie.id == Watchlist.movie_id)
+            .where(Movie.title.ilike(f"%{movie_title}%"))
+            .order_by(Watchlist.watched_at.desc())
+            .limit(1)
         )
         if not movie:
             return {"error": f"Film '{movie_title}' non trouve. Utilisez /vu d'abord."}
@@ -1,4 +1,14 @@
-from fastapi import APIRouter
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from api.dependencies import verify_webhook_secret
+from core.container import container
+from core.database import get_db
+from core.metrics import CONTENT_TYPE, REGISTRY
+from core.scheduler import scheduler
+from services.prefetch import prefetcher
+from services.usage import UsageService
 
 router = APIRouter()
 
@@ -6,3 +16,38 @@ router = APIRouter()
 @router.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+# Prometheus scrape target; labels never carry group ids, so it stays open
+# like /health
+@router.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+# Per-group queue depth and wait times; group ids are chat ids, so keep it
+# behind the webhook secret
+@router.get("/health/scheduler", dependencies=[Depends(verify_webhook_secret)])
+async def scheduler_stats():
+    return scheduler.stats()
+
+
+# Per-endpoint TMDb latency, retries and errors, plus cache and prefetch state
+@router.get("/health/tmdb", dependencies=[Depends(verify_webhook_secret)])
+async def tmdb_stats():
+    return {**container.tmdb.stats(), "prefetch": prefetcher.stats()}
+
+
+# Backend health (circuit state, latency, errors) when LLM_FALLBACKS is set,
+# and the utility tier's queue
+@router.get("/health/llm", dependencies=[Depends(verify_webhook_secret)])
+async def llm_stats():
+    return {**container.llm.stats(), "utility": container.utility_llm.stats()}
+
+
+# LLM tokens and latency per group over the last ``days``
+@router.get("/health/usage", dependencies=[Depends(verify_webhook_secret)])
+async def usage_stats(days: int = Query(7, ge=1, le=365)):
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    async with get_db() as db:
+        return {"days": days, "groups": await UsageService(db).totals_by_group(since)}
@@ -1,20 +1,36 @@
+import asyncio
+import json
 import logging
+import uuid
+from collections.abc import AsyncIterator, Callable
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from agents.main_agent import MainAgent
 from agents.subagents.poll import PollAgent
 from api.dependencies import verify_webhook_secret
+from commands import handle_command
 from config import settings
+from core.coalescer import Burst, coalescer
 from core.database import get_db
+from core.metrics import RATE_LIMITED
+from core.query_stats import query_budget
 from core.rate_limiter import rate_limiter
-from core.router import MessageRouter
+from core.router import MessageRouter, is_command, should_respond
+from core.scheduler import QueueFullError, scheduler
+from core.streaming import ReplySegmenter
 from core.token_budget import prepare_history
 from services.conversation import ConversationService
+from services.gateway import gateway_client
+from services.summary import SummaryService
+from services.usage import UsageService
 
 logger = logging.getLogger(__name__)
 
+QUEUE_FULL_REPLY = "Trop de messages en attente, renvoie le tien dans un instant !"
+
 router = APIRouter(dependencies=[Depends(verify_webhook_secret)])
 
 
@@ -25,6 +41,7 @@ class WhatsAppMessage(BaseModel):
     body: str
     timestamp: int
     is_direct: bool = False
+    message_id: str | None = None  # WhatsApp id, echoed back in async callbacks
 
 
 class PollCreatedEvent(BaseModel):
@@ -40,24 +57,103 @@ class PollVoteEvent(BaseModel):
 
 
 @router.post("/webhook/message")
-async def receive_message(message: WhatsAppMessage):
+async def receive_message(message: WhatsAppMessage, request: Request, response: Response):
+    # Stage 1: messages the bot ignores cost nothing — no DB, no agent
+    if not should_respond(message.body, is_direct=message.is_direct):
+        return {"reply": None}
+
     if not rate_limiter.is_allowed(message.from_):
+        RATE_LIMITED.inc()
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
-    async with get_db() as db:
-        agent = MainAgent(db)
-        msg_router = MessageRouter(agent, db)
-        conv_service = ConversationService(db)
-        group_id = message.from_
+    if settings.ASYNC_REPLIES:
+        job_id = await _enqueue_message(message)
+        response.status_code = 202
+        return {"job_id": job_id, "status": "queued"}
+
+    coalesced = coalescer.enabled and not is_command(message.body)
+    if not coalesced and "text/event-stream" in request.headers.get("accept", ""):
+        return _stream_reply(message)
+
+    try:
+        if coalesced:
+            burst, is_leader = coalescer.add(message.from_, message, _run_burst)
+            if not is_leader:
+                # Answered together with the first message of the burst
+                return {"reply": None}
+            return await burst.result
+
+        # Same-group messages are processed one at a time, in arrival order, so
+        # each one sees the history written by the previous one
+        return await scheduler.run(message.from_, lambda: process_message(message))
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Message queue is full")
+
+
+async def process_message(
+    message: WhatsAppMessage,
+    stored_id: uuid.UUID | None = None,
+    earlier: list[WhatsAppMessage] | None = None,
+    on_reply: Callable[[str], None] | None = None,
+) -> dict:
+    """Run an addressed message and build the gateway payload.
+
+    ``stored_id`` is set when the inbound messages were already persisted at
+    ingest (async mode): they are then not stored again, and history is cut
+    just before the first one. ``earlier`` holds the messages coalesced into
+    the same turn, oldest first. With ``on_reply`` the text reply is handed
+    over in formatted segments while the agent generates it, and the
+    returned payload only carries the poll.
+    """
+    segmenter = emit = None
+    if on_reply is not None:
+        segmenter = ReplySegmenter()
+        emit = _reply_emitter(message, on_reply)
+    on_delta = _segmenting(segmenter, emit) if segmenter is not None else None
+
+    if is_command(message.body):
+        with _query_budget(message.body.split(maxsplit=1)[0].lower()):
+            response = await _run_command(message, store_user=stored_id is None)
+    else:
+        with _query_budget("agent"):
+            response = await _run_agent(message, stored_id, earlier or [], on_delta)
+
+    if segmenter is not None:
+        # A poll is sent instead of its text, like the gateway does unstreamed
+        if isinstance(response, dict) and "poll" in response:
+            return {"reply": None, "poll": response["poll"]}
+        emit(segmenter.finish(_extract_response_text(response) if response else None))
+        return {"reply": None}
 
-        # Fetch history and split into user-only context + exclusion list
-        history = await conv_service.get_recent_history(group_id)
-        user_history, excluded_titles = prepare_history(history)
+    if response:
+        if isinstance(response, dict):
+            result = {"reply": _format_as_code_block(response["text"], message.body, message.sender_name)}
+            if "poll" in response:
+                result["poll"] = response["poll"]
+            return result
+        return {"reply": _format_as_code_block(response, message.body, message.sender_name)}
+    return {"reply": None}
+
+
+def _query_budget(label: str):
+    return query_budget(
+        label,
+        settings.QUERY_BUDGET_COUNT,
+        settings.QUERY_BUDGET_MS,
+        settings.QUERY_REPEAT_WARN,
+    )
+
+
+async def _run_command(message: WhatsAppMessage, store_user: bool) -> str | dict | None:
+    """Stage 2: slash commands need neither history nor the agent graph."""
+    group_id = message.from_
+    is_flush = message.body.strip().lower() == "/flush"
 
-        is_flush = message.body.strip().lower() == "/flush"
+    async with get_db() as db:
+        conv_service = ConversationService(db)
 
-        # Store the incoming user message (skip /flush — it clears history)
-        if not is_flush and msg_router.should_respond(message.body, is_direct=message.is_direct):
+        # Store the command (skip /flush — it clears history)
+        if store_user and not is_flush:
             await conv_service.store_message(
                 group_id=group_id,
                 role="user",
@@ -65,33 +161,230 @@ async def receive_message(message: WhatsAppMessage):
                 sender_name=message.sender_name,
             )
 
-        response = await msg_router.route(
-            message=message.body,
-            sender={"name": message.sender_name, "phone_hash": message.sender},
-            conversation_history=user_history,
-            excluded_titles=excluded_titles,
-            is_direct=message.is_direct,
+        response = await handle_command(
+            message.body,
+            {"name": message.sender_name, "phone_hash": message.sender},
+            db,
             group_id=group_id,
         )
 
         # Store the bot response (skip /flush — keep history clean after clear)
-        if response and not is_flush:
-            response_text = _extract_response_text(response)
-            if response_text:
+        if not is_flush:
+            await _store_reply(conv_service, group_id, response)
+    return response
+
+
+async def _run_agent(
+    message: WhatsAppMessage,
+    stored_id: uuid.UUID | None,
+    earlier: list[WhatsAppMessage],
+    on_delta: Callable[[str], None] | None = None,
+) -> str | dict | None:
+    """Stage 3: only LLM-bound messages pay for history and the agent graph."""
+    group_id = message.from_
+
+    async with get_db() as db:
+        conv_service = ConversationService(db)
+
+        # Fetch history, pack it into the token budget, build the exclusion list
+        history = await conv_service.get_recent_history(group_id)
+        # Only a group with a full window can have older messages summarized
+        summary = None
+        if len(history) >= settings.CONVERSATION_WINDOW_SIZE:
+            summary = await SummaryService(db).get(group_id)
+        if stored_id is not None:
+            history = _history_before(history, stored_id)
+        packed_history, excluded_titles = prepare_history(history)
+
+        # Store the incoming user message(s)
+        if stored_id is None:
+            for msg in [*earlier, message]:
                 await conv_service.store_message(
                     group_id=group_id,
-                    role="bot",
-                    content=response_text,
+                    role="user",
+                    content=msg.body,
+                    sender_name=msg.sender_name,
                 )
 
-    if response:
-        if isinstance(response, dict):
-            result = {"reply": _format_as_code_block(response["text"], message.body, message.sender_name)}
-            if "poll" in response:
-                result["poll"] = response["poll"]
-            return result
-        return {"reply": _format_as_code_block(response, message.body, message.sender_name)}
-    return {"reply": None}
+        agent = MainAgent(db)
+        response = await MessageRouter(agent, db).route(
+            message=message.body,
+            sender={"name": message.sender_name, "phone_hash": message.sender},
+            conversation_history=packed_history,
+            excluded_titles=excluded_titles,
+            is_direct=message.is_direct,
+            group_id=group_id,
+            burst=[(msg.sender_name, msg.body) for msg in earlier],
+            summary=summary.content if summary else None,
+            on_delta=on_delta,
+        )
+
+        await _store_reply(conv_service, group_id, response)
+        if agent.usage.calls:
+            await UsageService(db).record(
+                group_id, settings.LLM_PROVIDER, agent.llm.model, agent.usage
+            )
+    return response
+
+
+async def _store_reply(
+    conv_service: ConversationService, group_id: str, response: str | dict | None
+) -> None:
+    response_text = _extract_response_text(response) if response else None
+    if response_text:
+        await conv_service.store_message(
+            group_id=group_id,
+            role="bot",
+            content=response_text,
+        )
+
+
+def _stream_reply(message: WhatsAppMessage) -> StreamingResponse:
+    """Answer as server-sent events: one ``reply`` event per segment as the
+    agent generates them, then ``done`` (carrying the poll, if any) or
+    ``error``. The job runs in the group's scheduler lane like any other."""
+    events: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+
+    async def job(job_id: str) -> None:
+        try:
+            result = await process_message(
+                message, on_reply=lambda text: events.put_nowait(("reply", {"reply": text}))
+            )
+        except Exception:
+            logger.exception("Streamed reply failed for %s", message.from_)
+            events.put_nowait(("error", {}))
+        else:
+            events.put_nowait(("done", result))
+
+    try:
+        scheduler.submit(message.from_, job)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Message queue is full")
+
+    async def stream() -> AsyncIterator[str]:
+        while True:
+            event, data = await events.get()
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            if event != "reply":
+                return
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+def _reply_emitter(
+    message: WhatsAppMessage, on_reply: Callable[[str], None]
+) -> Callable[[list[str]], None]:
+    """Hand reply segments over formatted; only the first one can quote
+    the user's message."""
+    sent = 0
+
+    def emit(segments: list[str]) -> None:
+        nonlocal sent
+        for segment in segments:
+            if sent:
+                on_reply(_format_as_code_block(segment))
+            else:
+                on_reply(_format_as_code_block(segment, message.body, message.sender_name))
+            sent += 1
+
+    return emit
+
+
+def _segmenting(
+    segmenter: ReplySegmenter, emit: Callable[[list[str]], None]
+) -> Callable[[str], None]:
+    """Delta callback feeding the segmenter and emitting what it releases."""
+
+    def on_delta(delta: str) -> None:
+        emit(segmenter.feed(delta))
+
+    return on_delta
+
+
+async def _run_burst(burst: Burst) -> dict:
+    *earlier, last = burst.items
+    return await scheduler.run(
+        last.from_, lambda: process_message(last, earlier=earlier)
+    )
+
+
+async def _enqueue_message(message: WhatsAppMessage) -> str:
+    """Persist the inbound message, queue it for a background worker and
+    return the job id. The message is removed again if the queue is full."""
+    stored_id = None
+    if message.body.strip().lower() != "/flush":
+        async with get_db() as db:
+            stored = await ConversationService(db).store_message(
+                group_id=message.from_,
+                role="user",
+                content=message.body,
+                sender_name=message.sender_name,
+            )
+            stored_id = stored.id
+
+    if coalescer.enabled and not is_command(message.body):
+        # Coalesced messages share the job of the first one in the burst
+        burst, _ = coalescer.add(message.from_, (message, stored_id), _submit_burst)
+        return burst.id
+
+    try:
+        return _submit_job(message, stored_id)
+    except QueueFullError:
+        # The gateway retries: don't leave this copy in the history
+        if stored_id is not None:
+            async with get_db() as db:
+                await ConversationService(db).delete_message(stored_id)
+        raise HTTPException(status_code=503, detail="Message queue is full")
+
+
+async def _submit_burst(burst: Burst) -> None:
+    messages = [msg for msg, _ in burst.items]
+    first_stored_id = burst.items[0][1]
+    try:
+        _submit_job(messages[-1], first_stored_id, messages[:-1], job_id=burst.id)
+    except QueueFullError:
+        # The gateway already got its 202 and waits for a callback: say the
+        # burst was dropped rather than leave the group without an answer
+        last = messages[-1]
+        logger.error("Dropping burst %s for %s: queue is full", burst.id, last.from_)
+        async with get_db() as db:
+            conversation = ConversationService(db)
+            for _, stored_id in burst.items:
+                if stored_id is not None:
+                    await conversation.delete_message(stored_id)
+        await gateway_client.send_reply(
+            job_id=burst.id,
+            chat_id=last.from_,
+            message_id=last.message_id,
+            result={"reply": _format_as_code_block(QUEUE_FULL_REPLY)},
+        )
+
+
+def _submit_job(
+    message: WhatsAppMessage,
+    stored_id: uuid.UUID | None,
+    earlier: list[WhatsAppMessage] | None = None,
+    job_id: str | None = None,
+) -> str:
+    async def job(job_id: str) -> None:
+        result = await process_message(message, stored_id=stored_id, earlier=earlier)
+        if result.get("reply") or result.get("poll"):
+            await gateway_client.send_reply(
+                job_id=job_id,
+                chat_id=message.from_,
+                message_id=message.message_id,
+                result=result,
+            )
+
+    return scheduler.submit(message.from_, job, job_id=job_id)
+
+
+def _history_before(history: list, message_id: uuid.UUID) -> list:
+    """Drop the given message and anything stored after it."""
+    for i, msg in enumerate(history):
+        if msg.id == message_id:
+            return history[:i]
+    return history
 
 
 def _extract_response_text(response) -> str | None:
@@ -131,9 +424,10 @@ def _strip_quoted_message(text: str, original_message: str, sender_name: str) ->
 
 @router.post("/webhook/poll-created")
 async def poll_created(event: PollCreatedEvent):
-    async with get_db() as db:
-        agent = PollAgent(db)
-        result = await agent.set_wa_message_id(event.poll_id, event.wa_message_id)
+    with _query_budget("poll-created"):
+        async with get_db() as db:
+            agent = PollAgent(db)
+            result = await agent.set_wa_message_id(event.poll_id, event.wa_message_id)
     if "error" in result:
         logger.error("poll-created error: %s", result["error"])
         return {"success": False, "error": result["error"]}
@@ -143,13 +437,14 @@ async def poll_created(event: PollCreatedEvent):
 
 @router.post("/webhook/poll-vote")
 async def poll_vote(event: PollVoteEvent):
-    async with get_db() as db:
-        agent = PollAgent(db)
-        result = await agent.vote_by_label(
-            wa_message_id=event.wa_message_id,
-            selected_options=event.selected_options,
-            member_name=event.voter_name,
-        )
+    with _query_budget("poll-vote"):
+        async with get_db() as db:
+            agent = PollAgent(db)
+            result = await agent.vote_by_label(
+                wa_message_id=event.wa_message_id,
+                selected_options=event.selected_options,
+                member_name=event.voter_name,
+            )
     if "error" in result:
         logger.error("poll-vote error: %s", result["error"])
         return {"success": False, "error": result["error"]}
@@ -1,14 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from agents.subagents.movie import MovieAgent
-from config import settings
 
 
 async def cmd_film(args: str, sender: dict, db: AsyncSession, **kwargs) -> str:
     if not args.strip():
         return "Usage : /film [titre du film]"
 
-    agent = MovieAgent(settings.TMDB_API_KEY)
+    agent = MovieAgent(db)
     result = await agent.search(query=args.strip())
 
     if "error" in result:
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.conversation import ConversationService
+from services.summary import SummaryService
 
 
 async def cmd_flush(args: str, sender: dict, db: AsyncSession, group_id: str = "", **kwargs) -> str:
@@ -8,6 +9,7 @@ async def cmd_flush(args: str, sender: dict, db: AsyncSession, group_id: str = "
         return "Impossible d'effacer la memoire : groupe non identifie."
     service = ConversationService(db)
     deleted = await service.clear_recent_history(group_id)
+    await SummaryService(db).reset(group_id)
     if deleted == 0:
         return "Aucun message recent a effacer."
     return f"Memoire recente effacee ({deleted} messages supprimes). On repart a zero !"
@@ -1,14 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from agents.subagents.stats import StatsAgent
-from config import settings
 
 
 async def cmd_vu(args: str, sender: dict, db: AsyncSession, **kwargs) -> str:
     if not args.strip():
         return "Usage : /vu [titre du film]"
 
-    agent = StatsAgent(db, settings.TMDB_API_KEY)
+    agent = StatsAgent(db)
     result = await agent.mark_watched(movie_title=args.strip())
 
     if "error" in result:
@@ -30,7 +29,7 @@ async def cmd_noter(args: str, sender: dict, db: AsyncSession, **kwargs) -> str:
     if not 1 <= score <= 5:
         return "La note doit etre entre 1 et 5."
 
-    agent = StatsAgent(db, settings.TMDB_API_KEY)
+    agent = StatsAgent(db)
     result = await agent.rate(
         movie_title=movie_title,
         score=score,
@@ -43,7 +42,7 @@ async def cmd_noter(args: str, sender: dict, db: AsyncSession, **kwargs) -> str:
 
 
 async def cmd_historique(args: str, sender: dict, db: AsyncSession, **kwargs) -> str:
-    agent = StatsAgent(db, settings.TMDB_API_KEY)
+    agent = StatsAgent(db)
     history = await agent.get_history(limit=10)
 
     if not history:
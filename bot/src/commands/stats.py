@@ -1,11 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from agents.subagents.stats import StatsAgent
-from config import settings
 
 
 async def cmd_stats(args: str, sender: dict, db: AsyncSession, **kwargs) -> str:
-    agent = StatsAgent(db, settings.TMDB_API_KEY)
+    agent = StatsAgent(db)
     stats = await agent.get_stats()
 
     lines = [
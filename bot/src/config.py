@@ -3,19 +3,111 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # LLM provider settings — must be set in .env
-    LLM_PROVIDER: str  # gemini | openai | mistral | anthropic
+    LLM_PROVIDER: str  # gemini | openai | mistral | anthropic | scripted
     LLM_API_KEY: str
     LLM_MODEL: str = ""  # empty = provider default
     LLM_BASE_URL: str | None = None  # for Ollama: http://host:11434/v1
+    LLM_SCENARIO_FILE: str = ""  # scripted provider: JSON scenario to replay
 
     TMDB_API_KEY: str
+    TMDB_BASE_URL: str = "https://api.themoviedb.org/3"  # or a local stand-in
     DATABASE_URL: str
     BOT_NAME: str = "Regelebot"
-    CONVERSATION_WINDOW_SIZE: int = 10
+    CONVERSATION_WINDOW_SIZE: int = 30  # messages fetched (and cleared by /flush)
+    HISTORY_TOKEN_BUDGET: int = 4000  # history tokens sent to the LLM, newest first
     LLM_MAX_TOKENS: int = 2048
+    LLM_TIMEOUT: float = 60.0
+    TOOL_CONCURRENCY: int = 4  # tool calls of one model turn run at once
+    # Gemini: lifetime of the explicitly cached prompt prefix (0 = rely on
+    # implicit caching). Other providers cache the prefix automatically
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    # Backends tried after the one above, as a JSON list of objects with
+    # provider, api_key and optional model / base_url (empty = single backend)
+    LLM_FALLBACKS: list[dict] = []
+    LLM_ROUTING: str = "ordered"  # ordered | latency (fastest median first)
+    LLM_HEDGE: bool = True  # race the next backend once a call passes the p95
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latencies needed before hedging
+    LLM_BREAKER_FAILURES: int = 3  # consecutive errors that take a backend out
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0  # before a half-open probe
+
+    # Utility tier for auxiliary calls (mood -> genres, summaries): its own
+    # backend (empty provider = the main one), concurrency limit and deadline
+    UTILITY_LLM_PROVIDER: str = ""
+    UTILITY_LLM_API_KEY: str = ""  # empty = LLM_API_KEY
+    UTILITY_LLM_MODEL: str = ""  # empty = provider default
+    UTILITY_LLM_BASE_URL: str | None = None  # e.g. a local Ollama
+    UTILITY_LLM_CONCURRENCY: int = 2
+    UTILITY_LLM_TIMEOUT: float = 20.0
     WEBHOOK_SECRET: str
     RATE_LIMIT_PER_MINUTE: int = 10
 
+    # Async replies: /webhook/message answers 202 right away and background
+    # workers push the reply to the gateway's /callback/reply endpoint
+    ASYNC_REPLIES: bool = False
+    GATEWAY_URL: str = "http://gateway:3000"
+
+    # Message scheduler: in-order per group, parallel across groups
+    WORKER_CONCURRENCY: int = 4  # max messages processed at once, all groups
+    WORKER_QUEUE_SIZE: int = 500  # max queued messages before answering 503
+
+    # Shared HTTP connection pools (TMDb, LLM SDKs, gateway callbacks)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP2: bool = False  # requires the h2 package
+    WARMUP_ON_STARTUP: bool = True
+
+    # TMDb client: every call shares these limits (TMDb allows ~50 req/s)
+    TMDB_MAX_CONCURRENCY: int = 10
+    TMDB_RATE_PER_SECOND: float = 40.0
+    TMDB_MAX_RETRIES: int = 3
+    TMDB_CACHE_SIZE: int = 2000  # cached responses, TTL per endpoint (0 = off)
+    TMDB_NEGATIVE_TTL: float = 60.0  # seconds to cache empty results and failures
+    # Movie details persisted in movies.metadata are refreshed in the
+    # background once older than this
+    MOVIE_METADATA_MAX_AGE_DAYS: int = 7
+
+    # Background prefetch of trending / now playing / discover presets so
+    # those tools answer from the TMDb cache
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_INTERVAL_MINUTES: float = 30  # keep below the 1h trending TTL
+    PREFETCH_DISCOVER: str = "genres,providers"  # comma-separated presets
+
+    # Rolling summaries: messages older than the history window are folded
+    # into one summary per group by a background task, once a group has
+    # SUMMARY_MIN_MESSAGES of them
+    SUMMARY_ENABLED: bool = True
+    SUMMARY_INTERVAL_SECONDS: float = 300
+    SUMMARY_MIN_MESSAGES: int = 20
+    SUMMARY_MAX_GROUPS: int = 20  # groups summarized per cycle
+    SUMMARY_BATCH_MESSAGES: int = 100  # messages folded per LLM call
+    SUMMARY_CONCURRENCY: int = 2
+    SUMMARY_MAX_WORDS: int = 200
+
+    # Burst coalescing: @mentions from one group arriving within the window
+    # are answered in a single agent turn (0 = disabled). Needs
+    # ASYNC_REPLIES: in synchronous mode the gateway holds back a chat's
+    # next message until the bot has answered the current one
+    BURST_WINDOW_SECONDS: float = 0.0
+    BURST_MAX_MESSAGES: int = 5
+
+    # SQL accounting: warn when one message (or poll event) runs more than
+    # QUERY_BUDGET_COUNT statements or QUERY_BUDGET_MS of DB time, repeats a
+    # statement QUERY_REPEAT_WARN times (likely N+1; 0 = off), or when one
+    # statement takes longer than SLOW_QUERY_MS (0 = off)
+    QUERY_BUDGET_COUNT: int = 25
+    QUERY_BUDGET_MS: float = 500.0
+    QUERY_REPEAT_WARN: int = 5
+    SLOW_QUERY_MS: float = 200.0
+
+    # OpenTelemetry tracing over OTLP/HTTP; needs opentelemetry-sdk and
+    # opentelemetry-exporter-otlp-proto-http when enabled
+    TRACING_ENABLED: bool = False
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0  # share of new traces kept, 0-1
+    TRACING_SERVICE_NAME: str = "regelebot"
+
     model_config = {"env_file": ".env", "extra": "ignore"}
 
 
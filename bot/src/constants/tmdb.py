@@ -1,3 +1,20 @@
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+
+_HOUR = 3600
+_DAY = 24 * _HOUR
+
+# Response cache TTL per endpoint family, in seconds; unlisted families are
+# not cached
+TMDB_CACHE_TTLS = {
+    "/movie/{id}": 3 * _DAY,
+    "/movie/{id}/similar": _DAY,
+    "/search/movie": 6 * _HOUR,
+    "/discover/movie": 6 * _HOUR,
+    "/movie/now_playing": 3 * _HOUR,
+    "/trending/movie/day": _HOUR,
+    "/trending/movie/week": _HOUR,
+}
+
 GENRE_MAP = {
     "action": 28, "aventure": 12, "animation": 16,
     "comedie": 35, "comédie": 35, "crime": 80,
@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class TTLCache:
+    """Bounded in-memory cache: per-entry TTL, least recently used evicted first.
+
+    Values are returned as stored, not copied: callers must treat them as
+    read-only. ``maxsize=0`` disables caching.
+    """
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, tuple[float, str, Any]] = OrderedDict()
+        self._stats: dict[str, CacheStats] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any, family: str = "default") -> Any | None:
+        stats = self._stats.setdefault(family, CacheStats())
+        entry = self._data.get(key)
+        if entry is None:
+            stats.misses += 1
+            return None
+        expires, _, value = entry
+        if expires <= time.monotonic():
+            del self._data[key]
+            stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        stats.hits += 1
+        return value
+
+    def set(self, key: Any, value: Any, ttl: float, family: str = "default") -> None:
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, family, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            _, (_, evicted, _) = self._data.popitem(last=False)
+            self._stats.setdefault(evicted, CacheStats()).evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "families": {f: s.as_dict() for f, s in self._stats.items()},
+        }
@@ -0,0 +1,62 @@
+import time
+from collections.abc import Callable
+
+
+class CircuitBreaker:
+    """Stops calling a dependency that keeps failing.
+
+    ``failures`` consecutive failures open the circuit: ``allow()`` refuses
+    calls for ``cooldown`` seconds. After that the circuit is half-open and
+    lets exactly one probe through; its success closes the circuit, its
+    failure opens it for another cooldown. A probe that ends without an
+    outcome (cancelled) must be handed back with ``release()``.
+    """
+
+    def __init__(
+        self,
+        failures: int,
+        cooldown: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failures = max(1, failures)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._consecutive = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self.opened = 0  # times the circuit opened
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; in half-open state this
+        claims the single probe."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._consecutive = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._consecutive += 1
+        if self._probing or self._consecutive >= self.failures:
+            if self._opened_at is None or self._probing:
+                self.opened += 1
+            self._opened_at = self._clock()
+        self._probing = False
+
+    def release(self) -> None:
+        self._probing = False
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Burst:
+    id: str
+    items: list[Any]
+    result: asyncio.Future
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+FlushCallback = Callable[[Burst], Awaitable[Any]]
+
+
+class BurstCoalescer:
+    """Merges consecutive agent-bound messages from a group into one turn.
+
+    The first message of a group opens a burst; messages from the same group
+    arriving within ``window`` seconds join it. When the window closes (or the
+    burst holds ``max_messages``), the first message's ``on_flush`` runs once
+    with every item in arrival order, and its result lands in ``burst.result``.
+    """
+
+    def __init__(self, window: float, max_messages: int = 5) -> None:
+        self.window = window
+        self.max_messages = max(1, max_messages)
+        self._open: dict[str, Burst] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def add(self, group_id: str, item: Any, on_flush: FlushCallback) -> tuple[Burst, bool]:
+        """Add an item to the group's open burst.
+
+        Returns ``(burst, is_leader)``: only the leader (the message that
+        opened the burst) gets a result; the others are answered with it.
+        """
+        burst = self._open.get(group_id)
+        if burst is not None:
+            burst.items.append(item)
+            if len(burst.items) >= self.max_messages:
+                burst.full.set()
+            return burst, False
+
+        burst = Burst(
+            id=uuid.uuid4().hex,
+            items=[item],
+            result=asyncio.get_running_loop().create_future(),
+        )
+        self._open[group_id] = burst
+        if self.max_messages == 1:
+            burst.full.set()
+        task = asyncio.create_task(self._flush(group_id, burst, on_flush))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return burst, True
+
+    async def stop(self) -> None:
+        """Flush every open burst now."""
+        for burst in self._open.values():
+            burst.full.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _flush(self, group_id: str, burst: Burst, on_flush: FlushCallback) -> None:
+        try:
+            await asyncio.wait_for(burst.full.wait(), timeout=self.window)
+        except asyncio.TimeoutError:
+            pass
+
+        # Close the burst first: messages arriving from now on open a new one
+        if self._open.get(group_id) is burst:
+            del self._open[group_id]
+        if len(burst.items) > 1:
+            logger.info("Coalesced %d messages for group %s", len(burst.items), group_id)
+
+        try:
+            result = await on_flush(burst)
+        except Exception as e:
+            burst.result.set_exception(e)
+        else:
+            burst.result.set_result(result)
+
+
+coalescer = BurstCoalescer(settings.BURST_WINDOW_SECONDS, settings.BURST_MAX_MESSAGES)
@@ -0,0 +1,135 @@
+import logging
+
+import httpx
+
+from config import settings
+from core.cache import TTLCache
+from llm import LLMProvider, create_llm_provider, create_utility_llm_provider
+from services.tmdb import TMDbClient
+
+logger = logging.getLogger(__name__)
+
+
+def build_http_client(timeout: float | None = None) -> httpx.AsyncClient:
+    """HTTP client with the pool limits and keep-alive from settings."""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        timeout=timeout or settings.HTTP_TIMEOUT,
+        limits=limits,
+        http2=_http2_available(),
+    )
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2=true but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+class ServiceContainer:
+    """Clients shared by every request, created once per process.
+
+    The app lifespan calls ``start()`` and ``close()``; outside of it (scripts,
+    tests) each client is created lazily on first access.
+    """
+
+    def __init__(self) -> None:
+        self._llm: LLMProvider | None = None
+        self._llm_http: httpx.AsyncClient | None = None
+        self._utility_llm: LLMProvider | None = None
+        self._utility_http: httpx.AsyncClient | None = None
+        self._tmdb_http: httpx.AsyncClient | None = None
+        self._tmdb: TMDbClient | None = None
+        self._gateway_http: httpx.AsyncClient | None = None
+
+    @property
+    def llm(self) -> LLMProvider:
+        if self._llm is None:
+            self._llm_http = build_http_client(timeout=settings.LLM_TIMEOUT)
+            self._llm = create_llm_provider(http_client=self._llm_http)
+        return self._llm
+
+    @property
+    def utility_llm(self) -> LLMProvider:
+        """Tier for auxiliary calls, limited separately from the agent's."""
+        if self._utility_llm is None:
+            if settings.UTILITY_LLM_PROVIDER:
+                self._utility_http = build_http_client(timeout=settings.UTILITY_LLM_TIMEOUT)
+            self._utility_llm = create_utility_llm_provider(
+                self.llm, http_client=self._utility_http
+            )
+        return self._utility_llm
+
+    @property
+    def tmdb_http(self) -> httpx.AsyncClient:
+        if self._tmdb_http is None:
+            self._tmdb_http = build_http_client()
+        return self._tmdb_http
+
+    @property
+    def tmdb(self) -> TMDbClient:
+        if self._tmdb is None:
+            self._tmdb = TMDbClient(
+                settings.TMDB_API_KEY,
+                self.tmdb_http,
+                base_url=settings.TMDB_BASE_URL,
+                max_concurrency=settings.TMDB_MAX_CONCURRENCY,
+                rate_per_second=settings.TMDB_RATE_PER_SECOND,
+                max_retries=settings.TMDB_MAX_RETRIES,
+                cache=TTLCache(settings.TMDB_CACHE_SIZE),
+                negative_ttl=settings.TMDB_NEGATIVE_TTL,
+            )
+        return self._tmdb
+
+    @property
+    def gateway_http(self) -> httpx.AsyncClient:
+        if self._gateway_http is None:
+            self._gateway_http = build_http_client()
+        return self._gateway_http
+
+    async def start(self, warm_up: bool = True) -> None:
+        llm = self.llm
+        if not warm_up:
+            return
+        # Pay DNS + TLS handshakes now rather than on the first message
+        try:
+            await llm.warm_up()
+        except Exception as e:
+            logger.warning("LLM warm-up failed: %s", e)
+        if settings.UTILITY_LLM_PROVIDER:
+            try:
+                await self.utility_llm.warm_up()
+            except Exception as e:
+                logger.warning("Utility LLM warm-up failed: %s", e)
+        try:
+            await self.tmdb_http.get(
+                f"{settings.TMDB_BASE_URL}/configuration",
+                params={"api_key": settings.TMDB_API_KEY},
+            )
+        except httpx.HTTPError as e:
+            logger.warning("TMDb warm-up failed: %s", e)
+
+    async def close(self) -> None:
+        # Without its own backend the utility tier wraps the main provider
+        if self._utility_llm is not None and settings.UTILITY_LLM_PROVIDER:
+            await self._utility_llm.close()
+        if self._llm is not None:
+            await self._llm.close()
+        for client in (self._llm_http, self._utility_http, self._tmdb_http, self._gateway_http):
+            if client is not None:
+                await client.aclose()
+        self._llm = self._utility_llm = None
+        self._tmdb = None
+        self._llm_http = self._utility_http = self._tmdb_http = self._gateway_http = None
+
+
+container = ServiceContainer()
@@ -1,20 +1,43 @@
-from collections.abc import AsyncGenerator
+import logging
+from collections.abc import AsyncGenerator, Awaitable, Callable
 from contextlib import asynccontextmanager
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from config import settings
+from core.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
 
 engine = create_async_engine(settings.DATABASE_URL, echo=False)
+instrument_engine(engine, slow_ms=settings.SLOW_QUERY_MS)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+_AFTER_COMMIT = "after_commit"
+
+
+def after_commit(session: AsyncSession, fn: Callable[[], Awaitable[None]]) -> None:
+    """Run ``fn`` once the get_db() block that opened ``session`` has
+    committed; it is dropped if the transaction rolls back."""
+    session.info.setdefault(_AFTER_COMMIT, []).append(fn)
+
 
 @asynccontextmanager
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(parent: AsyncSession | None = None) -> AsyncGenerator[AsyncSession, None]:
+    """Session committed on exit. With ``parent``, work deferred with
+    after_commit() waits for the parent's commit instead of this one."""
     async with async_session() as session:
+        if parent is not None:
+            session.info[_AFTER_COMMIT] = parent.info.setdefault(_AFTER_COMMIT, [])
         try:
             yield session
             await session.commit()
         except Exception:
             await session.rollback()
             raise
+    if parent is None:
+        for fn in session.info.pop(_AFTER_COMMIT, []):
+            try:
+                await fn()
+            except Exception:
+                logger.exception("After-commit callback failed")
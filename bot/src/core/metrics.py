@@ -0,0 +1,305 @@
+"""In-process Prometheus metrics, rendered in the text exposition format.
+
+A deliberately small subset of prometheus_client: counters, gauges and
+histograms with fixed label names. Label values must come from bounded
+sets (provider, tool name, endpoint family, table...), never from chat or
+group ids, so the series count stays constant whatever the traffic.
+"""
+import re
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Exposition lines for every labelled series of this metric."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{self._labels(key)} {_number(value)}"
+
+
+class Gauge(_Metric):
+    """Settable gauge; ``set_function`` makes an unlabelled gauge read its
+    value at scrape time instead."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0.0)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        if self.labelnames:
+            raise ValueError("set_function needs an unlabelled gauge")
+        self._function = function
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> Iterator[str]:
+        if self._function is not None:
+            yield f"{self.name} {_number(self._function())}"
+            return
+        for key, value in self._values.items():
+            yield f"{self.name}{self._labels(key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [count per bucket (non-cumulative, +Inf last), sum]
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = entry
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the block's duration in seconds, including when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+            for le, count in zip(bounds, counts):
+                cumulative += count
+                labels = self._labels(key, f'le="{le}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_number(total[0])}"
+            yield f"{self.name}_count{self._labels(key)} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# --- Hot-path metrics -------------------------------------------------------
+
+HTTP_IN_FLIGHT = Gauge(
+    "regelebot_http_requests_in_flight", "HTTP requests being handled."
+)
+SCHEDULER_RUNNING = Gauge(
+    "regelebot_scheduler_running", "Messages being processed by the scheduler."
+)
+SCHEDULER_QUEUED = Gauge(
+    "regelebot_scheduler_queued", "Messages waiting for a scheduler slot (not yet running)."
+)
+RATE_LIMITED = Counter(
+    "regelebot_rate_limited_total", "Messages rejected by the per-sender rate limiter."
+)
+
+LLM_GENERATE_SECONDS = Histogram(
+    "regelebot_llm_generate_seconds",
+    "LLM generate latency; iteration 0 is the first call, then one per ReAct step.",
+    ("provider", "model", "iteration"),
+    buckets=LLM_BUCKETS,
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "regelebot_llm_first_token_seconds",
+    "Time from a streamed LLM call to its first text delta.",
+    ("provider", "model"),
+    buckets=LLM_BUCKETS,
+)
+LLM_ERRORS = Counter(
+    "regelebot_llm_errors_total", "Failed LLM generate calls.", ("provider", "model")
+)
+LLM_BACKEND_CALLS = Counter(
+    "regelebot_llm_backend_calls_total",
+    "Calls per backend of a multi-backend LLM setup; outcome is ok, error or "
+    "cancelled (lost a hedge race).",
+    ("backend", "outcome"),
+)
+LLM_HEDGES = Counter(
+    "regelebot_llm_hedges_total",
+    "Requests also sent to this backend because the first one passed its p95.",
+    ("backend",),
+)
+LLM_UTILITY_CALLS = Counter(
+    "regelebot_llm_utility_calls_total",
+    "Auxiliary LLM calls (mood mapping, summaries); outcome is ok, error or timeout.",
+    ("model", "outcome"),
+)
+LLM_TOKENS = Counter(
+    "regelebot_llm_tokens_total",
+    "Tokens reported by the provider; kind is prompt, completion or cached "
+    "(cached tokens are also counted in prompt).",
+    ("provider", "model", "kind"),
+)
+LLM_MESSAGE_TOKENS = Histogram(
+    "regelebot_llm_message_tokens",
+    "Tokens per answered message, summed over its ReAct loop.",
+    ("kind",),
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+LLM_MESSAGE_CALLS = Histogram(
+    "regelebot_llm_message_calls",
+    "LLM generate calls per answered message.",
+    buckets=(1, 2, 3, 4, 5, 6),
+)
+LLM_IN_FLIGHT = Gauge(
+    "regelebot_llm_requests_in_flight", "LLM generate calls awaiting a response."
+)
+
+TOOL_SECONDS = Histogram(
+    "regelebot_tool_seconds", "Tool execution latency in the ReAct loop.", ("tool",)
+)
+TOOL_ERRORS = Counter("regelebot_tool_errors_total", "Tool calls that raised.", ("tool",))
+
+TMDB_REQUEST_SECONDS = Histogram(
+    "regelebot_tmdb_request_seconds",
+    "TMDb HTTP latency per attempt (retries are separate observations).",
+    ("endpoint",),
+)
+TMDB_ERRORS = Counter(
+    "regelebot_tmdb_errors_total", "TMDb calls that failed after retries.", ("endpoint",)
+)
+TMDB_CACHE_LOOKUPS = Counter(
+    "regelebot_tmdb_cache_lookups_total",
+    "TMDb response cache lookups; hit ratio = hit / (hit + miss).",
+    ("endpoint", "result"),
+)
+TMDB_IN_FLIGHT = Gauge(
+    "regelebot_tmdb_requests_in_flight", "TMDb HTTP requests awaiting a response."
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "regelebot_db_query_seconds",
+    "SQL statement latency per operation and main table.",
+    ("operation", "table"),
+    buckets=DB_BUCKETS,
+)
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_family(statement: str) -> tuple[str, str]:
+    """``SELECT movies.id FROM movies WHERE ...`` -> ``("SELECT", "movies")``."""
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words else ""
+    if operation not in _OPERATIONS:
+        return "OTHER", ""
+    match = _TABLE.search(statement)
+    return operation, match.group(1).lower() if match else ""
@@ -0,0 +1,138 @@
+"""Per-request SQL accounting.
+
+Engine events time every statement into the ``regelebot_db_query_seconds``
+histogram and, inside ``track_queries()``, into that block's QueryStats:
+statement count, cumulative DB time, the slowest statement and how often
+each distinct statement ran (the same SELECT issued many times is usually
+an N+1 loop). ``query_budget()`` logs a structured warning when a block
+goes over its budget; ``assert_max_queries()`` is the test-side check.
+"""
+import logging
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.metrics import DB_QUERY_SECONDS, statement_family
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str = ""
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least ``threshold`` times, most frequent first."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    def as_dict(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(1000 * self.seconds, 1),
+            "slowest_ms": round(1000 * self.slowest_seconds, 1),
+        }
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Account every statement run by this task (and tasks it starts)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(
+    label: str,
+    max_queries: int,
+    max_ms: float,
+    repeat_threshold: int = 0,
+) -> Iterator[QueryStats]:
+    """``track_queries()`` that warns when the block exceeds its budget or
+    repeats one statement ``repeat_threshold`` times (0 disables)."""
+    with track_queries() as stats:
+        yield stats
+    over = stats.count > max_queries or 1000 * stats.seconds > max_ms
+    repeated = stats.repeated(repeat_threshold) if repeat_threshold else []
+    if over:
+        logger.warning(
+            "Query budget exceeded for %s: %d queries, %.1f ms (budget %d, %.0f ms)",
+            label, stats.count, 1000 * stats.seconds, max_queries, max_ms,
+            extra={"query_budget": {"label": label, **stats.as_dict(),
+                                    "slowest": _shorten(stats.slowest_statement)}},
+        )
+    for statement, times in repeated:
+        logger.warning(
+            "Possible N+1 in %s: statement ran %d times: %s",
+            label, times, _shorten(statement),
+            extra={"query_budget": {"label": label, "repeats": times,
+                                    "statement": _shorten(statement)}},
+        )
+
+
+@asynccontextmanager
+async def assert_max_queries(limit: int) -> AsyncIterator[QueryStats]:
+    """Test helper: fail if the block runs more than ``limit`` statements."""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {n}x {_shorten(s)}" for s, n in stats.statements.most_common())
+        raise AssertionError(f"{stats.count} queries, expected at most {limit}:\n{listing}")
+
+
+def instrument_engine(engine: AsyncEngine, slow_ms: float = 0.0) -> None:
+    """Time every statement; log those slower than ``slow_ms`` (0 = never)."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation, table = statement_family(statement)
+        DB_QUERY_SECONDS.observe(elapsed, operation=operation, table=table)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if slow_ms and 1000 * elapsed > slow_ms:
+            logger.warning(
+                "Slow query (%.1f ms): %s", 1000 * elapsed, _shorten(statement),
+                extra={"slow_query": {"ms": round(1000 * elapsed, 1), "table": table}},
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("query_started") if context.connection else None
+        if stack:
+            stack.pop()
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
@@ -1,5 +1,6 @@
 import logging
 import re
+from collections.abc import Callable
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,26 +11,38 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+_BOT_NAMES = {settings.BOT_NAME.lower(), "regelebot"}
+BOT_MENTION_PATTERN = re.compile(
+    rf"@(?:{'|'.join(re.escape(n) for n in _BOT_NAMES)})\s*", re.IGNORECASE
+)
+
+
+def should_respond(message: str, *, is_direct: bool = False) -> bool:
+    """Cheap pre-check: commands, direct chats and @mentions get a reply."""
+    if message.startswith("/"):
+        return True
+    if is_direct:
+        return True
+    if BOT_MENTION_PATTERN.search(message):
+        return True
+    return False
+
+
+def is_command(message: str) -> bool:
+    return message.startswith("/")
+
 
 class MessageRouter:
     def __init__(self, main_agent: MainAgent, db: AsyncSession):
         self.agent = main_agent
         self.db = db
-        names = {settings.BOT_NAME.lower(), "regelebot"}
-        pattern = "|".join(re.escape(n) for n in names)
-        self.bot_mention_pattern = re.compile(rf"@(?:{pattern})\s*", re.IGNORECASE)
+        self.bot_mention_pattern = BOT_MENTION_PATTERN
 
     def should_respond(self, message: str, *, is_direct: bool = False) -> bool:
-        if message.startswith("/"):
-            return True
-        if is_direct:
-            return True
-        if self.bot_mention_pattern.search(message):
-            return True
-        return False
+        return should_respond(message, is_direct=is_direct)
 
     def is_command(self, message: str) -> bool:
-        return message.startswith("/")
+        return is_command(message)
 
     def clean_message(self, message: str) -> str:
         return self.bot_mention_pattern.sub("", message).strip()
@@ -43,6 +56,9 @@ class MessageRouter:
         *,
         is_direct: bool = False,
         group_id: str = "",
+        burst: list[tuple[str, str]] | None = None,
+        summary: str | None = None,
+        on_delta: Callable[[str], None] | None = None,
     ) -> Optional[str | dict]:
         if not self.should_respond(message, is_direct=is_direct):
             return None
@@ -51,7 +67,14 @@ class MessageRouter:
             return await handle_command(message, sender, self.db, group_id=group_id)
 
         clean_msg = self.clean_message(message)
+        clean_burst = [(name, self.clean_message(text)) for name, text in burst or []]
         logger.info("Agent processing: %s from %s", clean_msg[:50], sender["name"])
         return await self.agent.process(
-            clean_msg, sender["name"], conversation_history, excluded_titles
+            clean_msg,
+            sender["name"],
+            conversation_history,
+            excluded_titles,
+            burst=clean_burst or None,
+            summary=summary,
+            on_delta=on_delta,
         )
@@ -69,6 +69,11 @@ def wrap_user_content(sender_name: str, message: str) -> str:
 </user_message>"""
 
 
+def wrap_user_messages(turns: list[tuple[str, str]]) -> str:
+    """Wrap several (sender_name, message) pairs answered in a single turn."""
+    return "\n".join(wrap_user_content(sender, message) for sender, message in turns)
+
+
 def detect_leaked_system_prompt(response: str) -> bool:
     """Check if response appears to contain leaked system instructions."""
     leak_indicators = [
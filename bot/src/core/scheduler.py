@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from config import settings
+from core import tracing
+from core.metrics import SCHEDULER_QUEUED, SCHEDULER_RUNNING
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A job receives its own id so it can report back (e.g. in a gateway callback)
+Job = Callable[[str], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    pass
+
+
+@dataclass
+class _Pending:
+    job_id: str
+    job: Job
+    enqueued_at: float
+
+
+@dataclass
+class GroupStats:
+    queued: int = 0
+    running: bool = False
+    processed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    last_wait: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "processed": self.processed,
+            "avg_wait_ms": round(1000 * self.total_wait / self.processed, 1)
+            if self.processed
+            else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait, 1),
+            "last_wait_ms": round(1000 * self.last_wait, 1),
+        }
+
+
+@dataclass
+class _Lane:
+    pending: deque[_Pending] = field(default_factory=deque)
+    stats: GroupStats = field(default_factory=GroupStats)
+    scheduled: bool = False  # running or waiting in the ready queue
+
+
+class MessageScheduler:
+    """Runs message jobs strictly in order per group, groups in parallel.
+
+    At most ``concurrency`` jobs run at once across all groups. Groups
+    waiting for a slot are served round-robin, so one busy group cannot
+    starve the others. ``maxsize`` bounds the number of queued (not yet
+    running) jobs; 0 means unbounded. A group's lane only lives while it
+    has a job queued or running; its stats outlive it for the
+    ``stats_groups`` most recently active groups.
+    """
+
+    def __init__(self, concurrency: int, maxsize: int = 0, stats_groups: int = 1000) -> None:
+        self.concurrency = max(1, concurrency)
+        self.maxsize = maxsize
+        self.stats_groups = stats_groups
+        self._lanes: dict[str, _Lane] = {}
+        self._recent: OrderedDict[str, GroupStats] = OrderedDict()
+        self._ready: deque[str] = deque()
+        self._tasks: set[asyncio.Task] = set()
+        self._queued = 0
+        self._stopping = False
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def submit(self, group_id: str, job: Job, job_id: str | None = None) -> str:
+        """Queue a fire-and-forget job for a group and return its id."""
+        if self.maxsize and self._queued >= self.maxsize:
+            raise QueueFullError("Message queue is full")
+
+        lane = self._lanes.get(group_id)
+        if lane is None:
+            lane = self._lanes[group_id] = _Lane(stats=self._recent.pop(group_id, GroupStats()))
+        job_id = job_id or uuid.uuid4().hex
+        # Jobs start from whichever task frees a slot: keep the submitter's trace
+        lane.pending.append(_Pending(job_id, tracing.bind(job), time.monotonic()))
+        lane.stats.queued += 1
+        self._queued += 1
+
+        if not lane.scheduled:
+            lane.scheduled = True
+            self._ready.append(group_id)
+            self._dispatch()
+        return job_id
+
+    async def run(self, group_id: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` in the group's lane and wait for its result."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        async def job(job_id: str) -> None:
+            try:
+                result = await fn()
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+        self.submit(group_id, job)
+        return await future
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queued,
+            "concurrency": self.concurrency,
+            "groups": {
+                gid: stats.as_dict()
+                for gid, stats in [
+                    *self._recent.items(),
+                    *((gid, lane.stats) for gid, lane in self._lanes.items()),
+                ]
+            },
+        }
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Let queued jobs finish (up to drain_timeout), then cancel the rest."""
+        deadline = time.monotonic() + drain_timeout
+        while (self._tasks or self._queued) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._queued:
+            logger.warning("Scheduler stopped with %d jobs pending", self._queued)
+
+        self._stopping = True
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._lanes.clear()
+        self._ready.clear()
+        self._queued = 0
+        self._stopping = False
+
+    def _dispatch(self) -> None:
+        if self._stopping:
+            return
+        while self._ready and len(self._tasks) < self.concurrency:
+            group_id = self._ready.popleft()
+            lane = self._lanes[group_id]
+            pending = lane.pending.popleft()
+            lane.stats.queued -= 1
+            lane.stats.running = True
+            self._queued -= 1
+
+            wait = time.monotonic() - pending.enqueued_at
+            lane.stats.last_wait = wait
+            lane.stats.total_wait += wait
+            lane.stats.max_wait = max(lane.stats.max_wait, wait)
+
+            task = asyncio.create_task(
+                self._execute(group_id, pending), name=f"job-{pending.job_id}"
+            )
+            self._tasks.add(task)
+
+    async def _execute(self, group_id: str, pending: _Pending) -> None:
+        try:
+            await pending.job(pending.job_id)
+        except Exception:
+            logger.exception("Job %s failed (group %s)", pending.job_id, group_id)
+        finally:
+            self._tasks.discard(asyncio.current_task())
+            lane = self._lanes.get(group_id)
+            if lane is not None:
+                lane.stats.running = False
+                lane.stats.processed += 1
+                if lane.pending:
+                    # Back of the line: other groups get a turn first
+                    self._ready.append(group_id)
+                else:
+                    del self._lanes[group_id]
+                    self._remember(group_id, lane.stats)
+            self._dispatch()
+
+    def _remember(self, group_id: str, stats: GroupStats) -> None:
+        self._recent[group_id] = stats
+        while len(self._recent) > self.stats_groups:
+            self._recent.popitem(last=False)
+
+
+scheduler = MessageScheduler(settings.WORKER_CONCURRENCY, settings.WORKER_QUEUE_SIZE)
+SCHEDULER_RUNNING.set_function(lambda: scheduler.running)
+SCHEDULER_QUEUED.set_function(lambda: scheduler.queued)
@@ -0,0 +1,68 @@
+"""Cut a streamed agent answer into WhatsApp-sized messages.
+
+The gateway gets the first sentence as soon as it is complete, then one
+message per paragraph (or per sentence once a paragraph runs past
+``max_chars``). Leak detection runs on everything generated so far before
+each release: once it fires nothing more goes out, and ``finish()`` returns
+the agent's final (filtered) answer instead.
+"""
+import re
+
+from core.sanitization import detect_leaked_system_prompt
+
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+
+class ReplySegmenter:
+    def __init__(self, min_first: int = 20, max_chars: int = 600):
+        self.min_first = min_first
+        self.max_chars = max_chars
+        self.text = ""
+        self.released = 0  # chars of ``text`` already handed out
+        self.leaked = False
+
+    def feed(self, delta: str) -> list[str]:
+        """Add a delta; return the segments that are now complete."""
+        if self.leaked:
+            return []
+        self.text += delta
+        if detect_leaked_system_prompt(self.text):
+            self.leaked = True
+            return []
+
+        segments = []
+        while (cut := self._next_cut()) is not None:
+            segment = self.text[self.released:cut].strip()
+            self.released = cut
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def finish(self, final: str | None) -> list[str]:
+        """Segments left to send once the agent returned ``final``."""
+        if not final:
+            return []
+        released = self.text[:self.released]
+        if self.leaked or not final.startswith(released):
+            # The agent replaced what was streamed (leak filter, error message)
+            return [final]
+        rest = final[self.released:].strip()
+        return [rest] if rest else []
+
+    def _next_cut(self) -> int | None:
+        pending = self.text[self.released:]
+        if not self.released:
+            # First message: the first full sentence long enough to stand alone
+            for match in _SENTENCE_END.finditer(pending):
+                if match.end() >= self.min_first:
+                    return match.end()
+            return None
+
+        paragraph = pending.find("\n\n")
+        if paragraph >= 0:
+            return self.released + paragraph + 2
+        if len(pending) > self.max_chars:
+            ends = [m.end() for m in _SENTENCE_END.finditer(pending) if m.end() <= self.max_chars]
+            if ends:
+                return self.released + ends[-1]
+        return None
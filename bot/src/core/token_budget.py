@@ -1,4 +1,22 @@
+"""History token budget.
+
+Counts are exact when a tokenizer for the provider is installed locally
+(tiktoken for OpenAI models, mistral-common for Mistral); otherwise a
+character-based estimate whose chars-per-token ratio is calibrated against
+the prompt tokens the provider reports back. Counts are cached on each
+stored message, so packing a window never re-tokenizes it.
+"""
+import logging
 import re
+from collections.abc import Callable
+from functools import lru_cache
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Role markers plus the <user_message> envelope wrapped around each turn
+MESSAGE_OVERHEAD_TOKENS = 8
 
 # Common French sentence words that precede movie titles but aren't part of them
 _FILLER_PREFIX = re.compile(
@@ -15,6 +33,94 @@ def estimate_tokens(text: str) -> int:
     return max(1, len(text) // 4)
 
 
+class TokenCounter:
+    """Token counts from a local tokenizer, or a calibrated estimate."""
+
+    def __init__(self, encode: Callable[[str], list] | None = None, chars_per_token: float = 4.0):
+        self._encode = encode
+        self.chars_per_token = chars_per_token
+
+    @property
+    def exact(self) -> bool:
+        return self._encode is not None
+
+    def count(self, text: str) -> int:
+        if self._encode is not None:
+            return len(self._encode(text))
+        return max(1, round(len(text) / self.chars_per_token))
+
+    def calibrate(self, chars: int, prompt_tokens: int) -> None:
+        """Nudge the estimate towards a provider-reported prompt size."""
+        if self._encode is not None or chars <= 0 or prompt_tokens <= 0:
+            return
+        observed = min(max(chars / prompt_tokens, 2.0), 6.0)
+        self.chars_per_token += 0.1 * (observed - self.chars_per_token)
+
+
+def _load_encoder(provider: str, model: str, base_url: str | None) -> Callable[[str], list] | None:
+    # An OpenAI-compatible base URL (Ollama) serves models tiktoken knows nothing of
+    if provider == "openai" and not base_url:
+        try:
+            import tiktoken
+        except ImportError:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model).encode
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base").encode
+    if provider == "mistral":
+        try:
+            from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
+        except ImportError:
+            return None
+        tokenizer = MistralTokenizer.from_model(model).instruct_tokenizer.tokenizer
+        return lambda text: tokenizer.encode(text, bos=False, eos=False)
+    return None
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(
+    provider: str | None = None, model: str | None = None, base_url: str | None = None
+) -> TokenCounter:
+    """Shared counter for a provider/model; defaults to the configured LLM."""
+    if provider is None:
+        provider, model, base_url = settings.LLM_PROVIDER, settings.LLM_MODEL, settings.LLM_BASE_URL
+    try:
+        encode = _load_encoder(provider, model or "", base_url)
+    except Exception as e:  # missing vocabulary file, unknown model...
+        logger.warning("No local tokenizer for %s/%s, estimating: %s", provider, model, e)
+        encode = None
+    return TokenCounter(encode)
+
+
+def message_tokens(msg, counter: TokenCounter) -> int:
+    """Tokens one stored message costs in the prompt, cached count first."""
+    count = getattr(msg, "token_count", None)
+    if count is None:
+        count = counter.count(msg.content)
+    return count + MESSAGE_OVERHEAD_TOKENS
+
+
+def pack_history(messages: list, budget: int, counter: TokenCounter) -> list:
+    """Fill ``budget`` tokens from the newest message backwards.
+
+    A bot turn that does not fit is skipped; the first user message that
+    does not fit ends the history. Returned oldest first.
+    """
+    packed = []
+    remaining = budget
+    for msg in reversed(messages):
+        cost = message_tokens(msg, counter)
+        if cost > remaining:
+            if getattr(msg, "role", None) == "user":
+                break
+            continue
+        packed.append(msg)
+        remaining -= cost
+    packed.reverse()
+    return packed
+
+
 def _clean_title(raw: str) -> str:
     """Strip leading filler words that are sentence context, not title."""
     return _FILLER_PREFIX.sub("", raw).strip()
@@ -48,23 +154,24 @@ def extract_movie_titles(bot_messages: list) -> list[str]:
 
 def prepare_history(
     messages: list,
-    max_user_messages: int = 3,
+    budget: int | None = None,
+    counter: TokenCounter | None = None,
 ) -> tuple[list, list[str]]:
-    """Split history into user-only messages and an exclusion list.
+    """Pack history into the token budget and build an exclusion list.
 
     Returns:
-        (user_messages, excluded_titles)
+        (history, excluded_titles)
     """
     if not messages:
         return [], []
 
-    bot_messages = [m for m in messages if getattr(m, "role", None) in ("bot", "assistant")]
-    user_messages = [m for m in messages if getattr(m, "role", None) == "user"]
-
-    # Keep only the last N user messages
-    user_messages = user_messages[-max_user_messages:]
+    if budget is None:
+        budget = settings.HISTORY_TOKEN_BUDGET
+    history = pack_history(messages, budget, counter or get_token_counter())
 
-    # Extract titles from bot responses to avoid repeating
+    # Extract titles from every bot response in the window, packed or not,
+    # to avoid repeating them
+    bot_messages = [m for m in messages if getattr(m, "role", None) in ("bot", "assistant")]
     excluded_titles = extract_movie_titles(bot_messages)
 
-    return user_messages, excluded_titles
+    return history, excluded_titles
@@ -0,0 +1,147 @@
+"""Optional OpenTelemetry tracing.
+
+Disabled by default. ``setup_tracing()`` (called at startup when
+``TRACING_ENABLED`` is set) installs an OTLP/HTTP exporter with
+parent-based ratio sampling; until then ``span()`` returns a shared no-op
+context manager and ``bind()`` returns its argument, so instrumented code
+pays one global lookup per call. The OpenTelemetry SDK is imported lazily,
+like the LLM SDKs: it only needs to be installed when tracing is on.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import TYPE_CHECKING, Any
+
+from core.metrics import statement_family
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Tracer
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+_tracer: Tracer | None = None
+_provider: Any = None
+
+
+def setup_tracing(
+    endpoint: str, sample_ratio: float, service_name: str, engine: AsyncEngine | None = None
+) -> None:
+    """Export spans to an OTLP/HTTP collector; also trace ``engine``'s SQL."""
+    global _provider
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError as e:
+        raise RuntimeError(
+            "TRACING_ENABLED needs opentelemetry-sdk and "
+            "opentelemetry-exporter-otlp-proto-http"
+        ) from e
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    enable(_provider.get_tracer("regelebot"), engine)
+    logger.info("Tracing to %s (sample ratio %.2f)", endpoint, sample_ratio)
+
+
+def enable(tracer: Tracer, engine: AsyncEngine | None = None) -> None:
+    global _tracer
+    _tracer = tracer
+    if engine is not None:
+        _instrument_engine(engine)
+
+
+def shutdown() -> None:
+    """Flush pending spans and go back to no-op tracing."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+def span(name: str, attributes: Mapping[str, Any] | None = None) -> AbstractContextManager:
+    """Child span of the current one; records exceptions raised inside."""
+    if _tracer is None:
+        return _NOOP
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+@contextmanager
+def server_span(name: str, headers: Mapping[str, str]):
+    """Root span for an inbound request, continuing a W3C ``traceparent``
+    from the caller when present."""
+    if _tracer is None:
+        yield None
+        return
+    from opentelemetry import propagate
+    from opentelemetry.trace import SpanKind
+
+    with _tracer.start_as_current_span(
+        name, context=propagate.extract(headers), kind=SpanKind.SERVER
+    ) as current:
+        yield current
+
+
+def bind(fn: Callable) -> Callable:
+    """Run async ``fn`` later under the trace context active now.
+
+    For work queued here and started from another task (the scheduler).
+    """
+    if _tracer is None:
+        return fn
+    from opentelemetry import context
+
+    captured = context.get_current()
+
+    async def run(*args, **kwargs):
+        token = context.attach(captured)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            context.detach(token)
+
+    return run
+
+
+def _instrument_engine(engine: AsyncEngine) -> None:
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+    system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if _tracer is None:
+            return
+        operation, table = statement_family(statement)
+        current = _tracer.start_span(
+            f"{operation} {table}".strip(),
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": system, "db.statement": statement},
+        )
+        conn.info.setdefault("spans", []).append(current)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        spans = context.connection.info.get("spans") if context.connection else None
+        if spans:
+            current = spans.pop()
+            current.record_exception(context.original_exception)
+            current.set_status(Status(StatusCode.ERROR))
+            current.end()
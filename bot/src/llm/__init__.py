@@ -1,49 +1,129 @@
 from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING
 
-from llm.base import LLMProvider
-from llm.types import ChatMessage, LLMResponse, ToolCall, ToolDefinition
+from llm.base import LLMProvider, collect_stream
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolCall, ToolDefinition, Usage
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
 
-def create_llm_provider() -> LLMProvider:
+def create_llm_provider(http_client: httpx.AsyncClient | None = None) -> LLMProvider:
     """Factory: create the LLM provider specified by config.
 
-    Only the selected provider's SDK needs to be installed.
+    Only the selected provider's SDK needs to be installed. ``http_client``
+    lets the OpenAI, Mistral and Anthropic SDKs share a tuned connection
+    pool; Gemini keeps its own. With ``LLM_FALLBACKS`` the configured
+    provider and the fallbacks are wrapped in a CompositeProvider.
     """
     from config import settings
 
-    provider = settings.LLM_PROVIDER.lower()
-    api_key = settings.LLM_API_KEY
-    model = settings.LLM_MODEL or None
-    base_url = settings.LLM_BASE_URL
+    primary = _create_backend(
+        settings.LLM_PROVIDER,
+        settings.LLM_API_KEY,
+        settings.LLM_MODEL or None,
+        settings.LLM_BASE_URL,
+        http_client,
+    )
+    if not settings.LLM_FALLBACKS:
+        return primary
+
+    from llm.providers.composite import CompositeProvider
+
+    backends = [(_backend_name(settings.LLM_PROVIDER, primary), primary)]
+    for spec in settings.LLM_FALLBACKS:
+        instance = _create_backend(
+            spec["provider"],
+            spec.get("api_key", ""),
+            spec.get("model") or None,
+            spec.get("base_url"),
+            http_client,
+        )
+        backends.append((_backend_name(spec["provider"], instance), instance))
+    logger.info(
+        "LLM routing (%s): %s",
+        settings.LLM_ROUTING, ", ".join(name for name, _ in backends),
+    )
+    return CompositeProvider(
+        backends,
+        routing=settings.LLM_ROUTING,
+        hedge=settings.LLM_HEDGE,
+        hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+        breaker_failures=settings.LLM_BREAKER_FAILURES,
+        breaker_cooldown=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+    )
+
+
+def create_utility_llm_provider(
+    main: LLMProvider, http_client: httpx.AsyncClient | None = None
+) -> LLMProvider:
+    """The utility tier: ``UTILITY_LLM_PROVIDER`` (or ``main`` when unset)
+    behind its own concurrency limit and timeout."""
+    from config import settings
+    from llm.providers.limited import LimitedProvider
+
+    provider = main
+    if settings.UTILITY_LLM_PROVIDER:
+        provider = _create_backend(
+            settings.UTILITY_LLM_PROVIDER,
+            settings.UTILITY_LLM_API_KEY or settings.LLM_API_KEY,
+            settings.UTILITY_LLM_MODEL or None,
+            settings.UTILITY_LLM_BASE_URL,
+            http_client,
+        )
+    return LimitedProvider(
+        provider, settings.UTILITY_LLM_CONCURRENCY, settings.UTILITY_LLM_TIMEOUT
+    )
+
+
+def _create_backend(
+    provider: str,
+    api_key: str,
+    model: str | None,
+    base_url: str | None,
+    http_client: httpx.AsyncClient | None,
+) -> LLMProvider:
+    from config import settings
+
+    provider = provider.lower()
 
     if provider == "gemini":
         from llm.providers.gemini import GeminiProvider
 
-        instance = GeminiProvider(api_key=api_key, model=model)
+        instance = GeminiProvider(
+            api_key=api_key, model=model, cache_ttl=settings.LLM_CACHE_TTL_SECONDS
+        )
 
     elif provider == "mistral":
         from llm.providers.mistral import MistralProvider
 
-        instance = MistralProvider(api_key=api_key, model=model)
+        instance = MistralProvider(api_key=api_key, model=model, http_client=http_client)
 
     elif provider == "openai":
         from llm.providers.openai import OpenAIProvider
 
-        instance = OpenAIProvider(api_key=api_key, model=model, base_url=base_url)
+        instance = OpenAIProvider(
+            api_key=api_key, model=model, base_url=base_url, http_client=http_client
+        )
 
     elif provider == "anthropic":
         from llm.providers.anthropic import AnthropicProvider
 
-        instance = AnthropicProvider(api_key=api_key, model=model)
+        instance = AnthropicProvider(api_key=api_key, model=model, http_client=http_client)
+
+    elif provider == "scripted":
+        from llm.providers.scripted import ScriptedProvider
+
+        instance = ScriptedProvider(scenario_file=settings.LLM_SCENARIO_FILE or None)
 
     else:
         raise ValueError(
             f"Unknown LLM provider: {provider!r}. "
-            "Supported: gemini, mistral, openai, anthropic"
+            "Supported: gemini, mistral, openai, anthropic, scripted"
         )
 
     extra = f" via {base_url}" if base_url else ""
@@ -51,11 +131,19 @@ def create_llm_provider() -> LLMProvider:
     return instance
 
 
+def _backend_name(provider: str, instance: LLMProvider) -> str:
+    return f"{provider.lower()}:{instance.model}"
+
+
 __all__ = [
     "ChatMessage",
     "LLMProvider",
     "LLMResponse",
+    "StreamChunk",
     "ToolCall",
     "ToolDefinition",
+    "Usage",
+    "collect_stream",
     "create_llm_provider",
+    "create_utility_llm_provider",
 ]
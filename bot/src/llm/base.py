@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from typing import Any
 
-from llm.types import ChatMessage, LLMResponse, ToolDefinition
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolDefinition
 
 
 class LLMProvider(ABC):
+    _tool_cache: tuple[list[ToolDefinition], Any] | None = None
+
     @abstractmethod
     async def generate(
         self,
@@ -16,6 +20,21 @@ class LLMProvider(ABC):
     ) -> LLMResponse:
         ...
 
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        """Yield text deltas as they are generated, then a ``done`` chunk
+        with the tool calls and usage. Without native streaming the whole
+        answer arrives as one delta."""
+        response = await self.generate(messages, tools, temperature, max_tokens)
+        if response.content:
+            yield StreamChunk(text=response.content)
+        yield StreamChunk(tool_calls=response.tool_calls, usage=response.usage, done=True)
+
     async def generate_text(
         self,
         prompt: str,
@@ -29,3 +48,41 @@ class LLMProvider(ABC):
             max_tokens=max_tokens,
         )
         return response.content or ""
+
+    async def prepare(self, prefix: list[ChatMessage], tools: list[ToolDefinition]) -> None:
+        """Precompile the prompt prefix and tools sent with every agent turn."""
+        self._compiled_tools(tools)
+
+    def _compiled_tools(self, tools: list[ToolDefinition]) -> Any:
+        """Provider payload for ``tools``, converted once per list object."""
+        cached = self._tool_cache
+        if cached is None or cached[0] is not tools:
+            cached = self._tool_cache = (tools, self._build_tools(tools))
+        return cached[1]
+
+    @staticmethod
+    def _build_tools(tools: list[ToolDefinition]) -> Any:
+        return tools
+
+    async def warm_up(self) -> None:
+        """Open a connection to the vendor ahead of the first real call."""
+
+    async def close(self) -> None:
+        """Release SDK resources (HTTP connection pools)."""
+
+    def stats(self) -> dict:
+        return {"model": self.model}
+
+
+async def collect_stream(stream: AsyncIterator[StreamChunk]) -> LLMResponse:
+    """Assemble a ``generate_stream`` into the LLMResponse ``generate`` returns."""
+    parts: list[str] = []
+    response = LLMResponse()
+    async for chunk in stream:
+        if chunk.text:
+            parts.append(chunk.text)
+        if chunk.done:
+            response.tool_calls = chunk.tool_calls
+            response.usage = chunk.usage
+    response.content = "".join(parts) or None
+    return response
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
 
 import anthropic
+import httpx
 
 from llm.base import LLMProvider
-from llm.types import ChatMessage, LLMResponse, ToolCall, ToolDefinition
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolCall, ToolDefinition, Usage
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +18,21 @@ logger = logging.getLogger(__name__)
 class AnthropicProvider(LLMProvider):
     DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
 
-    def __init__(self, api_key: str, model: str | None = None):
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client)
         self.model = model or self.DEFAULT_MODEL
 
+    async def warm_up(self) -> None:
+        await self.client.models.list(limit=1)
+
+    async def close(self) -> None:
+        await self.client.close()
+
     async def generate(
         self,
         messages: list[ChatMessage],
@@ -26,7 +40,44 @@ class AnthropicProvider(LLMProvider):
         temperature: float = 0.7,
         max_tokens: int = 1024,
     ) -> LLMResponse:
-        system_prompt, anthropic_messages = self._build_messages(messages)
+        kwargs = self._request(messages, tools, temperature, max_tokens)
+
+        start = time.perf_counter()
+        response = await self.client.messages.create(**kwargs)
+        result = self._parse_response(response)
+        result.usage = self._parse_usage(response, time.perf_counter() - start)
+        return result
+
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        kwargs = self._request(messages, tools, temperature, max_tokens)
+
+        start = time.perf_counter()
+        # The SDK accumulates tool_use input JSON; the final message has it parsed
+        async with self.client.messages.stream(**kwargs) as stream:
+            async for text in stream.text_stream:
+                yield StreamChunk(text=text)
+            final = await stream.get_final_message()
+
+        yield StreamChunk(
+            tool_calls=self._parse_response(final).tool_calls,
+            usage=self._parse_usage(final, time.perf_counter() - start),
+            done=True,
+        )
+
+    def _request(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> dict:
+        system_blocks, anthropic_messages = self._build_messages(messages)
 
         kwargs: dict = {
             "model": self.model,
@@ -35,33 +86,44 @@ class AnthropicProvider(LLMProvider):
             "max_tokens": max_tokens,
         }
 
-        if system_prompt:
-            kwargs["system"] = system_prompt
+        if system_blocks:
+            kwargs["system"] = system_blocks
 
         if tools:
-            kwargs["tools"] = [
-                {
-                    "name": t.name,
-                    "description": t.description,
-                    "input_schema": t.parameters,
-                }
-                for t in tools
-            ]
+            kwargs["tools"] = self._compiled_tools(tools)
+            # Several tool_use blocks per turn; the agent runs them concurrently
+            kwargs["tool_choice"] = {"type": "auto", "disable_parallel_tool_use": False}
+        return kwargs
 
-        response = await self.client.messages.create(**kwargs)
-        return self._parse_response(response)
+    @staticmethod
+    def _build_tools(tools: list[ToolDefinition]) -> list[dict]:
+        return [
+            {
+                "name": t.name,
+                "description": t.description,
+                "input_schema": t.parameters,
+            }
+            for t in tools
+        ]
 
     @staticmethod
     def _build_messages(
         messages: list[ChatMessage],
-    ) -> tuple[str | None, list[dict]]:
-        """Convert ChatMessages to Anthropic format, extracting system prompt."""
-        system_prompt: str | None = None
+    ) -> tuple[list[dict], list[dict]]:
+        """Convert ChatMessages to Anthropic format, extracting system blocks.
+
+        A ``cache`` message gets a cache breakpoint: Anthropic caches tools,
+        then system, then messages, so it covers the tools as well.
+        """
+        system_blocks: list[dict] = []
         result: list[dict] = []
 
         for msg in messages:
             if msg.role == "system":
-                system_prompt = msg.content
+                block: dict = {"type": "text", "text": msg.content or ""}
+                if msg.cache:
+                    block["cache_control"] = {"type": "ephemeral"}
+                system_blocks.append(block)
                 continue
 
             if msg.role == "user":
@@ -93,7 +155,7 @@ class AnthropicProvider(LLMProvider):
                     ],
                 })
 
-        return system_prompt, result
+        return system_blocks, result
 
     @staticmethod
     def _parse_response(response) -> LLMResponse:
@@ -116,3 +178,17 @@ class AnthropicProvider(LLMProvider):
             content="\n".join(text_parts) if text_parts else None,
             tool_calls=tool_calls,
         )
+
+    @staticmethod
+    def _parse_usage(response, elapsed: float) -> Usage:
+        # input_tokens excludes cache reads and writes: add them back so
+        # prompt_tokens means the same thing for every provider
+        usage = getattr(response, "usage", None)
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return Usage(
+            prompt_tokens=(getattr(usage, "input_tokens", 0) or 0) + cache_read + cache_write,
+            completion_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cached_tokens=cache_read,
+            latency_ms=1000 * elapsed,
+        )
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.circuit_breaker import CircuitBreaker
+from core.metrics import LLM_BACKEND_CALLS, LLM_HEDGES
+from llm.base import LLMProvider
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolDefinition
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Every backend failed or has its circuit open."""
+
+
+@dataclass
+class Backend:
+    name: str
+    provider: LLMProvider
+    breaker: CircuitBreaker
+    window: int = 100
+    latencies: deque[float] = field(init=False)
+    failed: deque[bool] = field(init=False)  # outcome of the last calls
+    calls: int = 0
+    errors: int = 0
+    hedges: int = 0  # calls started as a hedge for a slower backend
+
+    def __post_init__(self) -> None:
+        self.latencies = deque(maxlen=self.window)
+        self.failed = deque(maxlen=self.window)
+
+    def percentile(self, q: float) -> float | None:
+        """Latency quantile over the window's successful calls, in seconds."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.failed) / len(self.failed) if self.failed else 0.0
+
+    def record_success(self, seconds: float) -> None:
+        self.calls += 1
+        self.latencies.append(seconds)
+        self.failed.append(False)
+        self.breaker.record_success()
+        LLM_BACKEND_CALLS.inc(backend=self.name, outcome="ok")
+
+    def record_failure(self, error: Exception) -> None:
+        self.calls += 1
+        self.errors += 1
+        self.failed.append(True)
+        self.breaker.record_failure()
+        LLM_BACKEND_CALLS.inc(backend=self.name, outcome="error")
+        logger.warning("LLM backend %s failed: %s", self.name, error)
+
+    def record_cancelled(self) -> None:
+        self.breaker.release()
+        LLM_BACKEND_CALLS.inc(backend=self.name, outcome="cancelled")
+
+    def as_dict(self) -> dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "model": self.provider.model,
+            "circuit": self.breaker.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "hedges": self.hedges,
+            "error_rate": round(self.error_rate, 3),
+            "p50_ms": round(1000 * p50, 1) if p50 is not None else None,
+            "p95_ms": round(1000 * p95, 1) if p95 is not None else None,
+        }
+
+
+class CompositeProvider(LLMProvider):
+    """Spreads calls over several backends sharing the LLMProvider interface.
+
+    Backends are tried in order (``routing="ordered"``) or fastest median
+    latency first (``"latency"``), skipping those whose circuit is open.
+    An error fails over to the next backend. When the first backend has
+    ``hedge_min_samples`` latencies and a call outlives its p95, the same
+    request is also sent to the next backend and the first answer wins.
+    Streams fail over only until their first chunk and are never hedged:
+    the caller may already have shown the deltas.
+    """
+
+    def __init__(
+        self,
+        backends: list[tuple[str, LLMProvider]],
+        routing: str = "ordered",
+        hedge: bool = True,
+        hedge_min_samples: int = 20,
+        breaker_failures: int = 3,
+        breaker_cooldown: float = 30.0,
+        window: int = 100,
+    ):
+        if not backends:
+            raise ValueError("CompositeProvider needs at least one backend")
+        if routing not in ("ordered", "latency"):
+            raise ValueError(f"Unknown LLM routing: {routing!r}. Supported: ordered, latency")
+        self.backends = [
+            Backend(name, provider, CircuitBreaker(breaker_failures, breaker_cooldown), window)
+            for name, provider in backends
+        ]
+        self.routing = routing
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+
+    @property
+    def model(self) -> str:
+        return self.backends[0].provider.model
+
+    async def generate(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> LLMResponse:
+        return await self._call(
+            lambda provider: provider.generate(messages, tools, temperature, max_tokens)
+        )
+
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        error: Exception | None = None
+        for backend in self._ranked():
+            if not backend.breaker.allow():
+                continue
+            start = time.perf_counter()
+            stream = backend.provider.generate_stream(messages, tools, temperature, max_tokens)
+            finished = False
+            try:
+                try:
+                    first = await anext(stream)
+                except Exception as e:
+                    backend.record_failure(e)
+                    error = e
+                    finished = True
+                    continue
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            except Exception as e:
+                backend.record_failure(e)
+                finished = True
+                raise
+            else:
+                backend.record_success(time.perf_counter() - start)
+                finished = True
+                return
+            finally:
+                if not finished:
+                    backend.record_cancelled()
+                await stream.aclose()
+        raise LLMUnavailableError("No LLM backend available") from error
+
+    async def prepare(self, prefix: list[ChatMessage], tools: list[ToolDefinition]) -> None:
+        await asyncio.gather(*(b.provider.prepare(prefix, tools) for b in self.backends))
+
+    async def warm_up(self) -> None:
+        results = await asyncio.gather(
+            *(b.provider.warm_up() for b in self.backends), return_exceptions=True
+        )
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, Exception):
+                logger.warning("LLM warm-up failed for %s: %s", backend.name, result)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(b.provider.close() for b in self.backends))
+
+    def stats(self) -> dict:
+        return {
+            "routing": self.routing,
+            "backends": {b.name: b.as_dict() for b in self.backends},
+        }
+
+    def _ranked(self) -> list[Backend]:
+        if self.routing == "latency":
+            # Backends without samples go first so they get measured
+            return sorted(self.backends, key=lambda b: b.percentile(0.5) or 0.0)
+        return list(self.backends)
+
+    async def _call(self, fn: Callable[[LLMProvider], Awaitable[Any]]) -> Any:
+        queue = self._ranked()
+        pending: dict[asyncio.Task, Backend] = {}
+        error: Exception | None = None
+        hedged = False
+
+        def launch(as_hedge: bool = False) -> Backend | None:
+            while queue:
+                backend = queue.pop(0)
+                if backend.breaker.allow():
+                    if as_hedge:
+                        backend.hedges += 1
+                        LLM_HEDGES.inc(backend=backend.name)
+                    pending[asyncio.ensure_future(self._attempt(backend, fn))] = backend
+                    return backend
+            return None
+
+        first = launch()
+        try:
+            while pending:
+                delay = None
+                if self.hedge and not hedged and queue:
+                    delay = self._hedge_delay(first)
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The first backend is slower than usual: race the next one
+                    hedged = True
+                    launch(as_hedge=True)
+                    continue
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    first = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise LLMUnavailableError("No LLM backend available") from error
+
+    def _hedge_delay(self, backend: Backend | None) -> float | None:
+        if backend is None or len(backend.latencies) < self.hedge_min_samples:
+            return None
+        return backend.percentile(0.95)
+
+    @staticmethod
+    async def _attempt(backend: Backend, fn: Callable[[LLMProvider], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await fn(backend.provider)
+        except asyncio.CancelledError:
+            backend.record_cancelled()
+            raise
+        except Exception as e:
+            backend.record_failure(e)
+            raise
+        backend.record_success(time.perf_counter() - start)
+        return result
@@ -1,24 +1,47 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
 from typing import Any
 
 from google import genai
 from google.genai import types
 
 from llm.base import LLMProvider
-from llm.types import ChatMessage, LLMResponse, ToolCall, ToolDefinition
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolCall, ToolDefinition, Usage
 
 logger = logging.getLogger(__name__)
 
 
+# Seconds before expiry at which a cached prefix is recreated, and after a
+# failed creation before trying again
+CACHE_REFRESH_MARGIN = 60.0
+CACHE_RETRY_AFTER = 600.0
+
+
 class GeminiProvider(LLMProvider):
     DEFAULT_MODEL = "gemini-2.5-flash-lite"
 
-    def __init__(self, api_key: str, model: str | None = None):
+    def __init__(self, api_key: str, model: str | None = None, cache_ttl: int = 0):
         self.client = genai.Client(api_key=api_key)
         self.model = model or self.DEFAULT_MODEL
+        # Explicit context caching of the stable prefix (0 = implicit only)
+        self.cache_ttl = cache_ttl
+        self._prefix_cache: tuple[tuple[str, int], str, float] | None = None
+        self._cache_retry_at = 0.0
+        self._cache_lock = asyncio.Lock()
+
+    async def warm_up(self) -> None:
+        await self.client.aio.models.get(model=self.model)
+
+    async def prepare(self, prefix: list[ChatMessage], tools: list[ToolDefinition]) -> None:
+        await super().prepare(prefix, tools)
+        stable = next((m.content for m in prefix if m.cache and m.content), None)
+        if stable and self.cache_ttl:
+            await self._cached_prefix(stable, tools)
 
     async def generate(
         self,
@@ -27,37 +50,133 @@ class GeminiProvider(LLMProvider):
         temperature: float = 0.7,
         max_tokens: int = 1024,
     ) -> LLMResponse:
-        system_instruction, contents = self._build_contents(messages)
+        contents, config = await self._request(messages, tools, temperature, max_tokens)
 
-        config_kwargs: dict[str, Any] = {
-            "temperature": temperature,
-            "max_output_tokens": max_tokens,
-        }
-        if system_instruction:
-            config_kwargs["system_instruction"] = system_instruction
-        if tools:
-            config_kwargs["tools"] = [self._build_tools(tools)]
+        start = time.perf_counter()
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=config,
+        )
 
-        config = types.GenerateContentConfig(**config_kwargs)
+        result = self._parse_response(response)
+        result.usage = self._parse_usage(response, time.perf_counter() - start)
+        return result
 
-        response = await self.client.aio.models.generate_content(
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        contents, config = await self._request(messages, tools, temperature, max_tokens)
+
+        start = time.perf_counter()
+        stream = await self.client.aio.models.generate_content_stream(
             model=self.model,
             contents=contents,
             config=config,
         )
+        # Function calls come whole, each in one chunk; usage is cumulative
+        tool_calls: list[ToolCall] = []
+        last = None
+        async for chunk in stream:
+            last = chunk
+            partial = self._parse_response(chunk)
+            if partial.content:
+                yield StreamChunk(text=partial.content)
+            tool_calls.extend(partial.tool_calls)
+
+        yield StreamChunk(
+            tool_calls=tool_calls,
+            usage=self._parse_usage(last, time.perf_counter() - start),
+            done=True,
+        )
+
+    async def _request(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> tuple[list[types.Content], types.GenerateContentConfig]:
+        config_kwargs: dict[str, Any] = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+
+        stable = next((m for m in messages if m.role == "system" and m.cache), None)
+        cache_name = None
+        if stable and stable.content and tools and self.cache_ttl:
+            cache_name = await self._cached_prefix(stable.content, tools)
+
+        if cache_name:
+            # A cached request may not repeat system_instruction or tools:
+            # the dynamic system context travels as the first user turn
+            _, contents = self._build_contents(
+                [m for m in messages if m is not stable], inline_system=True
+            )
+            config_kwargs["cached_content"] = cache_name
+        else:
+            system_instruction, contents = self._build_contents(messages)
+            if system_instruction:
+                config_kwargs["system_instruction"] = system_instruction
+            if tools:
+                config_kwargs["tools"] = [self._compiled_tools(tools)]
+
+        return contents, types.GenerateContentConfig(**config_kwargs)
+
+    async def _cached_prefix(self, prefix: str, tools: list[ToolDefinition]) -> str | None:
+        """Name of a cached-content handle holding ``prefix`` and ``tools``.
 
-        return self._parse_response(response)
+        Created on first use and recreated shortly before it expires. None
+        while creation fails (e.g. a prefix under the model's minimum
+        cacheable size): the prefix is then sent inline, where Gemini's
+        implicit caching still applies.
+        """
+        key = (prefix, id(tools))
+        now = time.monotonic()
+        entry = self._prefix_cache
+        if entry and entry[0] == key and entry[2] - CACHE_REFRESH_MARGIN > now:
+            return entry[1]
+        if now < self._cache_retry_at:
+            return None
+        async with self._cache_lock:
+            entry = self._prefix_cache
+            if entry and entry[0] == key and entry[2] - CACHE_REFRESH_MARGIN > now:
+                return entry[1]
+            try:
+                cache = await self.client.aio.caches.create(
+                    model=self.model,
+                    config=types.CreateCachedContentConfig(
+                        display_name="regelebot-prompt-prefix",
+                        system_instruction=prefix,
+                        tools=[self._compiled_tools(tools)],
+                        ttl=f"{self.cache_ttl}s",
+                    ),
+                )
+            except Exception as e:
+                logger.warning("Gemini context cache unavailable, sending prefix inline: %s", e)
+                self._cache_retry_at = now + CACHE_RETRY_AFTER
+                return None
+            self._prefix_cache = (key, cache.name, now + self.cache_ttl)
+            return cache.name
 
     def _build_contents(
-        self, messages: list[ChatMessage]
+        self, messages: list[ChatMessage], inline_system: bool = False
     ) -> tuple[str | None, list[types.Content]]:
-        """Convert ChatMessages to Gemini format, extracting system prompt."""
-        system_instruction: str | None = None
+        """Convert ChatMessages to Gemini format, extracting the system prompt.
+
+        Several system messages are joined in order; with ``inline_system``
+        they become user text instead.
+        """
+        system_parts: list[str] = []
         contents: list[types.Content] = []
 
         for msg in messages:
-            if msg.role == "system":
-                system_instruction = msg.content
+            if msg.role == "system" and not inline_system:
+                system_parts.append(msg.content or "")
                 continue
 
             if msg.role == "tool":
@@ -94,7 +213,7 @@ class GeminiProvider(LLMProvider):
                         )
                     )
             else:
-                # user role
+                # user role, or system context sent inline
                 contents.append(
                     types.Content(
                         role="user",
@@ -104,7 +223,7 @@ class GeminiProvider(LLMProvider):
 
         # Gemini requires strict user/model alternation
         contents = self._consolidate_contents(contents)
-        return system_instruction, contents
+        return "\n\n".join(system_parts) or None, contents
 
     @staticmethod
     def _build_tools(tools: list[ToolDefinition]) -> types.Tool:
@@ -146,6 +265,18 @@ class GeminiProvider(LLMProvider):
             tool_calls=tool_calls,
         )
 
+    @staticmethod
+    def _parse_usage(response: Any, elapsed: float) -> Usage:
+        # Thinking tokens are billed as output
+        meta = getattr(response, "usage_metadata", None)
+        return Usage(
+            prompt_tokens=getattr(meta, "prompt_token_count", 0) or 0,
+            completion_tokens=(getattr(meta, "candidates_token_count", 0) or 0)
+            + (getattr(meta, "thoughts_token_count", 0) or 0),
+            cached_tokens=getattr(meta, "cached_content_token_count", 0) or 0,
+            latency_ms=1000 * elapsed,
+        )
+
     @staticmethod
     def _consolidate_contents(
         contents: list[types.Content],
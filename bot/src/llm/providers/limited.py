@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+
+from core.metrics import LLM_UTILITY_CALLS
+from llm.base import LLMProvider
+from llm.types import ChatMessage, LLMResponse, ToolDefinition
+
+
+class LimitedProvider(LLMProvider):
+    """Runs another provider's calls under their own concurrency limit and
+    deadline.
+
+    Used for the utility tier: auxiliary calls queue behind each other
+    instead of competing with the agent's turns, and one that takes longer
+    than ``timeout`` seconds raises TimeoutError. Streams go through
+    ``generate()``, so they arrive as a single delta.
+    """
+
+    def __init__(self, provider: LLMProvider, concurrency: int, timeout: float):
+        self.provider = provider
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.waiting = 0
+        self.timeouts = 0
+
+    @property
+    def model(self) -> str:
+        return self.provider.model
+
+    async def generate(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> LLMResponse:
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            async with asyncio.timeout(self.timeout):
+                response = await self.provider.generate(messages, tools, temperature, max_tokens)
+        except TimeoutError:
+            self.timeouts += 1
+            LLM_UTILITY_CALLS.inc(model=self.model, outcome="timeout")
+            raise
+        except Exception:
+            LLM_UTILITY_CALLS.inc(model=self.model, outcome="error")
+            raise
+        finally:
+            self._semaphore.release()
+        LLM_UTILITY_CALLS.inc(model=self.model, outcome="ok")
+        return response
+
+    async def prepare(self, prefix: list[ChatMessage], tools: list[ToolDefinition]) -> None:
+        await self.provider.prepare(prefix, tools)
+
+    async def warm_up(self) -> None:
+        await self.provider.warm_up()
+
+    async def close(self) -> None:
+        await self.provider.close()
+
+    def stats(self) -> dict:
+        return {
+            **self.provider.stats(),
+            "waiting": self.waiting,
+            "timeouts": self.timeouts,
+        }
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
 
+import httpx
 from mistralai import Mistral
 
 from llm.base import LLMProvider
-from llm.types import ChatMessage, LLMResponse, ToolCall, ToolDefinition
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolCall, ToolDefinition, Usage
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +18,18 @@ logger = logging.getLogger(__name__)
 class MistralProvider(LLMProvider):
     DEFAULT_MODEL = "mistral-small-latest"
 
-    def __init__(self, api_key: str, model: str | None = None):
-        self.client = Mistral(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        self.client = Mistral(api_key=api_key, async_client=http_client)
         self.model = model or self.DEFAULT_MODEL
 
+    async def warm_up(self) -> None:
+        await self.client.models.list_async()
+
     async def generate(
         self,
         messages: list[ChatMessage],
@@ -25,38 +37,103 @@ class MistralProvider(LLMProvider):
         temperature: float = 0.7,
         max_tokens: int = 1024,
     ) -> LLMResponse:
-        mistral_messages = self._build_messages(messages)
+        kwargs = self._request(messages, tools, temperature, max_tokens)
 
+        start = time.perf_counter()
+        response = await self.client.chat.complete_async(**kwargs)
+        result = self._parse_response(response)
+        result.usage = self._parse_usage(response, time.perf_counter() - start)
+        return result
+
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        kwargs = self._request(messages, tools, temperature, max_tokens)
+
+        start = time.perf_counter()
+        stream = await self.client.chat.stream_async(**kwargs)
+        calls: dict[int, dict] = {}
+        usage = None
+        async for event in stream:
+            chunk = event.data
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            text = _delta_text(delta.content)
+            if text:
+                yield StreamChunk(text=text)
+            for position, tc in enumerate(delta.tool_calls or []):
+                index = tc.index if getattr(tc, "index", None) is not None else position
+                entry = calls.setdefault(index, {"id": None, "name": "", "arguments": ""})
+                if tc.id and tc.id != "null":
+                    entry["id"] = tc.id
+                entry["name"] += tc.function.name or ""
+                arguments = tc.function.arguments
+                entry["arguments"] += (
+                    arguments if isinstance(arguments, str) else _serialize_args(arguments)
+                )
+
+        yield StreamChunk(
+            tool_calls=[
+                ToolCall(
+                    id=entry["id"] or str(uuid.uuid4()),
+                    name=entry["name"],
+                    arguments=_parse_args(entry["arguments"]),
+                )
+                for _, entry in sorted(calls.items())
+            ],
+            usage=self._parse_usage(SimpleNamespace(usage=usage), time.perf_counter() - start),
+            done=True,
+        )
+
+    def _request(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> dict:
         kwargs: dict = {
             "model": self.model,
-            "messages": mistral_messages,
+            "messages": self._build_messages(messages),
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
-
         if tools:
-            kwargs["tools"] = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": t.name,
-                        "description": t.description,
-                        "parameters": t.parameters,
-                    },
-                }
-                for t in tools
-            ]
+            kwargs["tools"] = self._compiled_tools(tools)
             kwargs["tool_choice"] = "auto"
+        return kwargs
 
-        response = await self.client.chat.complete_async(**kwargs)
-        return self._parse_response(response)
+    @staticmethod
+    def _build_tools(tools: list[ToolDefinition]) -> list[dict]:
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": t.name,
+                    "description": t.description,
+                    "parameters": t.parameters,
+                },
+            }
+            for t in tools
+        ]
 
     @staticmethod
     def _build_messages(messages: list[ChatMessage]) -> list[dict]:
         result = []
         for msg in messages:
             if msg.role == "system":
-                result.append({"role": "system", "content": msg.content})
+                # One system message: the stable prefix, then dynamic context
+                if result and result[-1]["role"] == "system":
+                    result[-1]["content"] += "\n\n" + (msg.content or "")
+                else:
+                    result.append({"role": "system", "content": msg.content or ""})
             elif msg.role == "user":
                 result.append({"role": "user", "content": msg.content})
             elif msg.role == "assistant":
@@ -108,6 +185,25 @@ class MistralProvider(LLMProvider):
             tool_calls=tool_calls,
         )
 
+    @staticmethod
+    def _parse_usage(response, elapsed: float) -> Usage:
+        # Mistral does not report prompt caching
+        usage = getattr(response, "usage", None)
+        return Usage(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            latency_ms=1000 * elapsed,
+        )
+
+
+def _delta_text(content) -> str:
+    # A delta's content is a string, or a list of chunks for some models
+    if not content:
+        return ""
+    if isinstance(content, str):
+        return content
+    return "".join(getattr(part, "text", "") or "" for part in content)
+
 
 def _serialize_args(args: dict) -> str:
     import json
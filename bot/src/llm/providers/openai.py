@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
 
+import httpx
 from openai import AsyncOpenAI
 
 from llm.base import LLMProvider
-from llm.types import ChatMessage, LLMResponse, ToolCall, ToolDefinition
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolCall, ToolDefinition, Usage
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +25,22 @@ class OpenAIProvider(LLMProvider):
         api_key: str,
         model: str | None = None,
         base_url: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ):
         kwargs: dict = {"api_key": api_key}
         if base_url:
             kwargs["base_url"] = base_url
+        if http_client:
+            kwargs["http_client"] = http_client
         self.client = AsyncOpenAI(**kwargs)
         self.model = model or self.DEFAULT_MODEL
 
+    async def warm_up(self) -> None:
+        await self.client.models.list()
+
+    async def close(self) -> None:
+        await self.client.close()
+
     async def generate(
         self,
         messages: list[ChatMessage],
@@ -35,31 +48,92 @@ class OpenAIProvider(LLMProvider):
         temperature: float = 0.7,
         max_tokens: int = 1024,
     ) -> LLMResponse:
-        openai_messages = self._build_messages(messages)
+        kwargs = self._request(messages, tools, temperature, max_tokens)
+
+        start = time.perf_counter()
+        response = await self.client.chat.completions.create(**kwargs)
+        result = self._parse_response(response)
+        result.usage = self._parse_usage(response, time.perf_counter() - start)
+        return result
 
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        kwargs = self._request(messages, tools, temperature, max_tokens)
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+
+        start = time.perf_counter()
+        stream = await self.client.chat.completions.create(**kwargs)
+        # Tool calls arrive as fragments keyed by index: name once, then
+        # the JSON arguments piece by piece
+        calls: dict[int, dict] = {}
+        usage = None
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                yield StreamChunk(text=delta.content)
+            for tc in delta.tool_calls or []:
+                entry = calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+                if tc.id:
+                    entry["id"] = tc.id
+                if tc.function and tc.function.name:
+                    entry["name"] += tc.function.name
+                if tc.function and tc.function.arguments:
+                    entry["arguments"] += tc.function.arguments
+
+        yield StreamChunk(
+            tool_calls=[
+                ToolCall(
+                    id=entry["id"] or str(uuid.uuid4()),
+                    name=entry["name"],
+                    arguments=_parse_args(entry["arguments"]),
+                )
+                for _, entry in sorted(calls.items())
+            ],
+            usage=self._parse_usage(SimpleNamespace(usage=usage), time.perf_counter() - start),
+            done=True,
+        )
+
+    def _request(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> dict:
         kwargs: dict = {
             "model": self.model,
-            "messages": openai_messages,
+            "messages": self._build_messages(messages),
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
-
         if tools:
-            kwargs["tools"] = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": t.name,
-                        "description": t.description,
-                        "parameters": t.parameters,
-                    },
-                }
-                for t in tools
-            ]
+            kwargs["tools"] = self._compiled_tools(tools)
             kwargs["tool_choice"] = "auto"
+        return kwargs
 
-        response = await self.client.chat.completions.create(**kwargs)
-        return self._parse_response(response)
+    @staticmethod
+    def _build_tools(tools: list[ToolDefinition]) -> list[dict]:
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": t.name,
+                    "description": t.description,
+                    "parameters": t.parameters,
+                },
+            }
+            for t in tools
+        ]
 
     @staticmethod
     def _build_messages(messages: list[ChatMessage]) -> list[dict]:
@@ -117,6 +191,17 @@ class OpenAIProvider(LLMProvider):
             tool_calls=tool_calls,
         )
 
+    @staticmethod
+    def _parse_usage(response, elapsed: float) -> Usage:
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        return Usage(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+            latency_ms=1000 * elapsed,
+        )
+
 
 def _serialize_args(args: dict) -> str:
     import json
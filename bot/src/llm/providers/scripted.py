@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from llm.base import LLMProvider
+from llm.types import ChatMessage, LLMResponse, StreamChunk, ToolCall, ToolDefinition, Usage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLY = "Bonne question ! Je regarde ca et je reviens vers vous."
+
+
+class ScriptedLLMError(RuntimeError):
+    """Failure injected by the scenario's ``failure_rate``."""
+
+
+@dataclass
+class Scenario:
+    turns: list[dict]
+    match: re.Pattern | None = None
+
+
+@dataclass
+class ScriptedConfig:
+    scenarios: list[Scenario] = field(default_factory=list)
+    ttft_ms: float = 0.0
+    tokens_per_second: float = 0.0  # 0 = output is instantaneous
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    seed: int | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ScriptedConfig:
+        scenarios = [
+            Scenario(
+                turns=s["turns"],
+                match=re.compile(s["match"], re.IGNORECASE) if s.get("match") else None,
+            )
+            for s in data.get("scenarios", [])
+        ]
+        return cls(
+            scenarios=scenarios,
+            ttft_ms=data.get("ttft_ms", 0.0),
+            tokens_per_second=data.get("tokens_per_second", 0.0),
+            jitter=data.get("jitter", 0.0),
+            failure_rate=data.get("failure_rate", 0.0),
+            seed=data.get("seed"),
+        )
+
+
+class ScriptedProvider(LLMProvider):
+    """Offline provider replaying canned turns from a scenario file.
+
+    A scenario is picked by matching its ``match`` regex against the last
+    user message (the first scenario without ``match`` is the fallback).
+    Its N-th turn answers the N-th model call since that message, so one
+    scenario can script a ReAct exchange: tool calls first, then text.
+    State lives in the messages only, so concurrent conversations replay
+    independently. Latency is ``ttft_ms`` plus output tokens (~4 chars per
+    token) at ``tokens_per_second``, scaled by ±``jitter``; ``failure_rate``
+    raises ScriptedLLMError.
+    """
+
+    model = "scripted"
+
+    def __init__(self, scenario_file: str | None = None, config: ScriptedConfig | None = None):
+        if config is None:
+            data = json.loads(Path(scenario_file).read_text()) if scenario_file else {}
+            config = ScriptedConfig.from_dict(data)
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self.calls = 0
+
+    async def generate(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> LLMResponse:
+        self.calls += 1
+        start = time.perf_counter()
+        turn = self._pick_turn(messages)
+        response = self._build_response(turn, tools)
+
+        output = response.content or json.dumps(
+            [{"name": tc.name, "arguments": tc.arguments} for tc in response.tool_calls]
+        )
+        await asyncio.sleep(self._latency(len(output) / 4))
+
+        if self.config.failure_rate and self._rng.random() < self.config.failure_rate:
+            raise ScriptedLLMError("Injected scripted LLM failure")
+        # Same ~4 characters per token estimate as the simulated latency
+        response.usage = Usage(
+            prompt_tokens=sum(len(m.content or "") for m in messages) // 4,
+            completion_tokens=len(output) // 4,
+            latency_ms=1000 * (time.perf_counter() - start),
+        )
+        return response
+
+    async def generate_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: list[ToolDefinition] | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+    ) -> AsyncIterator[StreamChunk]:
+        self.calls += 1
+        start = time.perf_counter()
+        response = self._build_response(self._pick_turn(messages), tools)
+        await asyncio.sleep(self._latency(0))
+
+        if self.config.failure_rate and self._rng.random() < self.config.failure_rate:
+            raise ScriptedLLMError("Injected scripted LLM failure")
+        # Word by word, each paced like generate() paces the whole output
+        for word in re.findall(r"\S+\s*", response.content or ""):
+            if self.config.tokens_per_second:
+                await asyncio.sleep(len(word) / 4 / self.config.tokens_per_second)
+            yield StreamChunk(text=word)
+
+        output = response.content or json.dumps(
+            [{"name": tc.name, "arguments": tc.arguments} for tc in response.tool_calls]
+        )
+        yield StreamChunk(
+            tool_calls=response.tool_calls,
+            usage=Usage(
+                prompt_tokens=sum(len(m.content or "") for m in messages) // 4,
+                completion_tokens=len(output) // 4,
+                latency_ms=1000 * (time.perf_counter() - start),
+            ),
+            done=True,
+        )
+
+    def _pick_turn(self, messages: list[ChatMessage]) -> dict:
+        last_user = max(
+            (i for i, m in enumerate(messages) if m.role == "user"), default=-1
+        )
+        prompt = (messages[last_user].content or "") if last_user >= 0 else ""
+        index = sum(1 for m in messages[last_user + 1:] if m.role == "assistant")
+
+        scenario = next(
+            (s for s in self.config.scenarios if s.match and s.match.search(prompt)),
+            None,
+        ) or next((s for s in self.config.scenarios if s.match is None), None)
+        if scenario is None or not scenario.turns:
+            return {"content": DEFAULT_REPLY}
+        return scenario.turns[min(index, len(scenario.turns) - 1)]
+
+    def _build_response(self, turn: dict, tools: list[ToolDefinition] | None) -> LLMResponse:
+        tool_calls = [
+            ToolCall(id=f"call_{i}", name=tc["name"], arguments=tc.get("arguments", {}))
+            for i, tc in enumerate(turn.get("tool_calls", []))
+        ]
+        # A text-only call (generate_text) cannot take tool calls
+        if tool_calls and not tools:
+            return LLMResponse(content=turn.get("content") or DEFAULT_REPLY)
+        return LLMResponse(content=turn.get("content"), tool_calls=tool_calls)
+
+    def _latency(self, tokens: float) -> float:
+        seconds = self.config.ttft_ms / 1000
+        if self.config.tokens_per_second:
+            seconds += tokens / self.config.tokens_per_second
+        if self.config.jitter:
+            seconds *= self._rng.uniform(1 - self.config.jitter, 1 + self.config.jitter)
+        return max(seconds, 0.0)
@@ -18,6 +18,9 @@ class ChatMessage:
     tool_calls: list[ToolCall] = field(default_factory=list)
     tool_call_id: str | None = None
     tool_name: str | None = None
+    # System message that, with the tools, forms a byte-stable prompt
+    # prefix: providers with explicit prompt caching cache it
+    cache: bool = False
 
 
 @dataclass
@@ -27,11 +30,44 @@ class ToolDefinition:
     parameters: dict[str, Any]  # JSON Schema
 
 
+@dataclass
+class Usage:
+    """Tokens and latency reported for one generate call, or summed over
+    several (``calls``)."""
+
+    prompt_tokens: int = 0  # includes cached_tokens
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # prompt tokens served from the provider's cache
+    latency_ms: float = 0.0
+    calls: int = 1
+
+    def __add__(self, other: Usage) -> Usage:
+        return Usage(
+            prompt_tokens=self.prompt_tokens + other.prompt_tokens,
+            completion_tokens=self.completion_tokens + other.completion_tokens,
+            cached_tokens=self.cached_tokens + other.cached_tokens,
+            latency_ms=self.latency_ms + other.latency_ms,
+            calls=self.calls + other.calls,
+        )
+
+
 @dataclass
 class LLMResponse:
     content: str | None = None
     tool_calls: list[ToolCall] = field(default_factory=list)
+    usage: Usage | None = None
 
     @property
     def has_tool_calls(self) -> bool:
         return len(self.tool_calls) > 0
+
+
+@dataclass
+class StreamChunk:
+    """One piece of a streamed response: a text delta, or the final chunk
+    (``done``) with the assembled tool calls and the usage."""
+
+    text: str = ""
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    usage: Usage | None = None
+    done: bool = False
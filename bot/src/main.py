@@ -5,11 +5,20 @@ from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from agents.main_agent import PROMPT_PREFIX, TOOLS
 from api.health import router as health_router
 from api.webhook import router as webhook_router
 from config import settings
+from core.coalescer import coalescer
+from core import tracing
+from core.container import container
 from core.database import engine
+from core.metrics import HTTP_IN_FLIGHT
+from core.scheduler import scheduler
 from models import Base
+from services.movie_store import movie_store
+from services.prefetch import prefetcher
+from services.summarizer import summarizer
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -19,10 +28,18 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    # Validate LLM config at startup — fail fast if misconfigured
-    from llm import create_llm_provider
-
-    provider = create_llm_provider()
+    # Create the shared LLM provider and HTTP pools — fails fast if the LLM
+    # config is wrong, and warms connections before the first message
+    if settings.TRACING_ENABLED:
+        tracing.setup_tracing(
+            settings.TRACING_OTLP_ENDPOINT,
+            settings.TRACING_SAMPLE_RATIO,
+            settings.TRACING_SERVICE_NAME,
+            engine,
+        )
+    await container.start(warm_up=settings.WARMUP_ON_STARTUP)
+    provider = container.llm
+    await provider.prepare(PROMPT_PREFIX, TOOLS)
     base_url = f" via {settings.LLM_BASE_URL}" if settings.LLM_BASE_URL else ""
     logger.info(
         "LLM ready: provider=%s model=%s%s",
@@ -31,8 +48,31 @@ async def lifespan(app: FastAPI):
         base_url,
     )
 
+    logger.info(
+        "Scheduler: %d concurrent messages, async replies %s",
+        settings.WORKER_CONCURRENCY,
+        "on" if settings.ASYNC_REPLIES else "off",
+    )
+    if coalescer.enabled and not settings.ASYNC_REPLIES:
+        logger.warning(
+            "BURST_WINDOW_SECONDS is set without ASYNC_REPLIES: the gateway sends "
+            "one message per chat at a time, so bursts never coalesce"
+        )
+
+    if settings.PREFETCH_ENABLED:
+        prefetcher.start()
+    if settings.SUMMARY_ENABLED:
+        summarizer.start()
+
     yield
+    await summarizer.stop()
+    await prefetcher.stop()
+    await coalescer.stop()
+    await scheduler.stop()
+    await movie_store.stop()
+    await container.close()
     await engine.dispose()
+    tracing.shutdown()
 
 
 app = FastAPI(title="Regelebot", version="0.1.0", lifespan=lifespan)
@@ -58,5 +98,31 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(SecurityHeadersMiddleware)
 
+
+class InFlightMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next) -> Response:
+        with HTTP_IN_FLIGHT.track_inprogress():
+            return await call_next(request)
+
+
+app.add_middleware(InFlightMiddleware)
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """One trace per webhook call, continuing the gateway's ``traceparent``."""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        path = request.url.path
+        if not path.startswith("/webhook/"):
+            return await call_next(request)
+        with tracing.server_span(f"{request.method} {path}", request.headers) as current:
+            response = await call_next(request)
+            if current is not None:
+                current.set_attribute("http.status_code", response.status_code)
+            return response
+
+
+app.add_middleware(TracingMiddleware)
+
 app.include_router(health_router)
 app.include_router(webhook_router)
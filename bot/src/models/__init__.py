@@ -1,9 +1,11 @@
 from models.base import Base
 from models.conversation import ConversationMessage
+from models.llm_usage import LLMUsage
 from models.member import Member
 from models.movie import Movie
 from models.watchlist import Watchlist
 from models.rating import Rating
 from models.poll import Poll, PollVote
+from models.summary import ConversationSummary
 
-__all__ = ["Base", "ConversationMessage", "Member", "Movie", "Watchlist", "Rating", "Poll", "PollVote"]
+__all__ = ["Base", "ConversationMessage", "ConversationSummary", "LLMUsage", "Member", "Movie", "Watchlist", "Rating", "Poll", "PollVote"]
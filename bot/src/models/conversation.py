@@ -1,4 +1,4 @@
-from sqlalchemy import Index, String, Text
+from sqlalchemy import Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from models.base import Base
@@ -11,6 +11,8 @@ class ConversationMessage(Base):
     role: Mapped[str] = mapped_column(String(10), nullable=False)
     sender_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Cached at write time so history packing never re-tokenizes
+    token_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     __table_args__ = (
         Index("ix_conversation_group_created", "group_id", "created_at"),
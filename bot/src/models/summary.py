@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import Base
+
+
+class ConversationSummary(Base):
+    """Running summary of a group's messages older than the history window."""
+
+    __tablename__ = "conversation_summaries"
+
+    group_id: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    # created_at of the newest message folded in (or of the last /flush)
+    covered_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,7 +1,10 @@
+import uuid
+
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
+from core.token_budget import get_token_counter
 from models.conversation import ConversationMessage
 
 
@@ -15,15 +18,22 @@ class ConversationService:
         role: str,
         content: str,
         sender_name: str | None = None,
-    ) -> None:
+    ) -> ConversationMessage:
         msg = ConversationMessage(
             group_id=group_id,
             role=role,
             content=content,
             sender_name=sender_name,
+            token_count=get_token_counter().count(content),
         )
         self.db.add(msg)
         await self.db.flush()
+        return msg
+
+    async def delete_message(self, message_id: uuid.UUID) -> None:
+        await self.db.execute(
+            delete(ConversationMessage).where(ConversationMessage.id == message_id)
+        )
 
     async def get_recent_history(
         self,
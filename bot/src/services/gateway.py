@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+import httpx
+
+from config import settings
+from core.container import container
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayClient:
+    """Pushes asynchronously produced replies back to the WhatsApp gateway."""
+
+    def __init__(
+        self,
+        base_url: str,
+        secret: str,
+        max_attempts: int = 3,
+        client: httpx.AsyncClient | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret
+        self.max_attempts = max_attempts
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or container.gateway_http
+
+    async def send_reply(
+        self,
+        job_id: str,
+        chat_id: str,
+        message_id: str | None,
+        result: dict,
+    ) -> bool:
+        payload = {
+            "job_id": job_id,
+            "chat_id": chat_id,
+            "message_id": message_id,
+            **result,
+        }
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self.client.post(
+                    f"{self.base_url}/callback/reply",
+                    json=payload,
+                    headers={"X-Webhook-Secret": self.secret},
+                )
+                response.raise_for_status()
+                return True
+            except httpx.HTTPError as e:
+                logger.warning(
+                    "Gateway callback failed for job %s (attempt %d/%d): %s",
+                    job_id, attempt, self.max_attempts, e,
+                )
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+        logger.error("Dropping reply for job %s: gateway unreachable", job_id)
+        return False
+
+
+gateway_client = GatewayClient(settings.GATEWAY_URL, settings.WEBHOOK_SECRET)
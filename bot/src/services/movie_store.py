@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from config import settings
+from core.container import container
+from core.database import after_commit, get_db
+from models.movie import Movie
+from services.tmdb import TMDbClient, TMDbError
+
+logger = logging.getLogger(__name__)
+
+DETAILS_PARAMS = {
+    "language": "fr-FR",
+    "append_to_response": "credits,videos,watch/providers",
+}
+
+
+def format_details(data: dict) -> dict:
+    """Reduce a TMDb detail payload to the fields the bot shows and stores."""
+    director = next(
+        (
+            p["name"]
+            for p in data.get("credits", {}).get("crew", [])
+            if p["job"] == "Director"
+        ),
+        "Inconnu",
+    )
+
+    cast = [a["name"] for a in data.get("credits", {}).get("cast", [])[:5]]
+
+    trailer = next(
+        (
+            f"https://youtu.be/{v['key']}"
+            for v in data.get("videos", {}).get("results", [])
+            if v["type"] == "Trailer" and v["site"] == "YouTube"
+        ),
+        None,
+    )
+
+    providers = data.get("watch/providers", {}).get("results", {}).get("FR", {})
+    streaming = [p["provider_name"] for p in providers.get("flatrate", [])]
+
+    return {
+        "title": data.get("title"),
+        "original_title": data.get("original_title"),
+        "year": data.get("release_date", "")[:4],
+        "runtime": data.get("runtime"),
+        "genres": [g["name"] for g in data.get("genres", [])],
+        "overview": data.get("overview"),
+        "vote_average": data.get("vote_average"),
+        "vote_count": data.get("vote_count"),
+        "director": director,
+        "cast": cast,
+        "trailer": trailer,
+        "streaming": streaming,
+        "poster": (
+            f"https://image.tmdb.org/t/p/w500{data.get('poster_path')}"
+            if data.get("poster_path")
+            else None
+        ),
+    }
+
+
+class MovieStore:
+    """Write-through store for movie details in ``Movie.metadata_``.
+
+    Details are read from Postgres first, so they survive restarts and are
+    shared across replicas. Entries older than ``max_age`` are still served
+    and refreshed from TMDb in the background; missing ones are fetched
+    inline and written once the caller's session has committed: the
+    request neither holds a movie row lock through its LLM round-trips nor
+    waits on a second writer (SQLite allows only one).
+    """
+
+    def __init__(self, tmdb: TMDbClient | None = None, max_age: timedelta | None = None):
+        self._tmdb = tmdb
+        self.max_age = max_age or timedelta(days=settings.MOVIE_METADATA_MAX_AGE_DAYS)
+        self._refreshing: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def tmdb(self) -> TMDbClient:
+        return self._tmdb or container.tmdb
+
+    async def get_details(self, db: AsyncSession, tmdb_id: int) -> dict:
+        """Formatted details for ``tmdb_id``; raises TMDbError on a cold miss."""
+        movie = await db.scalar(select(Movie).where(Movie.tmdb_id == tmdb_id))
+        metadata = (movie.metadata_ if movie else None) or {}
+        details = metadata.get("details")
+        if details:
+            if self._is_stale(metadata):
+                self._refresh_later(tmdb_id)
+            return details
+
+        details = await self._fetch(tmdb_id)
+        metadata = _wrap(details)
+        after_commit(db, lambda: self._save(tmdb_id, details, metadata))
+        if movie is not None:
+            # Keep the caller's copy current without making it dirty
+            set_committed_value(movie, "metadata_", metadata)
+            if not movie.genres:
+                set_committed_value(movie, "genres", details["genres"])
+        return details
+
+    async def ensure_movie(
+        self,
+        db: AsyncSession,
+        tmdb_id: int,
+        title: str,
+        original_title: str | None,
+        year: int | None,
+        genres: list[str] | None = None,
+    ) -> Movie:
+        """The row for ``tmdb_id``, inserted on ``db`` (without details) if
+        missing. Details fetched by get_details land when ``db`` commits."""
+        stmt = insert(Movie).values(
+            tmdb_id=tmdb_id,
+            title=title,
+            original_title=original_title,
+            year=year,
+            genres=genres or [],
+        )
+        await db.execute(stmt.on_conflict_do_nothing(index_elements=[Movie.tmdb_id]))
+        return await db.scalar(select(Movie).where(Movie.tmdb_id == tmdb_id))
+
+    async def stop(self) -> None:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _is_stale(self, metadata: dict) -> bool:
+        try:
+            fetched_at = datetime.fromisoformat(metadata["fetched_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return datetime.now(timezone.utc) - fetched_at > self.max_age
+
+    async def _fetch(self, tmdb_id: int) -> dict:
+        return format_details(await self.tmdb.get(f"/movie/{tmdb_id}", DETAILS_PARAMS))
+
+    async def _save(self, tmdb_id: int, details: dict, metadata: dict) -> None:
+        async with get_db() as db:
+            await db.execute(_upsert(tmdb_id, details, metadata))
+
+    def _refresh_later(self, tmdb_id: int) -> None:
+        if tmdb_id in self._refreshing:
+            return
+        self._refreshing.add(tmdb_id)
+        task = asyncio.create_task(self._refresh(tmdb_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, tmdb_id: int) -> None:
+        try:
+            details = await self._fetch(tmdb_id)
+            # Own session: the request that noticed the stale entry may be gone
+            async with get_db() as db:
+                await db.execute(
+                    update(Movie)
+                    .where(Movie.tmdb_id == tmdb_id)
+                    .values(metadata_=_wrap(details))
+                )
+        except TMDbError as e:
+            logger.warning("Metadata refresh for movie %s failed: %s", tmdb_id, e)
+        except Exception:
+            logger.exception("Metadata refresh for movie %s failed", tmdb_id)
+        finally:
+            self._refreshing.discard(tmdb_id)
+
+
+def _wrap(details: dict) -> dict:
+    return {
+        "details": details,
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _upsert(tmdb_id: int, details: dict, metadata: dict):
+    year = details.get("year") or ""
+    stmt = insert(Movie).values(
+        tmdb_id=tmdb_id,
+        title=details.get("title") or "",
+        original_title=details.get("original_title"),
+        year=int(year) if year.isdigit() else None,
+        genres=details["genres"],
+        metadata_=metadata,
+    )
+    # The row may exist without details, or another request or replica
+    # may have inserted it meanwhile; genres are only filled in when empty
+    return stmt.on_conflict_do_update(
+        index_elements=[Movie.tmdb_id],
+        set_={
+            "metadata": stmt.excluded.metadata,
+            "genres": func.coalesce(
+                func.nullif(Movie.genres, literal([], JSONB)), stmt.excluded.genres
+            ),
+        },
+    )
+
+
+movie_store = MovieStore()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from agents.subagents.movie import NOW_PLAYING_PARAMS, TRENDING_PARAMS, discover_params
+from agents.subagents.recommendation import genre_params
+from config import settings
+from constants.tmdb import GENRE_MAP, PROVIDER_MAP, TMDB_CACHE_TTLS
+from core.container import container
+from services.tmdb import TMDbClient, TMDbError, endpoint_family
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefetchJob:
+    path: str
+    params: dict
+    next_run: float = 0.0
+    failures: int = 0
+
+
+def default_jobs(discover_presets: Iterable[str] = ()) -> list[PrefetchJob]:
+    """Trending and now-playing lists, plus the requested discover presets.
+
+    Presets: ``genres`` (the discover and recommendation queries for every
+    ``GENRE_MAP`` genre) and ``providers`` (popular titles per streaming
+    service in ``PROVIDER_MAP``).
+    """
+    jobs = [
+        PrefetchJob("/trending/movie/day", TRENDING_PARAMS),
+        PrefetchJob("/trending/movie/week", TRENDING_PARAMS),
+        PrefetchJob("/movie/now_playing", NOW_PLAYING_PARAMS),
+    ]
+    for preset in dict.fromkeys(p.strip() for p in discover_presets if p.strip()):
+        if preset == "genres":
+            for genre_id in sorted(set(GENRE_MAP.values())):
+                jobs.append(PrefetchJob("/discover/movie", discover_params(genre_id=genre_id)))
+                jobs.append(PrefetchJob("/discover/movie", genre_params(genre_id)))
+        elif preset == "providers":
+            for provider_id in sorted(set(PROVIDER_MAP.values())):
+                jobs.append(
+                    PrefetchJob("/discover/movie", discover_params(provider_id=provider_id))
+                )
+        else:
+            logger.warning("Unknown prefetch preset %r, ignored", preset)
+    return jobs
+
+
+class Prefetcher:
+    """Keeps predictable TMDb lists warm in the TMDb client's cache.
+
+    Every job is re-fetched roughly every ``interval`` seconds (±``jitter``)
+    so tools answer from memory. A failing job is retried with exponential
+    backoff capped at ``interval``; the cached entry stays in place and is
+    never served older than its family TTL in ``TMDB_CACHE_TTLS``.
+    """
+
+    def __init__(
+        self,
+        jobs: list[PrefetchJob],
+        interval: float,
+        tmdb: TMDbClient | None = None,
+        retry_base: float = 30.0,
+        jitter: float = 0.1,
+    ):
+        self.jobs = jobs
+        self.interval = interval
+        self.retry_base = retry_base
+        self.jitter = jitter
+        self._tmdb = tmdb
+        self._task: asyncio.Task | None = None
+
+        for family in {endpoint_family(job.path) for job in jobs}:
+            ttl = TMDB_CACHE_TTLS.get(family, 0)
+            if ttl and interval * (1 + jitter) >= ttl:
+                logger.warning(
+                    "Prefetch interval %.0fs exceeds the %s cache TTL (%ds): "
+                    "entries will expire between refreshes", interval, family, ttl,
+                )
+
+    @property
+    def tmdb(self) -> TMDbClient:
+        return self._tmdb or container.tmdb
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_due(self) -> None:
+        """Refresh every job whose next run is due, one at a time."""
+        now = time.monotonic()
+        for job in self.jobs:
+            if job.next_run <= now:
+                await self._refresh(job)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "jobs": len(self.jobs),
+            "failing": sum(1 for job in self.jobs if job.failures),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_due()
+            except Exception:
+                logger.exception("Prefetch cycle failed")
+            next_run = min(
+                (job.next_run for job in self.jobs),
+                default=time.monotonic() + self.interval,
+            )
+            await asyncio.sleep(max(1.0, next_run - time.monotonic()))
+
+    async def _refresh(self, job: PrefetchJob) -> None:
+        try:
+            await self.tmdb.get(job.path, job.params, refresh=True)
+        except TMDbError as e:
+            job.failures += 1
+            delay = min(self.interval, self.retry_base * 2 ** (job.failures - 1))
+            logger.warning("Prefetch of %s failed (%s), retrying in ~%.0fs", job.path, e, delay)
+        else:
+            job.failures = 0
+            delay = self.interval
+        job.next_run = time.monotonic() + delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+prefetcher = Prefetcher(
+    default_jobs(settings.PREFETCH_DISCOVER.split(",")),
+    interval=settings.PREFETCH_INTERVAL_MINUTES * 60,
+)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.container import container
+from core.database import get_db
+from llm import ChatMessage, LLMProvider
+from prompts.summary import build_summary_prompt
+from services.summary import SummaryService
+
+logger = logging.getLogger(__name__)
+
+
+class Summarizer:
+    """Folds messages that left the history window into a per-group summary.
+
+    Every ``interval`` seconds one query finds the groups with more than
+    ``min_new`` messages older than their newest ``keep``; up to
+    ``max_groups`` of them are summarized, ``concurrency`` at a time. Each
+    group's oldest unsummarized messages (at most ``batch`` per run) are
+    merged with its current summary by one LLM call. Runs off the request
+    path: a failure leaves the old summary in place until the next cycle.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        keep: int,
+        min_new: int,
+        max_groups: int,
+        batch: int,
+        concurrency: int,
+        max_words: int,
+        llm: LLMProvider | None = None,
+        db_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]] = get_db,
+    ):
+        self.interval = interval
+        self.keep = keep
+        self.min_new = min_new
+        self.max_groups = max_groups
+        self.batch = batch
+        self.max_words = max_words
+        self._llm = llm
+        self._db = db_factory
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def llm(self) -> LLMProvider:
+        return self._llm or container.utility_llm
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        """Summarize every pending group (up to ``max_groups``); return how many."""
+        async with self._db() as db:
+            groups = await SummaryService(db).pending_groups(
+                self.keep, self.min_new, self.max_groups
+            )
+        results = await asyncio.gather(
+            *(self._summarize(group_id) for group_id in groups), return_exceptions=True
+        )
+        for group_id, result in zip(groups, results):
+            if isinstance(result, Exception):
+                logger.warning("Summary of %s failed: %s", group_id, result)
+        return sum(1 for result in results if result is True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                done = await self.run_once()
+                if done:
+                    logger.info("Updated %d conversation summaries", done)
+            except Exception:
+                logger.exception("Summary cycle failed")
+
+    async def _summarize(self, group_id: str) -> bool:
+        async with self._semaphore:
+            # Read, call the LLM and write in separate sessions: no
+            # connection is held while the model answers
+            async with self._db() as db:
+                service = SummaryService(db)
+                current = await service.get(group_id)
+                covered_until = current.covered_until if current else None
+                turns = await service.turns_to_fold(group_id, covered_until, self.keep, self.batch)
+            if not turns:
+                return False
+
+            prompt = build_summary_prompt(
+                current.content if current else "", turns, self.max_words
+            )
+            response = await self.llm.generate(
+                messages=[ChatMessage(role="user", content=prompt)],
+                temperature=0.2,
+                max_tokens=2 * self.max_words,
+            )
+            if not response.content:
+                return False
+
+            async with self._db() as db:
+                service = SummaryService(db)
+                latest = await service.get(group_id)
+                if (latest.covered_until if latest else None) != covered_until:
+                    return False  # /flush or another run got there first
+                await service.save(
+                    group_id, response.content.strip(), turns[-1].created_at, len(turns)
+                )
+            return True
+
+
+summarizer = Summarizer(
+    interval=settings.SUMMARY_INTERVAL_SECONDS,
+    keep=settings.CONVERSATION_WINDOW_SIZE,
+    min_new=settings.SUMMARY_MIN_MESSAGES,
+    max_groups=settings.SUMMARY_MAX_GROUPS,
+    batch=settings.SUMMARY_BATCH_MESSAGES,
+    concurrency=settings.SUMMARY_CONCURRENCY,
+    max_words=settings.SUMMARY_MAX_WORDS,
+)
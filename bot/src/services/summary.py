@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.conversation import ConversationMessage
+from models.summary import ConversationSummary
+
+
+class SummaryService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, group_id: str) -> ConversationSummary | None:
+        stmt = select(ConversationSummary).where(ConversationSummary.group_id == group_id)
+        return (await self.db.execute(stmt)).scalar_one_or_none()
+
+    async def pending_groups(self, keep: int, min_new: int, limit: int) -> list[str]:
+        """Groups with more than ``keep + min_new`` messages past their summary.
+
+        One aggregate over every group, most backlogged first.
+        """
+        unsummarized = func.count(ConversationMessage.id)
+        stmt = (
+            select(ConversationMessage.group_id)
+            .outerjoin(
+                ConversationSummary,
+                ConversationSummary.group_id == ConversationMessage.group_id,
+            )
+            .where(
+                or_(
+                    ConversationSummary.id.is_(None),
+                    ConversationMessage.created_at > ConversationSummary.covered_until,
+                )
+            )
+            .group_by(ConversationMessage.group_id)
+            .having(unsummarized > keep + min_new)
+            .order_by(unsummarized.desc())
+            .limit(limit)
+        )
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def turns_to_fold(
+        self,
+        group_id: str,
+        covered_until: datetime | None,
+        keep: int,
+        limit: int,
+    ) -> list[ConversationMessage]:
+        """Oldest unsummarized messages, leaving the newest ``keep`` out.
+
+        Messages stored in one transaction share a timestamp, so a batch cut
+        by ``limit`` ends before the last timestamp: ``covered_until`` then
+        never falls in the middle of a tie.
+        """
+        in_group = ConversationMessage.group_id == group_id
+        boundary = (
+            select(ConversationMessage.created_at)
+            .where(in_group)
+            .order_by(ConversationMessage.created_at.desc())
+            .offset(keep - 1)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(ConversationMessage)
+            .where(in_group, ConversationMessage.created_at < boundary)
+            .order_by(ConversationMessage.created_at)
+            .limit(limit)
+        )
+        if covered_until is not None:
+            stmt = stmt.where(ConversationMessage.created_at > covered_until)
+        rows = list((await self.db.execute(stmt)).scalars().all())
+        if len(rows) == limit:
+            last = rows[-1].created_at
+            rows = [r for r in rows if r.created_at < last] or rows
+        return rows
+
+    async def save(
+        self,
+        group_id: str,
+        content: str,
+        covered_until: datetime,
+        folded: int,
+    ) -> ConversationSummary:
+        summary = await self.get(group_id)
+        if summary is None:
+            summary = ConversationSummary(group_id=group_id, message_count=0)
+            self.db.add(summary)
+        summary.content = content
+        summary.covered_until = covered_until
+        summary.message_count += folded
+        await self.db.flush()
+        return summary
+
+    async def reset(self, group_id: str) -> None:
+        """Forget the summary without re-summarizing the messages it covered."""
+        summary = await self.get(group_id)
+        if summary is not None:
+            summary.content = ""
+            summary.covered_until = datetime.now(timezone.utc)
+            await self.db.flush()
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from constants.tmdb import TMDB_BASE_URL, TMDB_CACHE_TTLS
+from core import tracing
+from core.cache import TTLCache
+from core.metrics import (
+    TMDB_CACHE_LOOKUPS,
+    TMDB_ERRORS,
+    TMDB_IN_FLIGHT,
+    TMDB_REQUEST_SECONDS,
+)
+from core.rate_limiter import TokenBucket
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+# Tool-facing error when TMDb keeps failing after retries
+TMDB_UNAVAILABLE = "TMDb ne repond pas pour le moment, reessaie dans un instant"
+
+
+class TMDbError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class _Failure:
+    """Negative cache entry: a fresh TMDbError is raised from it on each hit."""
+
+    message: str
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+def endpoint_family(path: str) -> str:
+    """``/movie/27205/similar`` -> ``/movie/{id}/similar``."""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def cache_key(path: str, params: dict | None) -> tuple:
+    """Order-insensitive key; search queries are case- and space-insensitive."""
+    items = []
+    for name, value in (params or {}).items():
+        if isinstance(value, str):
+            value = value.strip()
+            if name == "query":
+                value = " ".join(value.lower().split())
+        items.append((name, str(value)))
+    return path, tuple(sorted(items))
+
+
+class TMDbClient:
+    """Single request path for every TMDb call.
+
+    Bounds concurrency, throttles with a token bucket matched to TMDb's
+    limits, retries 429/5xx and network errors with jittered exponential
+    backoff (honoring ``Retry-After``, capped at ``max_backoff`` seconds),
+    and keeps latency counters per endpoint family. Successful responses
+    are cached for the family's TTL in ``TMDB_CACHE_TTLS``; cached bodies
+    are shared, so callers must not mutate them. Concurrent identical
+    requests share one call, and empty results or failures are cached for
+    ``negative_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        client: httpx.AsyncClient,
+        base_url: str = TMDB_BASE_URL,
+        max_concurrency: int = 10,
+        rate_per_second: float = 40.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        max_backoff: float = 10.0,
+        cache: TTLCache | None = None,
+        cache_ttls: dict[str, float] = TMDB_CACHE_TTLS,
+        negative_ttl: float = 60.0,
+    ):
+        self.api_key = api_key
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_second)
+        self._stats: dict[str, EndpointStats] = {}
+        self.cache = cache if cache is not None else TTLCache(maxsize=0)
+        self.cache_ttls = cache_ttls
+        self.negative_ttl = negative_ttl
+        self._flight = SingleFlight()
+
+    async def get(
+        self, path: str, params: dict | None = None, *, refresh: bool = False
+    ) -> dict:
+        """GET ``path`` and return the decoded JSON body; raises TMDbError.
+
+        ``refresh=True`` skips the cache lookup and replaces the entry on
+        success; a failed refresh leaves the cached entry in place.
+        """
+        family = endpoint_family(path)
+        ttl = self.cache_ttls.get(family, 0)
+        key = cache_key(path, params)
+        if ttl and not refresh:
+            cached = self.cache.get(key, family)
+            TMDB_CACHE_LOOKUPS.inc(endpoint=family, result="miss" if cached is None else "hit")
+            if isinstance(cached, _Failure):
+                raise TMDbError(cached.message)
+            if cached is not None:
+                return cached
+        return await self._flight.do(
+            (key, refresh), lambda: self._fetch(path, params, family, key, ttl, refresh)
+        )
+
+    async def _fetch(
+        self,
+        path: str,
+        params: dict | None,
+        family: str,
+        key: tuple,
+        ttl: float,
+        refresh: bool = False,
+    ) -> dict:
+        try:
+            data = await self._request(path, params, family)
+        except TMDbError as e:
+            if ttl and not refresh:
+                self.cache.set(key, _Failure(str(e)), min(ttl, self.negative_ttl), family)
+            raise
+        if ttl:
+            if _is_empty(data):
+                ttl = min(ttl, self.negative_ttl)
+            self.cache.set(key, data, ttl, family)
+        return data
+
+    async def _request(self, path: str, params: dict | None, family: str) -> dict:
+        stats = self._stats.setdefault(family, EndpointStats())
+        query = {"api_key": self.api_key, **(params or {})}
+
+        error = ""
+        for attempt in range(self.max_retries + 1):
+            delay: float | None = None
+            await self._bucket.acquire()
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    with (
+                        tracing.span(f"tmdb GET {family}", {"attempt": attempt}) as current,
+                        TMDB_IN_FLIGHT.track_inprogress(),
+                    ):
+                        response = await self.client.get(f"{self.base_url}{path}", params=query)
+                        if current is not None:
+                            current.set_attribute("http.status_code", response.status_code)
+                except httpx.HTTPError as e:
+                    error = f"{type(e).__name__}: {e}"
+                    response = None
+                finally:
+                    elapsed = time.perf_counter() - start
+                    TMDB_REQUEST_SECONDS.observe(elapsed, endpoint=family)
+                    stats.calls += 1
+                    stats.total_ms += 1000 * elapsed
+                    stats.max_ms = max(stats.max_ms, 1000 * elapsed)
+
+            if response is not None:
+                if response.status_code < 400:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        stats.errors += 1
+                        TMDB_ERRORS.inc(endpoint=family)
+                        raise TMDbError(f"{family}: invalid JSON body") from None
+                error = f"HTTP {response.status_code}"
+                if response.status_code not in _RETRY_STATUSES:
+                    stats.errors += 1
+                    TMDB_ERRORS.inc(endpoint=family)
+                    raise TMDbError(f"{family}: {error}")
+                delay = _retry_after(response)
+                if delay is not None:
+                    delay = min(delay, self.max_backoff)
+
+            if attempt == self.max_retries:
+                break
+            stats.retries += 1
+            if delay is None:
+                delay = self.backoff_base * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning("TMDb %s failed (%s), retrying in %.2fs", family, error, delay)
+            await asyncio.sleep(delay)
+
+        stats.errors += 1
+        TMDB_ERRORS.inc(endpoint=family)
+        raise TMDbError(f"{family}: {error}")
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": {family: s.as_dict() for family, s in self._stats.items()},
+            "cache": self.cache.stats(),
+            "singleflight": self._flight.stats(),
+        }
+
+
+def _is_empty(data: dict) -> bool:
+    return "results" in data and not data["results"]
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait from a ``Retry-After`` header (delay or HTTP-date),
+    None when it is missing or unreadable."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    if seconds != seconds:  # nan
+        return None
+    return max(0.0, seconds)
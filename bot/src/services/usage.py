@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import LLM_MESSAGE_CALLS, LLM_MESSAGE_TOKENS
+from llm import Usage
+from models.llm_usage import LLMUsage
+
+
+class UsageService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(self, group_id: str, provider: str, model: str, usage: Usage) -> LLMUsage:
+        """Persist one message's usage and export its per-message metrics."""
+        LLM_MESSAGE_CALLS.observe(usage.calls)
+        LLM_MESSAGE_TOKENS.observe(usage.prompt_tokens, kind="prompt")
+        LLM_MESSAGE_TOKENS.observe(usage.completion_tokens, kind="completion")
+        LLM_MESSAGE_TOKENS.observe(usage.cached_tokens, kind="cached")
+
+        row = LLMUsage(
+            group_id=group_id,
+            provider=provider,
+            model=model,
+            calls=usage.calls,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            cached_tokens=usage.cached_tokens,
+            latency_ms=round(usage.latency_ms),
+        )
+        self.db.add(row)
+        await self.db.flush()
+        return row
+
+    async def totals_by_group(self, since: datetime) -> list[dict]:
+        """Usage per group since ``since``, heaviest prompt users first."""
+        stmt = (
+            select(
+                LLMUsage.group_id,
+                func.count(LLMUsage.id),
+                func.sum(LLMUsage.calls),
+                func.sum(LLMUsage.prompt_tokens),
+                func.sum(LLMUsage.completion_tokens),
+                func.sum(LLMUsage.cached_tokens),
+                func.avg(LLMUsage.latency_ms),
+            )
+            .where(LLMUsage.created_at >= since)
+            .group_by(LLMUsage.group_id)
+            .order_by(func.sum(LLMUsage.prompt_tokens).desc())
+        )
+        rows = (await self.db.execute(stmt)).all()
+        return [
+            {
+                "group_id": group_id,
+                "messages": messages,
+                "calls": int(calls or 0),
+                "prompt_tokens": int(prompt or 0),
+                "completion_tokens": int(completion or 0),
+                "cached_tokens": int(cached or 0),
+                "avg_latency_ms": round(float(latency or 0), 1),
+            }
+            for group_id, messages, calls, prompt, completion, cached, latency in rows
+        ]
@@ -6,3 +6,49 @@ os.environ.setdefault("TMDB_API_KEY", "test-tmdb")
 os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///test.db")
 os.environ.setdefault("WEBHOOK_SECRET", "test-secret")
 os.environ.setdefault("BOT_NAME", "Regelebot")
+
+import pytest  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+async def db():
+    """Session on a fresh in-memory database with every table created."""
+    from core.query_stats import instrument_engine
+    from models import Base
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+async def sqlite_db(tmp_path, monkeypatch):
+    """get_db() on a real SQLite file: separate sessions, one writer at a time."""
+    import core.database
+    from models import Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(
+        core.database, "async_session",
+        async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    yield engine
+    await engine.dispose()
@@ -0,0 +1,60 @@
+import copy
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[2] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from bench import Traffic, compare, percentiles  # noqa: E402
+
+BASELINE = {
+    "throughput_rps": 100.0,
+    "latency_ms": {"all": {"p95": 100.0}},
+    "queries_per_message": {"mention": 5.0},
+    "alloc_peak_kib_per_message": {"mention": 100.0},
+}
+
+
+def test_percentiles():
+    stats = percentiles([float(i) for i in range(1, 101)])
+    assert stats["p50"] == 51.0
+    assert stats["p99"] == 100.0
+    assert percentiles([]) == {}
+
+
+def test_compare_within_tolerance():
+    result = copy.deepcopy(BASELINE)
+    result["latency_ms"]["all"]["p95"] = 120.0
+    assert compare(result, BASELINE) == []
+
+
+def test_compare_flags_regressions():
+    result = copy.deepcopy(BASELINE)
+    result["throughput_rps"] = 50.0
+    result["queries_per_message"]["mention"] = 6.0
+    problems = compare(result, BASELINE)
+    assert any("throughput" in p for p in problems)
+    assert any("queries/message [mention]" in p for p in problems)
+
+
+def test_traffic_is_deterministic():
+    a, b = Traffic(groups=5, seed=3), Traffic(groups=5, seed=3)
+    assert [a.next() for _ in range(20)] == [b.next() for _ in range(20)]
+
+
+def test_short_bench_runs_clean(tmp_path):
+    # The whole webhook path on SQLite, scripted LLM and TMDb stand-in: a
+    # crash anywhere (warm-up included) fails the run
+    output = tmp_path / "bench.json"
+    subprocess.run(
+        [
+            sys.executable, str(SCRIPTS / "bench.py"), "--messages", "30", "--groups", "2",
+            "--concurrency", "4", "--warmup", "10", "--profile", "10", "--output", str(output),
+        ],
+        check=True, capture_output=True, timeout=120,
+    )
+    result = json.loads(output.read_text())
+    assert result["errors"] == 0
+    assert result["profiled_messages"] == 10
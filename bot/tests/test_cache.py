@@ -0,0 +1,43 @@
+import time
+from unittest.mock import patch
+
+from core.cache import TTLCache
+
+
+def test_hit_and_miss():
+    cache = TTLCache(maxsize=10)
+    assert cache.get("a", "f") is None
+    cache.set("a", 1, ttl=60, family="f")
+    assert cache.get("a", "f") == 1
+    stats = cache.stats()["families"]["f"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_expiry():
+    cache = TTLCache(maxsize=10)
+    base = time.monotonic()
+    with patch("core.cache.time.monotonic", return_value=base):
+        cache.set("a", 1, ttl=10)
+    with patch("core.cache.time.monotonic", return_value=base + 11):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60, family="x")
+    cache.set("b", 2, ttl=60, family="x")
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3, ttl=60, family="y")
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["families"]["x"]["evictions"] == 1
+
+
+def test_disabled():
+    cache = TTLCache(maxsize=0)
+    cache.set("a", 1, ttl=60)
+    assert cache.get("a") is None
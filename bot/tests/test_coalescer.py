@@ -0,0 +1,78 @@
+import asyncio
+
+from core.coalescer import BurstCoalescer
+
+
+async def test_merges_messages_within_window():
+    c = BurstCoalescer(window=0.05)
+    flushed: list[list[str]] = []
+
+    async def on_flush(burst):
+        flushed.append(list(burst.items))
+        return "reply"
+
+    burst, leader = c.add("g1", "a", on_flush)
+    _, follower1 = c.add("g1", "b", on_flush)
+    _, follower2 = c.add("g1", "c", on_flush)
+
+    assert leader is True
+    assert follower1 is False and follower2 is False
+    assert await burst.result == "reply"
+    assert flushed == [["a", "b", "c"]]
+
+
+async def test_groups_are_independent():
+    c = BurstCoalescer(window=0.02)
+
+    async def on_flush(burst):
+        return burst.items
+
+    b1, _ = c.add("g1", "a", on_flush)
+    b2, leader = c.add("g2", "b", on_flush)
+    assert leader is True
+    assert await b1.result == ["a"]
+    assert await b2.result == ["b"]
+
+
+async def test_new_burst_after_window():
+    c = BurstCoalescer(window=0.01)
+
+    async def on_flush(burst):
+        return burst.items
+
+    first, _ = c.add("g1", "a", on_flush)
+    assert await first.result == ["a"]
+    second, leader = c.add("g1", "b", on_flush)
+    assert leader is True
+    assert second.id != first.id
+    assert await second.result == ["b"]
+
+
+async def test_max_messages_flushes_early():
+    c = BurstCoalescer(window=10, max_messages=2)
+
+    async def on_flush(burst):
+        return burst.items
+
+    burst, _ = c.add("g1", "a", on_flush)
+    c.add("g1", "b", on_flush)
+    assert await asyncio.wait_for(burst.result, timeout=1) == ["a", "b"]
+
+
+async def test_flush_error_propagates_to_leader():
+    c = BurstCoalescer(window=0.01)
+
+    async def on_flush(burst):
+        raise RuntimeError("boom")
+
+    burst, _ = c.add("g1", "a", on_flush)
+    try:
+        await burst.result
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_disabled_when_window_is_zero():
+    assert BurstCoalescer(window=0).enabled is False
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from core.circuit_breaker import CircuitBreaker
+from llm import LLMProvider, LLMResponse, StreamChunk, collect_stream
+from llm.providers.composite import CompositeProvider, LLMUnavailableError
+
+
+class _Backend(LLMProvider):
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.model = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, messages, tools=None, temperature=0.7, max_tokens=1024):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.model} is down")
+        return LLMResponse(content=self.model)
+
+
+def _composite(*backends, **kwargs) -> CompositeProvider:
+    return CompositeProvider([(b.model, b) for b in backends], **kwargs)
+
+
+def test_breaker_opens_then_probes_once():
+    now = [0.0]
+    breaker = CircuitBreaker(failures=2, cooldown=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 11
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 22
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+async def test_fails_over_in_order():
+    down, up = _Backend("a", fail=True), _Backend("b")
+    provider = _composite(down, up)
+    assert (await provider.generate([])).content == "b"
+    assert provider.stats()["backends"]["a"]["errors"] == 1
+
+
+async def test_open_circuit_skips_backend():
+    down, up = _Backend("a", fail=True), _Backend("b")
+    provider = _composite(down, up, breaker_failures=2)
+    for _ in range(4):
+        await provider.generate([])
+    assert down.calls == 2
+    assert provider.stats()["backends"]["a"]["circuit"] == "open"
+
+
+async def test_raises_when_every_backend_fails():
+    provider = _composite(_Backend("a", fail=True), _Backend("b", fail=True))
+    with pytest.raises(LLMUnavailableError):
+        await provider.generate([])
+
+
+async def test_hedges_past_p95():
+    slow, fast = _Backend("a"), _Backend("b")
+    provider = _composite(slow, fast, hedge_min_samples=3)
+    for _ in range(3):
+        await provider.generate([])  # ~0s latencies: p95 is tiny
+    assert fast.calls == 0
+
+    slow.delay = 0.5
+    assert (await provider.generate([])).content == "b"
+    await asyncio.sleep(0)  # the losing call is cancelled, not awaited
+    assert slow.cancelled == 1
+    assert provider.stats()["backends"]["b"]["hedges"] == 1
+
+
+async def test_no_hedge_without_samples():
+    slow, fast = _Backend("a", delay=0.05), _Backend("b")
+    provider = _composite(slow, fast)
+    assert (await provider.generate([])).content == "a"
+    assert fast.calls == 0
+
+
+async def test_latency_routing_prefers_fastest():
+    slow, fast = _Backend("a", delay=0.02), _Backend("b")
+    provider = _composite(slow, fast, routing="latency", hedge=False)
+    await provider.generate([])  # a: unmeasured backends are tried first
+    await provider.generate([])  # b
+    assert (await provider.generate([])).content == "b"
+
+
+async def test_stream_fails_over_before_first_chunk():
+    down, up = _Backend("a", fail=True), _Backend("b")
+    response = await collect_stream(_composite(down, up).generate_stream([]))
+    assert response.content == "b"
+
+
+async def test_stream_error_after_first_chunk_propagates():
+    class Broken(_Backend):
+        async def generate_stream(self, messages, tools=None, temperature=0.7, max_tokens=1024):
+            yield StreamChunk(text="Bon")
+            raise RuntimeError("connection reset")
+
+    fallback = _Backend("b")
+    with pytest.raises(RuntimeError, match="connection reset"):
+        await collect_stream(_composite(Broken("a"), fallback).generate_stream([]))
+    assert fallback.calls == 0
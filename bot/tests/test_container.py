@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from core.container import ServiceContainer, build_http_client
+
+
+@patch("core.container.create_llm_provider")
+def test_llm_is_created_once(mock_factory):
+    mock_factory.return_value = MagicMock()
+    c = ServiceContainer()
+    assert c.llm is c.llm
+    mock_factory.assert_called_once()
+
+
+def test_http_clients_are_shared():
+    c = ServiceContainer()
+    assert c.tmdb_http is c.tmdb_http
+    assert c.gateway_http is not c.tmdb_http
+
+
+@patch("core.container.create_llm_provider")
+async def test_close_releases_everything(mock_factory):
+    llm = MagicMock()
+    llm.close = AsyncMock()
+    mock_factory.return_value = llm
+    c = ServiceContainer()
+    c.llm
+    tmdb = c.tmdb_http
+
+    await c.close()
+
+    llm.close.assert_awaited_once()
+    assert tmdb.is_closed
+    assert c.tmdb_http is not tmdb  # recreated lazily after close
+
+
+@patch("core.container.create_llm_provider")
+async def test_start_survives_warmup_failure(mock_factory):
+    llm = MagicMock()
+    llm.warm_up = AsyncMock(side_effect=RuntimeError("offline"))
+    mock_factory.return_value = llm
+    c = ServiceContainer()
+    c._tmdb_http = MagicMock()
+    c._tmdb_http.get = AsyncMock()
+
+    await c.start()
+
+    llm.warm_up.assert_awaited_once()
+    c._tmdb_http.get.assert_awaited_once()
+
+
+def test_http2_falls_back_without_h2():
+    with patch("core.container.settings.HTTP2", True), patch.dict("sys.modules", {"h2": None}):
+        client = build_http_client()
+    assert client is not None
+
+
+def test_tmdb_client_shares_pool():
+    c = ServiceContainer()
+    assert c.tmdb is c.tmdb
+    assert c.tmdb.client is c.tmdb_http
@@ -27,6 +27,7 @@ async def test_store_adds_and_flushes(service, mock_db):
     )
     mock_db.add.assert_called_once()
     mock_db.flush.assert_awaited_once()
+    assert mock_db.add.call_args.args[0].token_count >= 1
 
 
 async def test_get_recent_history_reverses(service, mock_db):
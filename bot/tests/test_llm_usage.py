@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from llm import Usage
+from llm.providers.anthropic import AnthropicProvider
+from llm.providers.gemini import GeminiProvider
+from llm.providers.openai import OpenAIProvider
+from services.usage import UsageService
+
+
+def test_usage_adds_up():
+    total = Usage(calls=0) + Usage(10, 2, 4, 100.0) + Usage(20, 3, 0, 50.0)
+    assert total == Usage(30, 5, 4, 150.0, calls=2)
+
+
+def test_openai_usage():
+    response = SimpleNamespace(
+        usage=SimpleNamespace(
+            prompt_tokens=1200,
+            completion_tokens=80,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+        )
+    )
+    usage = OpenAIProvider._parse_usage(response, 0.5)
+    assert usage == Usage(1200, 80, 1024, 500.0)
+
+
+def test_anthropic_usage_counts_cache_in_prompt():
+    response = SimpleNamespace(
+        usage=SimpleNamespace(
+            input_tokens=100,
+            output_tokens=50,
+            cache_read_input_tokens=900,
+            cache_creation_input_tokens=0,
+        )
+    )
+    assert AnthropicProvider._parse_usage(response, 1.0) == Usage(1000, 50, 900, 1000.0)
+
+
+def test_gemini_usage_includes_thoughts():
+    response = SimpleNamespace(
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=500,
+            candidates_token_count=40,
+            thoughts_token_count=10,
+            cached_content_token_count=None,
+        )
+    )
+    assert GeminiProvider._parse_usage(response, 0.2) == Usage(500, 50, 0, 200.0)
+
+
+def test_missing_usage_is_zero():
+    assert OpenAIProvider._parse_usage(SimpleNamespace(usage=None), 0.1) == Usage(0, 0, 0, 100.0)
+
+
+async def test_usage_persisted_per_group(db):
+    service = UsageService(db)
+    await service.record("group-a", "openai", "gpt-4o-mini", Usage(1000, 100, 500, 900.0, calls=2))
+    await service.record("group-a", "openai", "gpt-4o-mini", Usage(3000, 200, 0, 1100.0, calls=3))
+    await service.record("group-b", "openai", "gpt-4o-mini", Usage(100, 10, 0, 300.0))
+
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+    totals = await service.totals_by_group(since)
+    assert [t["group_id"] for t in totals] == ["group-a", "group-b"]
+    assert totals[0] == {
+        "group_id": "group-a",
+        "messages": 2,
+        "calls": 5,
+        "prompt_tokens": 4000,
+        "completion_tokens": 300,
+        "cached_tokens": 500,
+        "avg_latency_ms": 1000.0,
+    }
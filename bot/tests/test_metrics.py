@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.metrics import (
+    DB_QUERY_SECONDS,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    _Metric,
+    statement_family,
+)
+from core.query_stats import instrument_engine
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    calls = Counter("calls_total", "Calls.", ("tool",), registry=registry)
+    in_flight = Gauge("in_flight", "In flight.", registry=registry)
+    calls.inc(tool="search")
+    calls.inc(2, tool="search")
+    in_flight.set_function(lambda: 3)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{tool="search"} 3' in lines
+    assert "in_flight 3" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = Histogram(
+        "latency_seconds", "Latency.", ("endpoint",), buckets=(0.1, 1.0), registry=registry
+    )
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value, endpoint="/movie/{id}")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{endpoint="/movie/{id}",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{endpoint="/movie/{id}",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{endpoint="/movie/{id}",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{endpoint="/movie/{id}"} 4' in lines
+    assert latency.count(endpoint="/movie/{id}") == 4
+
+
+def test_labels_are_checked_and_escaped():
+    registry = Registry()
+    calls = Counter("calls_total", "Calls.", ("tool",), registry=registry)
+    with pytest.raises(ValueError):
+        calls.inc()
+    calls.inc(tool='say "hi"\n')
+    assert r'calls_total{tool="say \"hi\"\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        Counter("calls_total", "Again.", registry=registry)
+
+
+def test_metric_types_must_render_samples():
+    class Summary(_Metric):
+        type = "summary"
+
+    with pytest.raises(TypeError):
+        Summary("latency", "Latency.", registry=None)
+
+
+def test_statement_family():
+    assert statement_family("SELECT movies.id FROM movies JOIN watchlist ON ...") == (
+        "SELECT",
+        "movies",
+    )
+    assert statement_family('INSERT INTO "conversation_messages" (id) VALUES (?)') == (
+        "INSERT",
+        "conversation_messages",
+    )
+    assert statement_family("UPDATE polls SET is_closed=? WHERE polls.id = ?") == ("UPDATE", "polls")
+    assert statement_family("PRAGMA foreign_keys") == ("OTHER", "")
+
+
+async def test_engine_queries_are_timed():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    before = DB_QUERY_SECONDS.count(operation="SELECT", table="")
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        with pytest.raises(Exception):
+            await conn.execute(text("SELECT * FROM missing"))
+    await engine.dispose()
+    assert DB_QUERY_SECONDS.count(operation="SELECT", table="") == before + 1
+
+
+def test_metrics_endpoint():
+    from main import app
+
+    resp = TestClient(app).get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE regelebot_llm_generate_seconds histogram" in resp.text
+    assert "regelebot_scheduler_queued 0" in resp.text
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import func, inspect, select
+
+from agents.subagents.stats import StatsAgent
+from core.database import get_db
+from models.movie import Movie
+from models.watchlist import Watchlist
+from services.conversation import ConversationService
+from services.movie_store import MovieStore, format_details
+
+TMDB_PAYLOAD = {
+    "title": "Inception",
+    "original_title": "Inception",
+    "release_date": "2010-07-16",
+    "genres": [{"name": "Science-Fiction"}],
+    "credits": {"crew": [{"job": "Director", "name": "Christopher Nolan"}], "cast": []},
+    "videos": {"results": [{"type": "Trailer", "site": "YouTube", "key": "abc"}]},
+    "watch/providers": {"results": {"FR": {"flatrate": [{"provider_name": "Netflix"}]}}},
+}
+
+
+@pytest.fixture
+def mock_db():
+    db = AsyncMock()
+    db.flush = AsyncMock()
+    db.info = {}
+    return db
+
+
+@pytest.fixture
+def tmdb():
+    client = MagicMock()
+    client.get = AsyncMock(return_value=TMDB_PAYLOAD)
+    return client
+
+
+def stored_movie(age: timedelta) -> MagicMock:
+    movie = MagicMock()
+    movie.metadata_ = {
+        "details": {"title": "Inception (stored)"},
+        "fetched_at": (datetime.now(timezone.utc) - age).isoformat(),
+    }
+    return movie
+
+
+def test_format_details():
+    details = format_details(TMDB_PAYLOAD)
+    assert details["director"] == "Christopher Nolan"
+    assert details["trailer"] == "https://youtu.be/abc"
+    assert details["streaming"] == ["Netflix"]
+    assert details["genres"] == ["Science-Fiction"]
+    assert details["year"] == "2010"
+
+
+async def test_fresh_entry_served_from_db(mock_db, tmdb):
+    mock_db.scalar.return_value = stored_movie(timedelta(hours=1))
+    store = MovieStore(tmdb, max_age=timedelta(days=7))
+
+    details = await store.get_details(mock_db, 27205)
+
+    assert details == {"title": "Inception (stored)"}
+    tmdb.get.assert_not_awaited()
+
+
+async def test_stale_entry_served_and_refreshed(mock_db, tmdb):
+    mock_db.scalar.return_value = stored_movie(timedelta(days=30))
+    store = MovieStore(tmdb, max_age=timedelta(days=7))
+    refresh_db = AsyncMock()
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=refresh_db)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("services.movie_store.get_db", return_value=ctx):
+        details = await store.get_details(mock_db, 27205)
+        await store.get_details(mock_db, 27205)  # refresh already in flight
+        await store.stop()
+
+    assert details == {"title": "Inception (stored)"}
+    tmdb.get.assert_awaited_once()
+    refresh_db.execute.assert_awaited_once()
+
+
+def write_session() -> tuple[MagicMock, AsyncMock]:
+    write_db = AsyncMock()
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=write_db)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, write_db
+
+
+async def test_missing_entry_fetched_and_stored_after_commit(mock_db, tmdb):
+    mock_db.scalar.return_value = None
+    store = MovieStore(tmdb)
+    ctx, write_db = write_session()
+
+    details = await store.get_details(mock_db, 27205)
+
+    assert details["title"] == "Inception"
+    tmdb.get.assert_awaited_once()
+    mock_db.execute.assert_not_awaited()
+    mock_db.flush.assert_not_awaited()
+    # The upsert waits for the caller's commit
+    [save] = mock_db.info["after_commit"]
+    with patch("services.movie_store.get_db", return_value=ctx):
+        await save()
+    write_db.execute.assert_awaited_once()
+
+
+async def test_existing_row_without_metadata_updated(mock_db, tmdb):
+    movie = Movie(tmdb_id=27205, title="Inception", genres=None)
+    mock_db.scalar.return_value = movie
+    store = MovieStore(tmdb)
+
+    await store.get_details(mock_db, 27205)
+
+    assert len(mock_db.info["after_commit"]) == 1
+    mock_db.execute.assert_not_awaited()
+    # The caller's copy is current but not dirty: its session writes nothing
+    assert movie.metadata_["details"]["title"] == "Inception"
+    assert "fetched_at" in movie.metadata_
+    assert movie.genres == ["Science-Fiction"]
+    assert not inspect(movie).attrs.metadata_.history.has_changes()
+
+
+def search_and_details(path, params=None):
+    if path == "/search/movie":
+        return {"results": [{"id": 27205, "title": "Inception", "release_date": "2010-07-16"}]}
+    return TMDB_PAYLOAD
+
+
+async def test_cold_mark_watched_after_storing_a_message(sqlite_db, tmdb):
+    tmdb.get = AsyncMock(side_effect=search_and_details)
+    store = MovieStore(tmdb)
+
+    async with get_db() as db:
+        # The request already holds SQLite's write lock
+        await ConversationService(db).store_message("group1", "user", "vu Inception", "Alice")
+        result = await StatsAgent(db, tmdb=tmdb, store=store).mark_watched("Inception")
+        assert result["success"]
+
+    async with get_db() as db:
+        movie = await db.scalar(select(Movie).where(Movie.tmdb_id == 27205))
+        assert movie.genres == ["Science-Fiction"]
+        assert movie.metadata_["details"]["director"] == "Christopher Nolan"
+        assert await db.scalar(select(func.count(Watchlist.id))) == 1
+
+
+async def test_cold_lookup_on_a_read_session_lands_after_the_request(sqlite_db, tmdb):
+    store = MovieStore(tmdb)
+
+    async with get_db() as request_db:
+        await ConversationService(request_db).store_message("group1", "user", "Inception ?", "Alice")
+        async with get_db(parent=request_db) as read_db:
+            await store.get_details(read_db, 27205)
+        async with get_db() as other_db:
+            assert await other_db.scalar(select(Movie)) is None
+
+    async with get_db() as db:
+        movie = await db.scalar(select(Movie).where(Movie.tmdb_id == 27205))
+        assert movie.metadata_["details"]["title"] == "Inception"
@@ -0,0 +1,155 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agents.main_agent import MainAgent
+from llm import LLMResponse, ToolCall
+
+REQUEST_DB = MagicMock(name="request_session")
+
+
+def _call(name: str, **args) -> ToolCall:
+    return ToolCall(id=f"{name}-id", name=name, arguments=args)
+
+
+@pytest.fixture
+def agent():
+    sessions = []
+
+    @asynccontextmanager
+    async def fake_get_db(parent=None):
+        session = MagicMock(name=f"session{len(sessions)}")
+        sessions.append(session)
+        yield session
+
+    with patch("agents.main_agent.container", MagicMock()), \
+            patch("agents.main_agent.get_db", fake_get_db):
+        agent = MainAgent(REQUEST_DB)
+        agent.sessions = sessions
+        yield agent
+
+
+def _fake_tools(agent, delays: dict[str, float]):
+    """Record (tool, session, start/end) events; tools sleep ``delays``."""
+    events = []
+
+    async def execute(name, args, subagents=None):
+        db = (subagents or agent.subagents)["stats"].db
+        events.append(("start", name, db))
+        await asyncio.sleep(delays.get(name, 0))
+        events.append(("end", name, db))
+        return {"tool": name}
+
+    agent._execute_tool = execute
+    return events
+
+
+async def test_reads_run_concurrently_and_keep_call_order(agent):
+    events = _fake_tools(agent, {"get_club_history": 0.05, "get_trending": 0.01})
+    calls = [_call("get_club_history"), _call("get_trending"), _call("get_club_stats")]
+
+    results = await agent._run_tools(calls)
+
+    assert results == [{"tool": c.name} for c in calls]
+    # All three started before the slowest finished, each on its own session
+    assert [e[0] for e in events[:3]] == ["start"] * 3
+    assert len({e[2] for e in events}) == 3
+    assert REQUEST_DB not in {e[2] for e in events}
+
+
+async def test_writes_stay_ordered_on_request_session(agent):
+    events = _fake_tools(agent, {"rate_movie": 0.02})
+    calls = [_call("rate_movie"), _call("get_trending"), _call("mark_as_watched")]
+
+    await agent._run_tools(calls)
+
+    writes = [e for e in events if e[1] in ("rate_movie", "mark_as_watched")]
+    assert [(e[0], e[1]) for e in writes] == [
+        ("start", "rate_movie"), ("end", "rate_movie"),
+        ("start", "mark_as_watched"), ("end", "mark_as_watched"),
+    ]
+    assert {e[2] for e in writes} == {REQUEST_DB}
+
+
+async def test_calls_after_a_write_use_request_session(agent):
+    events = _fake_tools(agent, {})
+    await agent._run_tools([_call("mark_as_watched"), _call("get_trending")])
+    events.clear()
+
+    await agent._run_tools([_call("get_club_history"), _call("get_club_stats")])
+
+    assert {e[2] for e in events} == {REQUEST_DB}
+
+
+async def test_single_call_uses_request_session(agent):
+    events = _fake_tools(agent, {})
+    await agent._run_tools([_call("get_club_stats")])
+    assert agent.sessions == []
+    assert events[0][2] is REQUEST_DB
+
+
+async def test_failing_tool_waits_for_the_others(agent):
+    events = _fake_tools(agent, {"get_trending": 0.02})
+    original = agent._execute_tool
+
+    async def execute(name, args, subagents=None):
+        if name == "get_club_stats":
+            raise RuntimeError("db down")
+        return await original(name, args, subagents)
+
+    agent._execute_tool = execute
+    with pytest.raises(RuntimeError, match="db down"):
+        await agent._run_tools([_call("get_trending"), _call("get_club_stats")])
+    assert ("end", "get_trending") in [(e[0], e[1]) for e in events]
+
+
+async def test_process_appends_results_in_call_order(agent):
+    _fake_tools(agent, {"get_club_history": 0.03})
+    calls = [_call("get_club_history"), _call("get_trending")]
+    agent.llm.generate = AsyncMock(side_effect=[
+        LLMResponse(tool_calls=calls),
+        LLMResponse(content="Voila !"),
+    ])
+    agent.llm.model = "fake"
+
+    with patch("agents.main_agent.build_club_context", AsyncMock(return_value="")):
+        assert await agent.process("quoi de neuf ?", "Alice") == "Voila !"
+
+    messages = agent.llm.generate.call_args.kwargs["messages"]
+    assert [m.tool_call_id for m in messages if m.role == "tool"] == [c.id for c in calls]
+
+
+async def test_reads_defer_their_writes_to_the_request_session(agent):
+    _fake_tools(agent, {})
+    parents = []
+
+    @asynccontextmanager
+    async def fake_get_db(parent=None):
+        parents.append(parent)
+        yield MagicMock()
+
+    with patch("agents.main_agent.get_db", fake_get_db):
+        await agent._run_tools([_call("get_trending"), _call("movie_search", query="Dune")])
+    assert parents == [REQUEST_DB, REQUEST_DB]
+
+
+async def test_mark_watched_creates_the_row_on_the_request_session():
+    from agents.subagents.stats import StatsAgent
+    from services.tmdb import TMDbError
+
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.scalar.return_value = None  # not in the watchlist yet
+    tmdb = MagicMock()
+    tmdb.get = AsyncMock(return_value={"results": [{"id": 438631, "title": "Dune"}]})
+    store = MagicMock()
+    store.get_details = AsyncMock(side_effect=TMDbError("down"))
+    store.ensure_movie = AsyncMock(return_value=MagicMock(id=1, title="Dune"))
+
+    result = await StatsAgent(db, tmdb=tmdb, store=store).mark_watched("Dune")
+
+    assert result["success"]
+    store.ensure_movie.assert_awaited_once_with(db, 438631, "Dune", None, None, [])
+    assert [type(c.args[0]).__name__ for c in db.add.call_args_list] == ["Watchlist"]
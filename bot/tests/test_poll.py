@@ -0,0 +1,28 @@
+import asyncio
+
+from sqlalchemy import select
+
+from agents.subagents.poll import PollAgent
+from core.database import get_db
+from models.member import Member
+from models.poll import PollVote
+
+
+async def test_concurrent_votes_from_one_member_keep_one_row(sqlite_db):
+    async with get_db() as db:
+        agent = PollAgent(db)
+        poll = await agent.create_poll("Ce soir ?", ["Dune", "Alien"], "Alice")
+        await agent.set_wa_message_id(poll["poll_id"], "wa-1")
+
+    async def vote(label: str) -> dict:
+        async with get_db() as db:
+            return await PollAgent(db).vote_by_label("wa-1", [label], "Bob")
+
+    # Both sessions find no vote (nor member) for Bob, then both write
+    results = await asyncio.gather(vote("Dune"), vote("Alien"))
+
+    assert all(r["success"] for r in results)
+    async with get_db() as db:
+        assert len((await db.scalars(select(PollVote))).all()) == 1
+        bob = select(Member).where(Member.display_name == "Bob")
+        assert len((await db.scalars(bob)).all()) == 1
@@ -0,0 +1,48 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from services.prefetch import Prefetcher, PrefetchJob, default_jobs
+from services.tmdb import TMDbError
+
+
+def test_default_jobs():
+    base = default_jobs()
+    assert [job.path for job in base] == [
+        "/trending/movie/day", "/trending/movie/week", "/movie/now_playing",
+    ]
+    with_presets = default_jobs(["genres", "providers", "bogus"])
+    assert len(with_presets) > len(base)
+    assert all(job.path == "/discover/movie" for job in with_presets[3:])
+
+
+async def test_run_due_refreshes_and_reschedules():
+    tmdb = MagicMock()
+    tmdb.get = AsyncMock(return_value={"results": [1]})
+    job = PrefetchJob("/trending/movie/day", {"language": "fr-FR"})
+    p = Prefetcher([job], interval=600, tmdb=tmdb)
+
+    await p.run_due()
+    await p.run_due()  # not due again yet
+
+    tmdb.get.assert_awaited_once_with(
+        "/trending/movie/day", {"language": "fr-FR"}, refresh=True
+    )
+    assert job.next_run - time.monotonic() > 500
+
+
+async def test_failure_backs_off():
+    tmdb = MagicMock()
+    tmdb.get = AsyncMock(side_effect=TMDbError("down"))
+    job = PrefetchJob("/movie/now_playing", {})
+    p = Prefetcher([job], interval=600, tmdb=tmdb, retry_base=10, jitter=0)
+
+    await p.run_due()
+    first = job.next_run - time.monotonic()
+    job.next_run = 0
+    await p.run_due()
+    second = job.next_run - time.monotonic()
+
+    assert job.failures == 2
+    assert 9 < first <= 10
+    assert 19 < second <= 20
+    assert p.stats()["failing"] == 1
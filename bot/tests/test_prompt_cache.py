@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agents.main_agent import TOOLS, MainAgent
+from llm import ChatMessage, LLMResponse
+from llm.providers.anthropic import AnthropicProvider
+from llm.providers.gemini import GeminiProvider
+from llm.providers.openai import OpenAIProvider
+
+MESSAGES = [
+    ChatMessage(role="system", content="persona et regles", cache=True),
+    ChatMessage(role="system", content="contexte du club"),
+    ChatMessage(role="user", content="salut"),
+]
+
+
+async def _prompt_for(club_context: str, excluded: list[str]) -> list[ChatMessage]:
+    llm = AsyncMock()
+    llm.model = "fake"
+    llm.generate.return_value = LLMResponse(content="Salut !")
+    with patch("agents.main_agent.container", MagicMock(llm=llm)), \
+            patch("agents.main_agent.build_club_context", AsyncMock(return_value=club_context)):
+        await MainAgent(MagicMock()).process("salut", "Alice", excluded_titles=excluded)
+    kwargs = llm.generate.call_args.kwargs
+    assert kwargs["tools"] is TOOLS
+    return kwargs["messages"]
+
+
+async def test_prefix_is_byte_stable_across_messages():
+    first = await _prompt_for("Total films vus : 3", [])
+    second = await _prompt_for("Total films vus : 4", ["Inception"])
+
+    assert first[0] == second[0]
+    assert first[0].cache and not first[1].cache
+    assert "Total films vus : 4" in second[1].content
+    assert "Inception" in second[1].content
+
+
+def test_tools_are_converted_once():
+    provider = OpenAIProvider(api_key="x")
+    assert provider._compiled_tools(TOOLS) is provider._compiled_tools(TOOLS)
+    assert provider._compiled_tools(TOOLS)[0]["function"]["name"] == TOOLS[0].name
+
+
+def test_anthropic_breakpoint_on_stable_prefix():
+    system, messages = AnthropicProvider._build_messages(MESSAGES)
+    assert system == [
+        {"type": "text", "text": "persona et regles", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "contexte du club"},
+    ]
+    assert messages == [{"role": "user", "content": "salut"}]
+
+
+def _gemini(create: AsyncMock) -> tuple[GeminiProvider, AsyncMock]:
+    provider = GeminiProvider(api_key="x", cache_ttl=3600)
+    generate = AsyncMock(return_value=SimpleNamespace(candidates=[], usage_metadata=None))
+    provider.client = SimpleNamespace(
+        aio=SimpleNamespace(
+            caches=SimpleNamespace(create=create),
+            models=SimpleNamespace(generate_content=generate),
+        )
+    )
+    return provider, generate
+
+
+async def test_gemini_reuses_cached_prefix():
+    create = AsyncMock(return_value=SimpleNamespace(name="cachedContents/abc"))
+    provider, generate = _gemini(create)
+
+    await provider.generate(MESSAGES, tools=TOOLS)
+    await provider.generate(MESSAGES, tools=TOOLS)
+
+    create.assert_awaited_once()
+    config = generate.call_args.kwargs["config"]
+    assert config.cached_content == "cachedContents/abc"
+    assert config.system_instruction is None and config.tools is None
+    # Dynamic context and the message share the first user turn
+    texts = [p.text for p in generate.call_args.kwargs["contents"][0].parts]
+    assert texts == ["contexte du club", "salut"]
+
+
+async def test_gemini_sends_prefix_inline_when_caching_fails():
+    create = AsyncMock(side_effect=RuntimeError("Cached content is too small"))
+    provider, generate = _gemini(create)
+
+    await provider.generate(MESSAGES, tools=TOOLS)
+    await provider.generate(MESSAGES, tools=TOOLS)
+
+    create.assert_awaited_once()  # not retried on every call
+    config = generate.call_args.kwargs["config"]
+    assert config.cached_content is None
+    assert config.system_instruction == "persona et regles\n\ncontexte du club"
+    assert config.tools
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from agents.subagents.stats import StatsAgent
+from commands import handle_command
+from core.query_stats import assert_max_queries, query_budget, track_queries
+from prompts.main_agent import build_club_context
+
+SENDER = {"name": "Alice", "phone_hash": "hash-alice"}
+
+
+async def test_track_queries_counts_statements(db):
+    with track_queries() as stats:
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
+    await db.execute(text("SELECT 2"))  # outside the block
+    assert stats.count == 2
+    assert stats.repeated(2) == [("SELECT 1", 2)]
+    assert stats.seconds > 0
+
+
+async def test_query_budget_warns(db, caplog):
+    with caplog.at_level(logging.WARNING, logger="core.query_stats"):
+        with query_budget("agent", max_queries=1, max_ms=1000, repeat_threshold=3):
+            for _ in range(3):
+                await db.execute(text("SELECT 1"))
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("Query budget exceeded for agent: 3 queries" in m for m in messages)
+    assert any("Possible N+1 in agent: statement ran 3 times" in m for m in messages)
+    assert caplog.records[0].query_budget["queries"] == 3
+
+
+async def test_assert_max_queries_fails_with_listing(db):
+    with pytest.raises(AssertionError, match="2 queries, expected at most 1"):
+        async with assert_max_queries(1):
+            await db.execute(text("SELECT 1"))
+            await db.execute(text("SELECT 1"))
+
+
+# The counts below pin today's query plans: lower them when a change saves
+# queries, never raise them without a reason
+
+async def test_club_context_query_count(db):
+    async with assert_max_queries(4):
+        await build_club_context(StatsAgent(db, tmdb=object(), store=object()))
+
+
+async def test_poll_commands_query_count(db):
+    async with assert_max_queries(3):
+        await handle_command("/sondage Ce soir ? | Inception | Dune", SENDER, db)
+    async with assert_max_queries(6):
+        assert "a vote pour" in await handle_command("/vote 2", SENDER, db)
+    async with assert_max_queries(2):
+        assert "Dune" in await handle_command("/resultats", SENDER, db)
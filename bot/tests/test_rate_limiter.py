@@ -1,7 +1,7 @@
 import time
 from unittest.mock import patch
 
-from core.rate_limiter import RateLimiter
+from core.rate_limiter import RateLimiter, TokenBucket
 
 
 def test_under_limit():
@@ -47,3 +47,12 @@ def test_reset():
     assert rl.is_allowed("group1") is False
     rl.reset()
     assert rl.is_allowed("group1") is True
+
+
+async def test_token_bucket_burst_then_throttles():
+    bucket = TokenBucket(rate=100, capacity=2)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    # Two tokens were available up front; the third waits ~1/rate
+    assert time.monotonic() - start >= 0.005
@@ -33,3 +33,16 @@ def test_is_command():
     r = _make_router()
     assert r.is_command("/poll") is True
     assert r.is_command("hello") is False
+
+
+async def test_route_passes_cleaned_burst_to_agent():
+    agent = MagicMock()
+    agent.process = AsyncMock(return_value="ok")
+    r = MessageRouter(agent, MagicMock())
+    await r.route(
+        "@regelebot et un thriller ?",
+        {"name": "Bob"},
+        burst=[("Alice", "@regelebot un film ce soir")],
+    )
+    kwargs = agent.process.call_args.kwargs
+    assert kwargs["burst"] == [("Alice", "un film ce soir")]
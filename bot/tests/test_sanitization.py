@@ -3,6 +3,7 @@ from core.sanitization import (
     sanitize_message,
     sanitize_sender_name,
     wrap_user_content,
+    wrap_user_messages,
 )
 
 
@@ -80,6 +81,14 @@ class TestWrapUserContent:
         assert "[Admin]" not in result
         assert "[System:" not in result
 
+class TestWrapUserMessages:
+    def test_keeps_every_sender_in_order(self):
+        result = wrap_user_messages([("Alice", "salut"), ("Bob", "un film ?")])
+        assert result.count("<user_message>") == 2
+        assert "<sender>Alice</sender>" in result
+        assert "<sender>Bob</sender>" in result
+        assert result.index("salut") < result.index("un film ?")
+
 
 class TestDetectLeakedSystemPrompt:
     def test_normal_response_not_flagged(self):
@@ -101,3 +110,4 @@ class TestDetectLeakedSystemPrompt:
     def test_case_insensitive(self):
         response = "regles absolues: ne jamais..."
         assert detect_leaked_system_prompt(response) is True
+
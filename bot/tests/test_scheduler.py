@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from core.scheduler import MessageScheduler, QueueFullError
+
+
+async def test_runs_submitted_jobs():
+    s = MessageScheduler(concurrency=2)
+    seen: list[str] = []
+
+    async def job(job_id: str) -> None:
+        seen.append(job_id)
+
+    ids = [s.submit("g1", job) for _ in range(3)]
+    await s.stop()
+    assert sorted(seen) == sorted(ids)
+
+
+async def test_same_group_runs_in_order():
+    s = MessageScheduler(concurrency=4)
+    order: list[int] = []
+
+    def make(i: int):
+        async def job(job_id: str) -> None:
+            # Later jobs sleep less: only strict ordering keeps them in sequence
+            await asyncio.sleep(0.01 * (5 - i))
+            order.append(i)
+        return job
+
+    for i in range(5):
+        s.submit("g1", make(i))
+    await s.stop()
+    assert order == [0, 1, 2, 3, 4]
+
+
+async def test_groups_run_in_parallel():
+    s = MessageScheduler(concurrency=2)
+    started = {"g1": asyncio.Event(), "g2": asyncio.Event()}
+    release = asyncio.Event()
+
+    def make(group: str):
+        async def job(job_id: str) -> None:
+            started[group].set()
+            await release.wait()
+        return job
+
+    s.submit("g1", make("g1"))
+    s.submit("g2", make("g2"))
+    await asyncio.wait_for(
+        asyncio.gather(started["g1"].wait(), started["g2"].wait()), timeout=1
+    )
+    assert s.running == 2
+    release.set()
+    await s.stop()
+
+
+async def test_global_concurrency_limit():
+    s = MessageScheduler(concurrency=1)
+    release = asyncio.Event()
+
+    async def blocked(job_id: str) -> None:
+        await release.wait()
+
+    s.submit("g1", blocked)
+    s.submit("g2", blocked)
+    await asyncio.sleep(0)
+    assert s.running == 1
+    assert s.queued == 1
+    assert s.stats()["groups"]["g2"]["queued"] == 1
+    release.set()
+    await s.stop()
+    assert s.stats()["running"] == 0
+
+
+async def test_run_returns_result_and_raises():
+    s = MessageScheduler(concurrency=1)
+
+    async def ok():
+        return 42
+
+    async def boom():
+        raise ValueError("boom")
+
+    assert await s.run("g1", ok) == 42
+    with pytest.raises(ValueError):
+        await s.run("g1", boom)
+    assert s.stats()["groups"]["g1"]["processed"] == 2
+
+
+async def test_idle_lanes_are_freed_and_stats_kept_for_recent_groups():
+    s = MessageScheduler(concurrency=1, stats_groups=2)
+    release = asyncio.Event()
+
+    async def blocked(job_id: str) -> None:
+        await release.wait()
+
+    s.submit("g1", blocked)
+    s.submit("g1", blocked)
+    await asyncio.sleep(0)
+    assert s.stats()["groups"]["g1"]["queued"] == 1
+    release.set()
+    while s.running or s.queued:
+        await asyncio.sleep(0)
+    assert s._lanes == {}
+    assert s.stats()["groups"]["g1"]["processed"] == 2
+
+    # A group that comes back picks up its stats; the oldest idle group is forgotten
+    for group in ("g2", "g1", "g3"):
+        await s.run(group, lambda: asyncio.sleep(0))
+    groups = s.stats()["groups"]
+    assert set(groups) == {"g3", "g1"}
+    assert groups["g1"]["processed"] == 3
+
+
+async def test_failing_job_does_not_block_group():
+    s = MessageScheduler(concurrency=1)
+    done = asyncio.Event()
+
+    async def boom(job_id: str) -> None:
+        raise RuntimeError("boom")
+
+    async def ok(job_id: str) -> None:
+        done.set()
+
+    s.submit("g1", boom)
+    s.submit("g1", ok)
+    await asyncio.wait_for(done.wait(), timeout=1)
+    await s.stop()
+
+
+async def test_queue_full():
+    s = MessageScheduler(concurrency=1, maxsize=1)
+    release = asyncio.Event()
+
+    async def blocked(job_id: str) -> None:
+        await release.wait()
+
+    s.submit("g1", blocked)  # starts running immediately
+    s.submit("g1", blocked)  # queued
+    with pytest.raises(QueueFullError):
+        s.submit("g2", blocked)
+    release.set()
+    await s.stop()
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from llm import ChatMessage, ToolDefinition
+from llm.providers.scripted import ScriptedConfig, ScriptedLLMError, ScriptedProvider
+
+TOOLS = [ToolDefinition(name="movie_search", description="", parameters={})]
+
+SCENARIOS = {
+    "scenarios": [
+        {
+            "match": "inception",
+            "turns": [
+                {"tool_calls": [{"name": "movie_search", "arguments": {"query": "Inception"}}]},
+                {"content": "Un film de Nolan."},
+            ],
+        },
+        {"turns": [{"content": "Salut !"}]},
+    ]
+}
+
+
+def provider(**overrides) -> ScriptedProvider:
+    return ScriptedProvider(config=ScriptedConfig.from_dict({**SCENARIOS, **overrides}))
+
+
+async def test_replays_tool_calls_then_text():
+    llm = provider()
+    messages = [
+        ChatMessage(role="system", content="sys"),
+        ChatMessage(role="user", content="Parle-moi d'Inception"),
+    ]
+    first = await llm.generate(messages, tools=TOOLS)
+    assert first.tool_calls[0].name == "movie_search"
+    assert first.tool_calls[0].arguments == {"query": "Inception"}
+
+    messages.append(ChatMessage(role="assistant", tool_calls=first.tool_calls))
+    messages.append(ChatMessage(role="tool", content="{}", tool_call_id="call_0"))
+    second = await llm.generate(messages, tools=TOOLS)
+    assert second.content == "Un film de Nolan."
+    assert not second.has_tool_calls
+    assert second.usage.completion_tokens == len("Un film de Nolan.") // 4
+    assert second.usage.prompt_tokens > 0
+
+
+async def test_fallback_scenario_and_text_only_calls():
+    llm = provider()
+    assert await llm.generate_text("bonjour") == "Salut !"
+    # Tool-call turns degrade to text when no tools are offered
+    assert await llm.generate_text("inception ?")
+
+
+async def test_default_reply_without_scenarios():
+    llm = ScriptedProvider()
+    response = await llm.generate([ChatMessage(role="user", content="hello")])
+    assert response.content
+
+
+async def test_simulated_latency():
+    llm = provider(ttft_ms=50, tokens_per_second=1000)
+    start = time.perf_counter()
+    await llm.generate_text("bonjour")
+    assert time.perf_counter() - start >= 0.05
+
+
+async def test_failure_injection():
+    llm = provider(failure_rate=1.0)
+    with pytest.raises(ScriptedLLMError):
+        await llm.generate_text("bonjour")
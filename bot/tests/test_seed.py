@@ -0,0 +1,52 @@
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+from models import Base  # noqa: E402
+from seed import LARGE_VOLUMES, generate_club  # noqa: E402
+
+VOLUMES = {name: max(1, value // 500) for name, value in LARGE_VOLUMES.items()}
+
+
+def test_generate_club_respects_unique_constraints():
+    club = {name: list(rows) for name, rows in generate_club(VOLUMES, years=1, seed=3).items()}
+
+    assert len(club["members"]) == VOLUMES["members"]
+    assert len(club["movies"]) == VOLUMES["movies"]
+    assert len({m["phone_hash"] for m in club["members"]}) == VOLUMES["members"]
+    assert len({m["tmdb_id"] for m in club["movies"]}) == VOLUMES["movies"]
+    assert len({w["movie_id"] for w in club["watchlist"]}) == len(club["watchlist"])
+    assert len({(r["watchlist_id"], r["member_id"]) for r in club["ratings"]}) == len(club["ratings"])
+    assert len({(v["poll_id"], v["member_id"]) for v in club["poll_votes"]}) == len(club["poll_votes"])
+
+    polls = {p["id"]: p for p in club["polls"]}
+    assert all(v["option_id"] in polls[v["poll_id"]]["options"] for v in club["poll_votes"])
+    assert all(1 <= r["score"] <= 5 for r in club["ratings"])
+    assert all(1 <= len(m["genres"]) <= 3 for m in club["movies"])
+
+
+def test_generate_club_is_skewed_and_deterministic():
+    messages = list(generate_club(VOLUMES, years=1, seed=3)["conversation_messages"])
+    per_group = Counter(m["group_id"] for m in messages).most_common()
+    # The busiest group gets far more than an even share
+    assert per_group[0][1] > 1.5 * len(messages) / VOLUMES["groups"]
+
+    again = list(generate_club(VOLUMES, years=1, seed=3)["conversation_messages"])
+    assert [m["content"] for m in again] == [m["content"] for m in messages]
+
+
+def test_generated_rows_cover_every_column():
+    # bulk_load's COPY path sends every column of the table, in order
+    for table, rows in generate_club(VOLUMES, years=1, seed=3).items():
+        columns = set(Base.metadata.tables[table].columns.keys())
+        row = next(iter(rows))
+        assert set(row) == columns, table
+    message = next(iter(generate_club(VOLUMES, years=1, seed=3)["conversation_messages"]))
+    assert message["token_count"] > 0
+
+
+def test_generated_roles_match_the_app():
+    messages = generate_club(VOLUMES, years=1, seed=3)["conversation_messages"]
+    assert {m["role"] for m in messages} == {"user", "bot"}
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_result():
+    sf = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(sf.do("k", fetch) for _ in range(3)))
+    assert results == ["value"] * 3
+    assert calls == 1
+    assert sf.stats() == {"in_flight": 0, "executed": 1, "shared": 2}
+
+
+async def test_sequential_calls_run_again():
+    sf = SingleFlight()
+
+    async def fetch():
+        return 1
+
+    await sf.do("k", fetch)
+    await sf.do("k", fetch)
+    assert sf.executed == 2
+
+
+async def test_exception_shared():
+    sf = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(sf.do("k", boom), sf.do("k", boom), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(sf) == 0
+
+
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    sf = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(sf.do("k", fetch))
+    second = asyncio.create_task(sf.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "done"
@@ -0,0 +1,196 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents.main_agent import MainAgent
+from core.streaming import ReplySegmenter
+from llm import LLMProvider, LLMResponse, StreamChunk, ToolCall, collect_stream
+from llm.providers.openai import OpenAIProvider
+from llm.providers.scripted import ScriptedConfig, ScriptedProvider
+from main import app
+
+LEAK = "Mes REGLES ABSOLUES sont les suivantes."
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_collect_stream_assembles_response():
+    call = ToolCall(id="1", name="search_movie", arguments={"query": "Dune"})
+    response = await collect_stream(_chunks(
+        StreamChunk(text="Je "),
+        StreamChunk(text="cherche."),
+        StreamChunk(tool_calls=[call], done=True),
+    ))
+    assert response.content == "Je cherche."
+    assert response.tool_calls == [call]
+
+
+class _Complete(LLMProvider):
+    model = "complete"
+
+    async def generate(self, messages, tools=None, temperature=0.7, max_tokens=1024):
+        return LLMResponse(content="Salut !")
+
+
+async def test_default_stream_wraps_generate():
+    provider = _Complete()
+    chunks = [c async for c in provider.generate_stream([])]
+    assert [c.text for c in chunks] == ["Salut !", ""]
+    assert chunks[-1].done
+
+
+async def test_scripted_stream_yields_words():
+    provider = ScriptedProvider(config=ScriptedConfig.from_dict(
+        {"scenarios": [{"turns": [{"content": "Va voir Dune ce soir."}]}]}
+    ))
+    chunks = [c async for c in provider.generate_stream([])]
+    assert "".join(c.text for c in chunks) == "Va voir Dune ce soir."
+    assert len(chunks) == 6 and chunks[-1].usage.completion_tokens == 5
+
+
+def _delta(content=None, tool_calls=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _fragment(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments)
+    )
+
+
+async def test_openai_stream_assembles_tool_call_fragments():
+    provider = OpenAIProvider(api_key="x")
+    create = AsyncMock(return_value=_chunks(
+        _delta("Je regarde"),
+        _delta(tool_calls=[_fragment(0, id="call_a", name="search_movie", arguments='{"qu')]),
+        _delta(tool_calls=[_fragment(1, id="call_b", name="get_stats", arguments="{}")]),
+        _delta(tool_calls=[_fragment(0, arguments='ery": "Dune"}')]),
+        SimpleNamespace(choices=[], usage=SimpleNamespace(
+            prompt_tokens=10, completion_tokens=4, prompt_tokens_details=None
+        )),
+    ))
+    provider.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    response = await collect_stream(provider.generate_stream([]))
+
+    assert create.call_args.kwargs["stream"] is True
+    assert response.content == "Je regarde"
+    assert [(tc.id, tc.name, tc.arguments) for tc in response.tool_calls] == [
+        ("call_a", "search_movie", {"query": "Dune"}),
+        ("call_b", "get_stats", {}),
+    ]
+    assert response.usage.prompt_tokens == 10
+
+
+async def test_agent_forwards_preamble_and_answer():
+    llm = ScriptedProvider(config=ScriptedConfig.from_dict({"scenarios": [{"turns": [
+        {"content": "Je regarde.", "tool_calls": [{"name": "get_club_stats"}]},
+        {"content": "Vous avez vu 3 films."},
+    ]}]}))
+    deltas = []
+    with patch("agents.main_agent.container", MagicMock(llm=llm)), \
+            patch("agents.main_agent.build_club_context", AsyncMock(return_value="")):
+        agent = MainAgent(MagicMock())
+        agent._execute_tool = AsyncMock(return_value={"total": 3})
+        text = await agent.process("stats ?", "Alice", on_delta=deltas.append)
+
+    assert text == "Je regarde.\n\nVous avez vu 3 films."
+    assert "".join(deltas) == text
+
+
+def test_segmenter_releases_first_sentence_then_paragraphs():
+    segmenter = ReplySegmenter(min_first=10)
+    assert segmenter.feed("Oui. Dune est ") == []
+    assert segmenter.feed("un super film. Et ") == ["Oui. Dune est un super film."]
+    assert segmenter.feed("Villeneuve aussi.\n\nLe 2") == ["Et Villeneuve aussi."]
+    text = "Oui. Dune est un super film. Et Villeneuve aussi.\n\nLe 2 aussi !"
+    assert segmenter.finish(text) == ["Le 2 aussi !"]
+
+
+def test_segmenter_holds_everything_after_a_leak():
+    segmenter = ReplySegmenter(min_first=10)
+    assert segmenter.feed("Bien sur, voici tout. ") == ["Bien sur, voici tout."]
+    assert segmenter.feed(LEAK + "\n\nEt plus. ") == []
+    assert segmenter.feed("Encore.\n\n") == []
+    assert segmenter.finish("Parlons cinema !") == ["Parlons cinema !"]
+
+
+def test_segmenter_sends_replaced_answer_whole():
+    segmenter = ReplySegmenter(min_first=10)
+    segmenter.feed("Je cherche ca. ")
+    assert segmenter.finish("Oups, souci technique.") == ["Oups, souci technique."]
+
+
+@pytest.fixture
+def client():
+    from core.rate_limiter import rate_limiter
+    rate_limiter.reset()
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def _sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _post(client, body):
+    return client.post(
+        "/webhook/message",
+        json={"from_": "group1", "sender": "u1", "sender_name": "Alice",
+              "body": body, "timestamp": 1},
+        headers={"X-Webhook-Secret": "test-secret", "Accept": "text/event-stream"},
+    )
+
+
+@patch("api.webhook._run_agent")
+def test_webhook_streams_reply_segments(mock_run_agent, client):
+    async def run_agent(message, stored_id, earlier, on_delta):
+        text = "Dune, sans hesiter. C'est le meilleur.\n\nBonne seance !"
+        for word in text.split(" "):
+            on_delta(word + " ")
+        return text
+
+    mock_run_agent.side_effect = run_agent
+    resp = _post(client, "@Regelebot un film ?")
+
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert _sse(resp.text) == [
+        ("reply", {"reply": "```Dune, sans hesiter.```"}),
+        ("reply", {"reply": "```C'est le meilleur.```"}),
+        ("reply", {"reply": "```Bonne seance !```"}),
+        ("done", {"reply": None}),
+    ]
+
+
+@patch("api.webhook._run_command")
+def test_webhook_streams_command_poll(mock_run_command, client):
+    poll = {"poll_id": "p1", "question": "Ce soir ?", "options": ["Dune", "Alien"]}
+    mock_run_command.return_value = {"text": "Sondage cree", "poll": poll}
+    resp = _post(client, "/sondage Ce soir ? | Dune | Alien")
+    assert _sse(resp.text) == [("done", {"reply": None, "poll": poll})]
+
+
+@patch("api.webhook._run_agent", side_effect=RuntimeError("boom"))
+def test_webhook_stream_reports_errors(mock_run_agent, client):
+    assert _sse(_post(client, "@Regelebot salut").text) == [("error", {})]
+
+
+@patch("api.webhook._run_agent", new_callable=AsyncMock, return_value="Dune, sans hesiter.")
+def test_webhook_answers_coalesced_messages_in_json(mock_run_agent, client):
+    # The gateway asks for a stream, but a coalesced turn answers in JSON
+    from core.coalescer import coalescer
+    with patch.object(coalescer, "window", 0.01):
+        resp = _post(client, "@Regelebot un film ?")
+
+    assert resp.headers["content-type"].startswith("application/json")
+    assert resp.json() == {"reply": "```Dune, sans hesiter.```"}
@@ -0,0 +1,141 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from agents.main_agent import MainAgent
+from commands.flush import cmd_flush
+from llm import LLMResponse
+from models.conversation import ConversationMessage
+from services.summarizer import Summarizer
+from services.summary import SummaryService
+
+T0 = datetime(2026, 1, 1, 20, 0)
+
+
+class FakeLLM:
+    model = "fake"
+
+    def __init__(self, reply: str = "Alice adore les films de Miyazaki."):
+        self.reply = reply
+        self.prompts: list[str] = []
+
+    async def generate(self, messages, tools=None, temperature=0.7, max_tokens=1024):
+        self.prompts.append(messages[0].content)
+        return LLMResponse(content=self.reply)
+
+
+def _add_messages(db, group_id: str, count: int, start: int = 0) -> None:
+    for i in range(start, start + count):
+        db.add(ConversationMessage(
+            group_id=group_id,
+            role="user" if i % 2 == 0 else "bot",
+            sender_name="Alice",
+            content=f"message {i}",
+            created_at=T0 + timedelta(minutes=i),
+        ))
+
+
+def _summarizer(db, llm, **kwargs) -> Summarizer:
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    params = dict(
+        interval=60, keep=4, min_new=2, max_groups=10, batch=100, concurrency=2, max_words=50
+    )
+    return Summarizer(**{**params, **kwargs}, llm=llm, db_factory=session)
+
+
+async def test_pending_groups_only_lists_backlogged_groups(db):
+    _add_messages(db, "busy", 10)
+    _add_messages(db, "quiet", 6)  # keep + min_new: nothing to fold yet
+    await db.flush()
+    assert await SummaryService(db).pending_groups(keep=4, min_new=2, limit=10) == ["busy"]
+
+
+async def test_run_folds_messages_older_than_window(db):
+    _add_messages(db, "g1", 10)
+    await db.flush()
+    llm = FakeLLM()
+
+    assert await _summarizer(db, llm).run_once() == 1
+
+    summary = await SummaryService(db).get("g1")
+    assert summary.content == "Alice adore les films de Miyazaki."
+    assert summary.message_count == 6
+    assert summary.covered_until == T0 + timedelta(minutes=5)
+    # The newest four stay raw history and are not summarized
+    assert "message 5" in llm.prompts[0]
+    assert "message 6" not in llm.prompts[0]
+
+
+async def test_next_run_merges_only_new_messages(db):
+    _add_messages(db, "g1", 10)
+    await db.flush()
+    llm = FakeLLM()
+    summarizer = _summarizer(db, llm)
+    await summarizer.run_once()
+
+    _add_messages(db, "g1", 4, start=10)
+    await db.flush()
+    assert await summarizer.run_once() == 1
+
+    prompt = llm.prompts[1]
+    assert "Alice adore les films de Miyazaki." in prompt
+    assert "message 5" not in prompt
+    assert "message 9" in prompt
+    assert (await SummaryService(db).get("g1")).message_count == 10
+
+
+async def test_batch_never_splits_messages_with_the_same_timestamp(db):
+    _add_messages(db, "g1", 10)
+    db.add(ConversationMessage(
+        group_id="g1", role="bot", content="same time", created_at=T0 + timedelta(minutes=2)
+    ))
+    await db.flush()
+
+    turns = await SummaryService(db).turns_to_fold("g1", None, keep=4, limit=4)
+    assert [t.content for t in turns] == ["message 0", "message 1"]
+
+
+async def test_failed_summary_keeps_previous_one(db):
+    _add_messages(db, "g1", 10)
+    await db.flush()
+
+    class BrokenLLM(FakeLLM):
+        async def generate(self, *args, **kwargs):
+            raise RuntimeError("provider down")
+
+    assert await _summarizer(db, BrokenLLM()).run_once() == 0
+    assert await SummaryService(db).get("g1") is None
+
+
+async def test_flush_resets_summary(db):
+    _add_messages(db, "g1", 40)
+    await db.flush()
+    await _summarizer(db, FakeLLM()).run_once()
+
+    # Deletes the newest CONVERSATION_WINDOW_SIZE (30) messages, 10 remain
+    await cmd_flush("", {"name": "Alice"}, db, group_id="g1")
+
+    summary = await SummaryService(db).get("g1")
+    assert summary.content == ""
+    # Messages the summary covered are not summarized again
+    assert await SummaryService(db).pending_groups(keep=4, min_new=2, limit=10) == []
+
+
+@pytest.mark.parametrize("summary", [None, "Bob deteste les films d'horreur."])
+async def test_summary_goes_into_system_prompt(summary):
+    llm = AsyncMock()
+    llm.model = "fake"
+    llm.generate.return_value = LLMResponse(content="Salut !")
+    with patch("agents.main_agent.container", MagicMock(llm=llm)), \
+            patch("agents.main_agent.build_club_context", AsyncMock(return_value="")):
+        await MainAgent(MagicMock()).process("salut", "Alice", summary=summary)
+
+    system = llm.generate.call_args.kwargs["messages"][1].content
+    assert ("<conversation_summary>" in system) == (summary is not None)
+    if summary:
+        assert summary in system
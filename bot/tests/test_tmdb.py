@@ -0,0 +1,199 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from core.cache import TTLCache
+from services.tmdb import TMDbClient, TMDbError, _retry_after, cache_key, endpoint_family
+
+
+def make_client(handler, cache: TTLCache | None = None) -> TMDbClient:
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return TMDbClient(
+        "key", http, base_url="https://tmdb.test/3", backoff_base=0, cache=cache
+    )
+
+
+def test_endpoint_family():
+    assert endpoint_family("/movie/27205") == "/movie/{id}"
+    assert endpoint_family("/movie/27205/similar") == "/movie/{id}/similar"
+    assert endpoint_family("/trending/movie/week") == "/trending/movie/week"
+
+
+async def test_get_sends_api_key_and_params():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"results": []})
+
+    tmdb = make_client(handler)
+    assert await tmdb.get("/search/movie", {"query": "Dune"}) == {"results": []}
+    assert seen[0].url.path == "/3/search/movie"
+    assert seen[0].url.params["api_key"] == "key"
+    assert seen[0].url.params["query"] == "Dune"
+
+
+async def test_retries_429_and_5xx():
+    statuses = iter([429, 503, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        return httpx.Response(status, json={"ok": status == 200})
+
+    tmdb = make_client(handler)
+    assert await tmdb.get("/movie/1") == {"ok": True}
+    stats = tmdb.stats()["endpoints"]["/movie/{id}"]
+    assert stats["calls"] == 3
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+async def test_retries_network_errors_then_gives_up():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("down", request=request)
+
+    tmdb = make_client(handler)
+    with pytest.raises(TMDbError):
+        await tmdb.get("/movie/now_playing")
+    assert calls == tmdb.max_retries + 1
+    assert tmdb.stats()["endpoints"]["/movie/now_playing"]["errors"] == 1
+
+
+async def test_no_retry_on_client_error():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(404)
+
+    tmdb = make_client(handler)
+    with pytest.raises(TMDbError):
+        await tmdb.get("/movie/999")
+    assert calls == 1
+
+
+async def test_invalid_json_body_raises_tmdb_error():
+    tmdb = make_client(lambda request: httpx.Response(200, text="<html>maintenance</html>"))
+    with pytest.raises(TMDbError, match="invalid JSON"):
+        await tmdb.get("/movie/1")
+    assert tmdb.stats()["endpoints"]["/movie/{id}"]["errors"] == 1
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    def retry_after(value: str) -> float | None:
+        return _retry_after(httpx.Response(429, headers={"Retry-After": value}))
+
+    assert retry_after("2") == 2.0
+    assert retry_after("-5") == 0.0
+    assert retry_after("soon") is None
+    assert retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # in the past
+    assert _retry_after(httpx.Response(429)) is None
+
+
+async def test_retry_after_is_capped():
+    statuses = iter([429, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(next(statuses), headers={"Retry-After": "86400"}, json={})
+
+    tmdb = make_client(handler)
+    tmdb.max_backoff = 0.01
+    start = time.perf_counter()
+    await tmdb.get("/movie/1")
+    assert time.perf_counter() - start < 1
+
+
+def test_cache_key_normalizes_params():
+    a = cache_key("/search/movie", {"query": " Inception ", "language": "fr-FR"})
+    b = cache_key("/search/movie", {"language": "fr-FR", "query": "inception"})
+    assert a == b
+
+
+async def test_cached_per_endpoint_ttl():
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"id": 1})
+
+    tmdb = make_client(handler, cache=TTLCache(maxsize=10))
+    for _ in range(3):
+        await tmdb.get("/movie/1", {"language": "fr-FR"})
+        await tmdb.get("/configuration")  # no TTL: never cached
+    assert calls.count("/3/movie/1") == 1
+    assert calls.count("/3/configuration") == 3
+    assert tmdb.stats()["cache"]["families"]["/movie/{id}"]["hits"] == 2
+
+
+async def test_failures_and_empty_results_cached_briefly():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if request.url.path.endswith("/movie/1"):
+            return httpx.Response(404)
+        return httpx.Response(200, json={"results": []})
+
+    cache = TTLCache(maxsize=10)
+    tmdb = make_client(handler, cache=cache)
+    raised = []
+    for _ in range(2):
+        with pytest.raises(TMDbError) as excinfo:
+            await tmdb.get("/movie/1")
+        raised.append(excinfo.value)
+        await tmdb.get("/search/movie", {"query": "zzz"})
+    assert calls == 2
+    # The cached failure raises a fresh error, not the first one again
+    assert raised[1] is not raised[0]
+    assert str(raised[1]) == str(raised[0])
+
+    # Both entries expire after negative_ttl, not the family TTL
+    expires = [entry[0] for entry in cache._data.values()]
+    assert all(e - time.monotonic() <= tmdb.negative_ttl for e in expires)
+
+
+async def test_concurrent_identical_requests_share_one_call():
+    calls = 0
+    release = asyncio.Event()
+
+    async def slow_get(url, params=None):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json={"id": 1})
+
+    tmdb = make_client(lambda r: httpx.Response(500))
+    tmdb.client.get = slow_get
+    pending = [asyncio.create_task(tmdb.get("/movie/1")) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*pending)
+
+    assert results == [{"id": 1}] * 5
+    assert calls == 1
+    assert tmdb.stats()["singleflight"]["shared"] == 4
+
+
+async def test_refresh_bypasses_cache_and_keeps_entry_on_failure():
+    responses = iter([200, 200, 503])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(responses)
+        return httpx.Response(status, json={"results": [status]})
+
+    tmdb = make_client(handler, cache=TTLCache(maxsize=10))
+    tmdb.max_retries = 0
+    assert await tmdb.get("/trending/movie/day") == {"results": [200]}
+    assert await tmdb.get("/trending/movie/day", refresh=True) == {"results": [200]}
+    with pytest.raises(TMDbError):
+        await tmdb.get("/trending/movie/day", refresh=True)
+    # The failed refresh did not replace the good entry
+    assert await tmdb.get("/trending/movie/day") == {"results": [200]}
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+from services.tmdb import TMDbClient, TMDbError  # noqa: E402
+from tmdb_stub import create_app, fixture_key, parse_latency, synthesize  # noqa: E402
+
+
+def make_client(**kwargs) -> TMDbClient:
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(**kwargs)))
+    return TMDbClient("key", http, base_url="http://stub/3", max_retries=0)
+
+
+async def test_serves_fixture():
+    tmdb = make_client()
+    data = await tmdb.get("/search/movie", {"query": "Inception", "language": "fr-FR"})
+    assert data["results"][0]["id"] == 27205
+
+
+async def test_synthesizes_unknown_requests():
+    tmdb = make_client()
+    search = await tmdb.get("/search/movie", {"query": "film inconnu"})
+    assert search["results"][0]["title"] == "Film Inconnu"
+    details = await tmdb.get(f"/movie/{search['results'][0]['id']}")
+    assert details["credits"]["crew"][0]["job"] == "Director"
+
+
+async def test_error_injection_and_unknown_paths():
+    with pytest.raises(TMDbError):
+        await make_client(error_rate=1.0).get("/trending/movie/day")
+    with pytest.raises(TMDbError, match="404"):
+        await make_client().get("/tv/popular")
+
+
+def test_synthesize_is_deterministic():
+    assert synthesize("/discover/movie", {"with_genres": 18}) == synthesize(
+        "/discover/movie", {"with_genres": 18}
+    )
+
+
+def test_fixture_key_ignores_api_key_and_order():
+    assert fixture_key("/x", {"b": 1, "a": 2, "api_key": "k"}) == "/x?a=2&b=1"
+
+
+def test_parse_latency():
+    assert parse_latency("none")() == 0
+    assert parse_latency("fixed:50")() == 0.05
+    assert 0.01 <= parse_latency("uniform:10:20")() <= 0.02
+    with pytest.raises(ValueError):
+        parse_latency("gaussian:1")
@@ -1,10 +1,32 @@
 from types import SimpleNamespace
 
-from core.token_budget import estimate_tokens, extract_movie_titles, prepare_history
+import pytest
 
+from core.token_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    TokenCounter,
+    estimate_tokens,
+    extract_movie_titles,
+    get_token_counter,
+    pack_history,
+    prepare_history,
+)
 
-def _msg(content: str, role: str = "user", sender_name: str | None = None) -> SimpleNamespace:
-    return SimpleNamespace(content=content, role=role, sender_name=sender_name)
+
+def _msg(
+    content: str,
+    role: str = "user",
+    sender_name: str | None = None,
+    token_count: int | None = None,
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        content=content, role=role, sender_name=sender_name, token_count=token_count
+    )
+
+
+# Every message below costs 10 + overhead tokens
+COUNTER = TokenCounter(chars_per_token=1.0)
+COST = 10 + MESSAGE_OVERHEAD_TOKENS
 
 
 # --- estimate_tokens ---
@@ -62,28 +84,21 @@ def test_prepare_empty():
     assert excluded == []
 
 
-def test_prepare_splits_user_and_bot():
+def test_prepare_keeps_bot_turns():
     msgs = [
         _msg("Recommande un film", role="user", sender_name="Alice"),
         _msg("Je te recommande Inception (2010)", role="bot"),
         _msg("Autre chose", role="user", sender_name="Alice"),
     ]
-    user_msgs, excluded = prepare_history(msgs)
-    assert len(user_msgs) == 2
-    assert all(m.role == "user" for m in user_msgs)
+    history, excluded = prepare_history(msgs)
+    assert [m.role for m in history] == ["user", "bot", "user"]
     assert "Inception" in excluded
 
 
-def test_prepare_limits_user_messages():
-    msgs = [
-        _msg(f"msg {i}", role="user", sender_name="Alice")
-        for i in range(10)
-    ]
-    user_msgs, _ = prepare_history(msgs, max_user_messages=3)
-    assert len(user_msgs) == 3
-    # Should keep the last 3
-    assert user_msgs[0].content == "msg 7"
-    assert user_msgs[2].content == "msg 9"
+def test_prepare_fills_budget_newest_first():
+    msgs = [_msg(f"message {i:02d}", sender_name="Alice") for i in range(10)]
+    history, _ = prepare_history(msgs, budget=3 * COST, counter=COUNTER)
+    assert [m.content for m in history] == ["message 07", "message 08", "message 09"]
 
 
 def test_prepare_extracts_from_multiple_bot_messages():
@@ -93,7 +108,67 @@ def test_prepare_extracts_from_multiple_bot_messages():
         _msg("Ok alors **The Matrix**", role="bot"),
         _msg("toujours pas", role="user", sender_name="Bob"),
     ]
-    user_msgs, excluded = prepare_history(msgs)
-    assert len(user_msgs) == 2
+    history, excluded = prepare_history(msgs, budget=0)
+    assert history == []
     assert "Inception" in excluded
     assert "The Matrix" in excluded
+
+
+# --- pack_history ---
+
+
+def test_pack_skips_bot_turns_that_do_not_fit():
+    msgs = [
+        _msg("question 1", sender_name="Bob"),
+        _msg("x" * 500, role="bot"),
+        _msg("question 2", sender_name="Bob"),
+    ]
+    packed = pack_history(msgs, 2 * COST, COUNTER)
+    assert [m.content for m in packed] == ["question 1", "question 2"]
+
+
+def test_pack_stops_at_first_user_message_that_does_not_fit():
+    msgs = [
+        _msg("question 1", sender_name="Bob"),
+        _msg("x" * 500, sender_name="Bob"),
+        _msg("question 2", sender_name="Bob"),
+    ]
+    packed = pack_history(msgs, 10 * COST, COUNTER)
+    assert [m.content for m in packed] == ["question 2"]
+
+
+def test_pack_prefers_cached_token_count():
+    msgs = [_msg("short", token_count=1000), _msg("question 2")]
+    packed = pack_history(msgs, 100, COUNTER)
+    assert [m.content for m in packed] == ["question 2"]
+
+
+# --- TokenCounter ---
+
+
+def test_counter_calibrates_towards_reported_tokens():
+    counter = TokenCounter()
+    for _ in range(50):
+        counter.calibrate(chars=3000, prompt_tokens=1000)
+    assert counter.chars_per_token == pytest.approx(3.0, abs=0.05)
+    assert counter.count("a" * 300) == 100
+
+
+def test_counter_calibration_is_bounded():
+    counter = TokenCounter()
+    for _ in range(200):
+        counter.calibrate(chars=100, prompt_tokens=1000)
+    assert counter.chars_per_token >= 2.0
+
+
+def test_exact_counter_ignores_calibration():
+    counter = TokenCounter(encode=str.split)
+    counter.calibrate(chars=3000, prompt_tokens=1000)
+    assert counter.exact
+    assert counter.count("deux mots") == 2
+
+
+def test_providers_without_local_tokenizer_estimate():
+    assert not get_token_counter("gemini", "gemini-2.5-flash").exact
+    # Ollama behind the OpenAI-compatible API: tiktoken would be wrong
+    assert not get_token_counter("openai", "llama3", "http://ollama:11434/v1").exact
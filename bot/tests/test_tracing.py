@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from opentelemetry import trace
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+HEADERS = {"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+
+
+@pytest.fixture
+def tracer():
+    # The API's no-op tracer records nothing but propagates span contexts
+    tracing.enable(trace.NoOpTracer())
+    yield
+    tracing.shutdown()
+
+
+def _current_trace_id() -> str:
+    return format(trace.get_current_span().get_span_context().trace_id, "032x")
+
+
+async def test_disabled_tracing_is_a_no_op():
+    async def job():
+        return 1
+
+    assert tracing.bind(job) is job
+    with tracing.span("anything") as current:
+        assert current is None
+    with tracing.server_span("POST /webhook/message", HEADERS) as current:
+        assert current is None
+
+
+async def test_server_span_continues_incoming_trace(tracer):
+    with tracing.server_span("POST /webhook/message", HEADERS):
+        with tracing.span("llm.generate"):
+            assert _current_trace_id() == TRACE_ID
+
+
+async def test_bind_keeps_trace_across_tasks(tracer):
+    seen = []
+
+    async def job():
+        seen.append(_current_trace_id())
+
+    with tracing.server_span("POST /webhook/message", HEADERS):
+        bound = tracing.bind(job)
+    # Started later from a task outside the request, like the scheduler does
+    await asyncio.create_task(bound())
+    assert seen == [TRACE_ID]
+
+
+async def test_sql_spans_survive_failing_statements(tracer):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    tracing.enable(trace.NoOpTracer(), engine)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        with pytest.raises(Exception):
+            await conn.execute(text("SELECT * FROM missing"))
+        raw = await conn.get_raw_connection()
+        assert not raw.info.get("spans")
+    await engine.dispose()
@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agents.subagents.recommendation import FALLBACK_GENRES, RecommendationAgent
+from core.container import ServiceContainer
+from llm import LLMProvider, LLMResponse
+from llm.providers.limited import LimitedProvider
+
+
+class _Slow(LLMProvider):
+    model = "slow"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+
+    async def generate(self, messages, tools=None, temperature=0.7, max_tokens=1024):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return LLMResponse(content="35,10749")
+
+
+async def test_limits_concurrency():
+    inner = _Slow(0.01)
+    provider = LimitedProvider(inner, concurrency=2, timeout=1)
+    await asyncio.gather(*(provider.generate_text("x") for _ in range(5)))
+    assert inner.peak == 2
+    assert provider.stats()["waiting"] == 0
+
+
+async def test_times_out():
+    provider = LimitedProvider(_Slow(1), concurrency=1, timeout=0.01)
+    with pytest.raises(TimeoutError):
+        await provider.generate_text("x")
+    assert provider.stats()["timeouts"] == 1
+
+
+@patch("core.container.create_llm_provider")
+def test_utility_tier_wraps_main_provider_by_default(mock_factory):
+    mock_factory.return_value = main = _Slow(0)
+    c = ServiceContainer()
+    assert c.utility_llm is c.utility_llm
+    assert c.utility_llm.provider is main
+
+
+async def test_mood_mapping_falls_back_on_timeout():
+    llm = LimitedProvider(_Slow(1), concurrency=1, timeout=0.01)
+    agent = RecommendationAgent(MagicMock(), tmdb=MagicMock(), llm=llm)
+    assert await agent._ask_mood_genres("feel-good") is FALLBACK_GENRES
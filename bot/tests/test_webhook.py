@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from fastapi.testclient import TestClient
 
+from core.scheduler import QueueFullError
 from main import app
 
 
@@ -68,29 +69,205 @@ def test_rate_limit(mock_router_cls, mock_agent_cls, mock_conv_cls, mock_get_db,
     assert resp.status_code == 429
 
 
+@patch("api.webhook.get_db")
+@patch("api.webhook.MainAgent")
+def test_null_reply(mock_agent_cls, mock_get_db, client):
+    headers = {"X-Webhook-Secret": "test-secret"}
+
+    from core.rate_limiter import rate_limiter
+    rate_limiter.reset()
+
+    payload = {**_message_payload(), "body": "just chatting"}
+    resp = client.post("/webhook/message", json=payload, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["reply"] is None
+    # Ignored messages never touch the DB nor build the agent
+    mock_get_db.assert_not_called()
+    mock_agent_cls.assert_not_called()
+
+
+@patch("api.webhook.handle_command", new_callable=AsyncMock)
 @patch("api.webhook.get_db")
 @patch("api.webhook.ConversationService")
 @patch("api.webhook.MainAgent")
-@patch("api.webhook.MessageRouter")
-def test_null_reply(mock_router_cls, mock_agent_cls, mock_conv_cls, mock_get_db, client):
+def test_command_skips_history_and_agent(
+    mock_agent_cls, mock_conv_cls, mock_get_db, mock_handle, client
+):
     mock_db = AsyncMock()
     mock_get_db.return_value.__aenter__ = AsyncMock(return_value=mock_db)
     mock_get_db.return_value.__aexit__ = AsyncMock(return_value=False)
 
     mock_conv = AsyncMock()
-    mock_conv.get_recent_history.return_value = []
     mock_conv_cls.return_value = mock_conv
+    mock_handle.return_value = "Stats"
 
-    mock_router = AsyncMock()
-    mock_router.should_respond.return_value = False
-    mock_router.route.return_value = None
-    mock_router_cls.return_value = mock_router
+    from core.rate_limiter import rate_limiter
+    rate_limiter.reset()
 
-    headers = {"X-Webhook-Secret": "test-secret"}
+    payload = {**_message_payload(), "body": "/stats"}
+    resp = client.post(
+        "/webhook/message", json=payload, headers={"X-Webhook-Secret": "test-secret"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["reply"] == "```Stats```"
+    mock_agent_cls.assert_not_called()
+    mock_conv.get_recent_history.assert_not_called()
+    assert mock_conv.store_message.await_count == 2  # command + reply
+
+
+@patch("api.webhook.scheduler")
+@patch("api.webhook.get_db")
+@patch("api.webhook.ConversationService")
+def test_async_reply_queues_job(mock_conv_cls, mock_get_db, mock_scheduler, client):
+    mock_db = AsyncMock()
+    mock_get_db.return_value.__aenter__ = AsyncMock(return_value=mock_db)
+    mock_get_db.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    mock_conv = AsyncMock()
+    mock_conv.store_message.return_value = MagicMock(id="stored-id")
+    mock_conv_cls.return_value = mock_conv
+    mock_scheduler.submit.return_value = "job123"
 
     from core.rate_limiter import rate_limiter
     rate_limiter.reset()
 
-    resp = client.post("/webhook/message", json=_message_payload(), headers=headers)
+    with patch("api.webhook.settings.ASYNC_REPLIES", True):
+        resp = client.post(
+            "/webhook/message",
+            json=_message_payload(),
+            headers={"X-Webhook-Secret": "test-secret"},
+        )
+
+    assert resp.status_code == 202
+    assert resp.json() == {"job_id": "job123", "status": "queued"}
+    mock_conv.store_message.assert_awaited_once()
+    mock_scheduler.submit.assert_called_once()
+
+
+@patch("api.webhook.scheduler")
+@patch("api.webhook.get_db")
+@patch("api.webhook.ConversationService")
+def test_async_reply_unstores_message_when_queue_is_full(
+    mock_conv_cls, mock_get_db, mock_scheduler, client
+):
+    mock_get_db.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+    mock_get_db.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    mock_conv = AsyncMock()
+    mock_conv.store_message.return_value = MagicMock(id="stored-id")
+    mock_conv_cls.return_value = mock_conv
+    mock_scheduler.submit.side_effect = QueueFullError
+
+    from core.rate_limiter import rate_limiter
+    rate_limiter.reset()
+
+    with patch("api.webhook.settings.ASYNC_REPLIES", True):
+        resp = client.post(
+            "/webhook/message",
+            json=_message_payload(),
+            headers={"X-Webhook-Secret": "test-secret"},
+        )
+
+    assert resp.status_code == 503
+    mock_conv.delete_message.assert_awaited_once_with("stored-id")
+
+
+@patch("api.webhook.scheduler")
+def test_async_reply_ignores_unaddressed_message(mock_scheduler, client):
+    from core.rate_limiter import rate_limiter
+    rate_limiter.reset()
+
+    payload = {**_message_payload(), "body": "just chatting"}
+    with patch("api.webhook.settings.ASYNC_REPLIES", True):
+        resp = client.post(
+            "/webhook/message",
+            json=payload,
+            headers={"X-Webhook-Secret": "test-secret"},
+        )
+
     assert resp.status_code == 200
     assert resp.json()["reply"] is None
+    mock_scheduler.submit.assert_not_called()
+
+
+@patch("api.webhook.gateway_client")
+@patch("api.webhook.scheduler")
+@patch("api.webhook.get_db")
+@patch("api.webhook.ConversationService")
+async def test_full_queue_answers_dropped_burst(
+    mock_conv_cls, mock_get_db, mock_scheduler, mock_gateway
+):
+    from api.webhook import QUEUE_FULL_REPLY, WhatsAppMessage, _submit_burst
+    from core.coalescer import Burst
+
+    mock_get_db.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+    mock_get_db.return_value.__aexit__ = AsyncMock(return_value=False)
+    mock_conv = AsyncMock()
+    mock_conv_cls.return_value = mock_conv
+    mock_scheduler.submit.side_effect = QueueFullError
+    mock_gateway.send_reply = AsyncMock()
+
+    first, last = (
+        WhatsAppMessage(**{**_message_payload(), "body": body, "message_id": f"wa-{i}"})
+        for i, body in enumerate(["@Regelebot salut", "un film ?"])
+    )
+    burst = Burst(id="b1", items=[(first, "s1"), (last, "s2")], result=MagicMock())
+    await _submit_burst(burst)
+
+    assert [c.args for c in mock_conv.delete_message.await_args_list] == [("s1",), ("s2",)]
+    mock_gateway.send_reply.assert_awaited_once_with(
+        job_id="b1", chat_id="group1", message_id="wa-1",
+        result={"reply": f"```{QUEUE_FULL_REPLY}```"},
+    )
+
+
+@patch("api.webhook.gateway_client")
+@patch("api.webhook._run_agent", new_callable=AsyncMock, return_value="Dune, sans hesiter.")
+@patch("api.webhook.get_db")
+@patch("api.webhook.ConversationService")
+async def test_async_burst_of_two_messages_gets_one_reply(
+    mock_conv_cls, mock_get_db, mock_run_agent, mock_gateway
+):
+    import asyncio
+
+    import httpx
+
+    from core.coalescer import coalescer
+    from core.rate_limiter import rate_limiter
+
+    mock_get_db.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+    mock_get_db.return_value.__aexit__ = AsyncMock(return_value=False)
+    mock_conv = AsyncMock()
+    mock_conv.store_message.side_effect = [MagicMock(id="s1"), MagicMock(id="s2")]
+    mock_conv_cls.return_value = mock_conv
+    mock_gateway.send_reply = AsyncMock()
+    rate_limiter.reset()
+
+    transport = httpx.ASGITransport(app=app)
+    with patch("api.webhook.settings.ASYNC_REPLIES", True), \
+            patch.object(coalescer, "window", 0.05):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bot") as client:
+            responses = [
+                await client.post(
+                    "/webhook/message",
+                    json={**_message_payload(), "body": body, "message_id": f"wa-{i}"},
+                    headers={"X-Webhook-Secret": "test-secret"},
+                )
+                for i, body in enumerate(["@Regelebot un film ?", "@Regelebot plutot SF"])
+            ]
+            for _ in range(100):
+                if mock_gateway.send_reply.await_count:
+                    break
+                await asyncio.sleep(0.01)
+
+    assert [r.status_code for r in responses] == [202, 202]
+    assert responses[0].json()["job_id"] == responses[1].json()["job_id"]
+    mock_run_agent.assert_awaited_once()
+    message, stored_id, earlier = mock_run_agent.await_args.args[:3]
+    assert (message.body, stored_id, [m.body for m in earlier]) == (
+        "@Regelebot plutot SF", "s1", ["@Regelebot un film ?"],
+    )
+    mock_gateway.send_reply.assert_awaited_once()
+    assert mock_gateway.send_reply.await_args.kwargs["result"] == {
+        "reply": "```Dune, sans hesiter.```"
+    }
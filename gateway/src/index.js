@@ -10,6 +10,9 @@ const BOT_URL = process.env.BOT_URL || 'http://localhost:8000';
 const BOT_NAME = (process.env.BOT_NAME || 'Regelebot').toLowerCase();
 const PORT = process.env.PORT || 3000;
 const WEBHOOK_SECRET = process.env.WEBHOOK_SECRET;
+// Ask the bot for server-sent events: the first sentence is sent to WhatsApp
+// while the rest of the answer is still being generated
+const STREAM_REPLIES = process.env.STREAM_REPLIES === 'true';
 
 // Support comma-separated chat IDs (groups + 1-to-1), with backward compat
 const rawChatIds = process.env.WHATSAPP_CHAT_IDS || process.env.WHATSAPP_GROUP_ID || '';
@@ -54,8 +57,96 @@ client.on('ready', () => {
 
 // Per-chat processing guard: prevents reply loops in 1-to-1 and self-chats.
 // While handleMessage is running for a chat, any new message in that chat is skipped.
+// In async mode it ends as soon as the bot answers 202, which is what lets
+// the bot coalesce a burst of messages; synchronous replies hold it throughout.
 const processing = new Set();
 
+// Send the bot's answer: a native WhatsApp poll if present, otherwise a text reply.
+// `message` is the original message to reply to (may be null).
+async function sendBotResponse(chat, message, data) {
+    if (data && data.poll) {
+        const poll = new Poll(
+            data.poll.question,
+            data.poll.options,
+            { allowMultipleAnswers: false }
+        );
+        const sentMsg = await chat.sendMessage(poll);
+        // Mark as handled so dedup ignores the bot's own message
+        if (sentMsg && sentMsg.id) handled.add(sentMsg.id._serialized);
+        // Link WhatsApp message to DB poll
+        if (data.poll.poll_id && sentMsg && sentMsg.id) {
+            try {
+                await axios.post(`${BOT_URL}/webhook/poll-created`, {
+                    poll_id: data.poll.poll_id,
+                    wa_message_id: sentMsg.id._serialized,
+                }, {
+                    headers: { 'X-Webhook-Secret': WEBHOOK_SECRET },
+                });
+                console.log(`[Gateway] Linked poll ${data.poll.poll_id} to WA msg ${sentMsg.id._serialized}`);
+            } catch (linkErr) {
+                console.error(`[Gateway] Failed to link poll: ${linkErr.message}`);
+            }
+        }
+    } else if (data && data.reply) {
+        // Reply to the original message so it's clear the bot is responding
+        const sentReply = message
+            ? await message.reply(data.reply)
+            : await chat.sendMessage(data.reply);
+        // Mark as handled so dedup ignores the bot's own reply
+        if (sentReply && sentReply.id) handled.add(sentReply.id._serialized);
+    }
+}
+
+// Post a message in streaming mode and send each `reply` event as it comes:
+// the first one quotes the original message, the next ones follow it.
+// Resolves once the bot sends `done` (with the poll, if any) or `error`.
+// The bot answers in plain JSON when it does not stream (async mode,
+// coalesced messages): that response is returned as { status, data }
+// for the caller to handle like an unstreamed one.
+async function streamBotResponse(chat, message, payload) {
+    const response = await axios.post(`${BOT_URL}/webhook/message`, payload, {
+        timeout: 30000,
+        responseType: 'stream',
+        headers: { 'X-Webhook-Secret': WEBHOOK_SECRET, 'Accept': 'text/event-stream' },
+    });
+
+    const contentType = String(response.headers['content-type'] || '');
+    if (!contentType.includes('text/event-stream')) {
+        let raw = '';
+        for await (const chunk of response.data) raw += chunk.toString();
+        return { status: response.status, data: raw ? JSON.parse(raw) : null };
+    }
+
+    let buffer = '';
+    let replied = false;
+    for await (const chunk of response.data) {
+        buffer += chunk.toString();
+        let end;
+        while ((end = buffer.indexOf('\n\n')) >= 0) {
+            const block = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const event = /^event: (.*)$/m.exec(block);
+            const data = /^data: (.*)$/m.exec(block);
+            if (!event || !data) continue;
+            const body = JSON.parse(data[1]);
+
+            if (event[1] === 'reply') {
+                const sent = replied
+                    ? await chat.sendMessage(body.reply)
+                    : await message.reply(body.reply);
+                replied = true;
+                if (sent && sent.id) handled.add(sent.id._serialized);
+            } else if (event[1] === 'done') {
+                await sendBotResponse(chat, message, body);
+                return;
+            } else {
+                console.error('[Gateway] Bot failed while streaming the reply');
+                return;
+            }
+        }
+    }
+}
+
 // Handle incoming messages
 async function handleMessage(message, eventName) {
     const body = message.body || '';
@@ -115,51 +206,40 @@ async function handleMessage(message, eventName) {
         console.log(`[Gateway] Processing: ${senderName}: ${body.substring(0, 80)}`);
 
         // Send to Python bot
-        const response = await axios.post(`${BOT_URL}/webhook/message`, {
+        const payload = {
             from_: chatId,
             sender: message.author || message.from,
             sender_name: senderName,
             body: body,
             timestamp: message.timestamp,
             is_direct: isDirect,
-        }, {
-            timeout: 30000,
-            headers: { 'X-Webhook-Secret': WEBHOOK_SECRET },
-        });
+            message_id: message.id._serialized,
+        };
+
+        const response = STREAM_REPLIES
+            ? await streamBotResponse(chat, message, payload)
+            : await axios.post(`${BOT_URL}/webhook/message`, payload, {
+                timeout: 30000,
+                headers: { 'X-Webhook-Secret': WEBHOOK_SECRET },
+            });
+
+        // Already sent event by event
+        if (!response) {
+            await chat.clearState();
+            return;
+        }
+
+        // Async mode: the reply will arrive later on /callback/reply,
+        // keep the typing indicator until then
+        if (response.status === 202) {
+            console.log(`[Gateway] Queued as job ${response.data.job_id}`);
+            return;
+        }
 
         // Clear typing indicator
         await chat.clearState();
 
-        // Send native WhatsApp poll if present, otherwise reply with text
-        if (response.data && response.data.poll) {
-            const poll = new Poll(
-                response.data.poll.question,
-                response.data.poll.options,
-                { allowMultipleAnswers: false }
-            );
-            const sentMsg = await chat.sendMessage(poll);
-            // Mark as handled so dedup ignores the bot's own message
-            if (sentMsg && sentMsg.id) handled.add(sentMsg.id._serialized);
-            // Link WhatsApp message to DB poll
-            if (response.data.poll.poll_id && sentMsg && sentMsg.id) {
-                try {
-                    await axios.post(`${BOT_URL}/webhook/poll-created`, {
-                        poll_id: response.data.poll.poll_id,
-                        wa_message_id: sentMsg.id._serialized,
-                    }, {
-                        headers: { 'X-Webhook-Secret': WEBHOOK_SECRET },
-                    });
-                    console.log(`[Gateway] Linked poll ${response.data.poll.poll_id} to WA msg ${sentMsg.id._serialized}`);
-                } catch (linkErr) {
-                    console.error(`[Gateway] Failed to link poll: ${linkErr.message}`);
-                }
-            }
-        } else if (response.data && response.data.reply) {
-            // Reply to the original message so it's clear the bot is responding
-            const sentReply = await message.reply(response.data.reply);
-            // Mark as handled so dedup ignores the bot's own reply
-            if (sentReply && sentReply.id) handled.add(sentReply.id._serialized);
-        }
+        await sendBotResponse(chat, message, response.data);
     } catch (error) {
         console.error(`[Gateway] Erreur: ${error.message}`);
         if (error.code === 'ECONNREFUSED') {
@@ -229,6 +309,35 @@ client.on('disconnected', (reason) => {
     client.initialize();
 });
 
+// Async replies pushed by the bot's background workers
+app.post('/callback/reply', async (req, res) => {
+    if (req.get('X-Webhook-Secret') !== WEBHOOK_SECRET) {
+        return res.status(401).json({ error: 'Invalid webhook secret' });
+    }
+    const { job_id: jobId, chat_id: chatId, message_id: messageId } = req.body || {};
+    if (!chatId || !CHAT_IDS.has(chatId)) {
+        return res.status(404).json({ error: 'Unknown chat' });
+    }
+    try {
+        const chat = await client.getChatById(chatId);
+        let original = null;
+        if (messageId) {
+            try {
+                original = await client.getMessageById(messageId);
+            } catch (e) {
+                // Original message no longer available: send without quoting
+            }
+        }
+        await chat.clearState();
+        await sendBotResponse(chat, original, req.body);
+        console.log(`[Gateway] Delivered job ${jobId} to ${chatId}`);
+        res.json({ success: true });
+    } catch (err) {
+        console.error(`[Gateway] callback error for job ${jobId}: ${err.message}`);
+        res.status(500).json({ error: err.message });
+    }
+});
+
 // Health check endpoint
 app.get('/health', (req, res) => {
     const info = client.info;
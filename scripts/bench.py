@@ -0,0 +1,332 @@
+"""End-to-end webhook benchmark: throughput, latency, queries and allocations.
+
+Drives /webhook/message, /webhook/poll-created and /webhook/poll-vote
+in-process with a mixed traffic of mentions, commands, unaddressed chatter
+and native poll votes across many groups. The LLM is the scripted provider
+(no simulated latency unless --llm-latency) and TMDb is the local stand-in
+from scripts/tmdb_stub.py, so the numbers measure the bot itself.
+
+    python scripts/bench.py                       # SQLite in a temp dir
+    python scripts/bench.py --messages 5000 --groups 200 --concurrency 64
+    python scripts/bench.py --database-url postgresql+asyncpg://... --reset-db
+    python scripts/bench.py --save-baseline       # write scripts/bench_baseline.json
+    python scripts/bench.py --check               # exit 1 on regression vs baseline
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS.parent / "bot" / "src"))
+sys.path.insert(0, str(SCRIPTS))
+
+BASELINE_FILE = SCRIPTS / "bench_baseline.json"
+SCENARIO_FILE = SCRIPTS / "fixtures" / "llm" / "cinema.json"
+SECRET = "bench"
+
+MENTIONS = [
+    "@Regelebot parle-moi d'Inception",
+    "@Regelebot tu nous recommandes quoi ce soir ?",
+    "@Regelebot quoi de tendance en ce moment ?",
+    "@Regelebot c'est quoi nos stats ?",
+    "@Regelebot salut !",
+]
+COMMANDS = ["/aide", "/film Inception", "/stats", "/historique", "/resultats"]
+CHATTER = ["trop bien hier soir", "qui vient samedi ?", "j'ai adore la fin", "mdr", "ok pour moi"]
+POLL_OPTIONS = ["Inception", "Parasite", "Dune"]
+
+# Kind -> share of traffic
+MIX = {"mention": 0.35, "command": 0.25, "chatter": 0.25, "poll_vote": 0.15}
+
+# Allowed drift vs baseline before --check fails
+TOLERANCE = {"latency": 1.30, "throughput": 1 / 1.30, "alloc": 1.25, "queries": 0.5}
+
+
+def configure_env(args: argparse.Namespace, db_url: str) -> None:
+    """Settings are read at import: pin them before any bot module loads."""
+    os.environ.update(
+        LLM_PROVIDER="scripted",
+        LLM_API_KEY="bench",
+        TMDB_API_KEY="bench",
+        TMDB_BASE_URL="http://tmdb-stub/3",
+        DATABASE_URL=db_url,
+        WEBHOOK_SECRET=SECRET,
+        RATE_LIMIT_PER_MINUTE="1000000",
+        WORKER_CONCURRENCY=str(args.workers),
+        WORKER_QUEUE_SIZE="100000",
+        ASYNC_REPLIES="false",
+        WARMUP_ON_STARTUP="false",
+        PREFETCH_ENABLED="false",
+    )
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 2),
+        "mean": round(statistics.fmean(ordered), 2),
+    }
+
+
+class Traffic:
+    """Deterministic stream of (kind, path, payload) requests."""
+
+    def __init__(self, groups: int, seed: int):
+        self.rng = random.Random(seed)
+        self.groups = [f"bench-group-{i}@g.us" for i in range(groups)]
+        self.counter = 0
+
+    def message(self, group: str, body: str) -> dict:
+        self.counter += 1
+        member = self.rng.randrange(8)
+        return {
+            "from_": group,
+            "sender": f"33600000{member:03d}@c.us",
+            "sender_name": f"Membre {member}",
+            "body": body,
+            "timestamp": 1_700_000_000 + self.counter,
+            "message_id": f"bench-{self.counter}",
+        }
+
+    def next(self) -> tuple[str, str, dict]:
+        kind = self.rng.choices(list(MIX), weights=list(MIX.values()))[0]
+        group = self.rng.choice(self.groups)
+        if kind == "poll_vote":
+            member = self.rng.randrange(8)
+            return kind, "/webhook/poll-vote", {
+                "wa_message_id": f"wa-poll-{group}",
+                "voter": f"33600000{member:03d}@c.us",
+                "voter_name": f"Membre {member}",
+                "selected_options": [self.rng.choice(POLL_OPTIONS)],
+            }
+        pool = {"mention": MENTIONS, "command": COMMANDS, "chatter": CHATTER}[kind]
+        return kind, "/webhook/message", self.message(group, self.rng.choice(pool))
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from sqlalchemy import event
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(JSONB, "sqlite")
+    def _jsonb_on_sqlite(type_, compiler, **kw):
+        return "JSON"
+
+    import main
+    from core.container import container
+    from core.database import engine
+    from llm.providers.scripted import ScriptedConfig, ScriptedProvider
+    from models import Base
+    from tmdb_stub import create_app as create_tmdb_stub
+
+    scenario = ScriptedConfig.from_dict(json.loads(SCENARIO_FILE.read_text()))
+    if not args.llm_latency:
+        scenario.ttft_ms = scenario.tokens_per_second = scenario.jitter = 0
+    container._llm = ScriptedProvider(config=scenario)
+    container._tmdb_http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_tmdb_stub(latency=args.tmdb_latency))
+    )
+
+    queries = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_):
+        nonlocal queries
+        queries += 1
+
+    if args.reset_db:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+    traffic = Traffic(args.groups, args.seed)
+    async with main.lifespan(main.app), httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app),
+        base_url="http://bot",
+        headers={"X-Webhook-Secret": SECRET},
+        timeout=None,
+    ) as client:
+
+        async def send(path: str, payload: dict) -> httpx.Response:
+            return await client.post(path, json=payload)
+
+        # One native poll per group, so votes have something to land on
+        for group in traffic.groups:
+            body = "/sondage Quel film samedi ? | " + " | ".join(POLL_OPTIONS)
+            reply = (await send("/webhook/message", traffic.message(group, body))).json()
+            await send("/webhook/poll-created", {
+                "poll_id": reply["poll"]["poll_id"], "wa_message_id": f"wa-poll-{group}",
+            })
+
+        for _ in range(args.warmup):
+            _, path, payload = traffic.next()
+            await send(path, payload)
+
+        # Load phase: concurrent clients, latency and throughput
+        latencies: dict[str, list[float]] = defaultdict(list)
+        errors = 0
+        requests = [traffic.next() for _ in range(args.messages)]
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def timed(kind: str, path: str, payload: dict) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await send(path, payload)
+                elapsed = 1000 * (time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+            latencies[kind].append(elapsed)
+
+        queries_before = queries
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(*r) for r in requests))
+        duration = time.perf_counter() - start
+        load_queries = queries - queries_before
+
+        # Profile phase: one request at a time, per-kind queries and allocations
+        per_kind: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+        tracemalloc.start()
+        for _ in range(args.profile):
+            kind, path, payload = traffic.next()
+            q0, gc0 = queries, gc.get_stats()[0]["collections"]
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            await send(path, payload)
+            peak = tracemalloc.get_traced_memory()[1]
+            per_kind[kind]["queries"].append(queries - q0)
+            per_kind[kind]["alloc_kib"].append((peak - base) / 1024)
+            per_kind[kind]["gc_gen0"].append(gc.get_stats()[0]["collections"] - gc0)
+        tracemalloc.stop()
+
+    await container.close()
+
+    all_latencies = [x for samples in latencies.values() for x in samples]
+    profiled = [v for kinds in per_kind.values() for v in kinds["queries"]]
+    allocs = [v for kinds in per_kind.values() for v in kinds["alloc_kib"]]
+
+    def mean(values: list[float]) -> float:
+        return round(statistics.fmean(values), 2) if values else 0.0
+
+    return {
+        "config": {
+            "messages": args.messages,
+            "groups": args.groups,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "database": engine.url.get_backend_name(),
+            "llm_latency": args.llm_latency,
+            "tmdb_latency": args.tmdb_latency,
+        },
+        "throughput_rps": round(args.messages / duration, 1),
+        "errors": errors,
+        "latency_ms": {
+            "all": percentiles(all_latencies),
+            **{kind: percentiles(samples) for kind, samples in sorted(latencies.items())},
+        },
+        "queries_per_message": {
+            "all": round(load_queries / args.messages, 2),
+            **{kind: mean(v["queries"]) for kind, v in sorted(per_kind.items())},
+        },
+        "alloc_peak_kib_per_message": {
+            "all": mean(allocs),
+            **{kind: mean(v["alloc_kib"]) for kind, v in sorted(per_kind.items())},
+        },
+        "gc_gen0_per_message": {
+            "all": mean([v for kinds in per_kind.values() for v in kinds["gc_gen0"]]),
+        },
+        "profiled_messages": len(profiled),
+    }
+
+
+def compare(result: dict, baseline: dict) -> list[str]:
+    """Regressions of ``result`` against ``baseline``, as readable lines."""
+    problems = []
+    for kind, stats in baseline["latency_ms"].items():
+        current = result["latency_ms"].get(kind, {}).get("p95")
+        if current is not None and current > stats["p95"] * TOLERANCE["latency"]:
+            problems.append(f"p95 latency [{kind}]: {current}ms vs baseline {stats['p95']}ms")
+    if result["throughput_rps"] < baseline["throughput_rps"] * TOLERANCE["throughput"]:
+        problems.append(
+            f"throughput: {result['throughput_rps']} rps vs baseline {baseline['throughput_rps']}"
+        )
+    for kind, value in baseline["queries_per_message"].items():
+        current = result["queries_per_message"].get(kind)
+        if current is not None and current > value + TOLERANCE["queries"]:
+            problems.append(f"queries/message [{kind}]: {current} vs baseline {value}")
+    for kind, value in baseline["alloc_peak_kib_per_message"].items():
+        current = result["alloc_peak_kib_per_message"].get(kind)
+        if current is not None and current > value * TOLERANCE["alloc"]:
+            problems.append(f"alloc KiB/message [{kind}]: {current} vs baseline {value}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32, help="in-flight requests")
+    parser.add_argument("--workers", type=int, default=4, help="WORKER_CONCURRENCY")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--profile", type=int, default=300, help="sequential profiled messages")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--llm-latency", action="store_true", help="keep the scenario's timings")
+    parser.add_argument("--tmdb-latency", default="none", help="stand-in latency spec")
+    parser.add_argument("--database-url", help="default: SQLite in a temp dir")
+    parser.add_argument(
+        "--reset-db", action="store_true",
+        help="drop all tables first (DESTROYS DATA in --database-url)",
+    )
+    parser.add_argument("--output", type=Path, help="also write the result JSON here")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail on regression vs baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.database_url:
+            args.database_url = f"sqlite+aiosqlite:///{tmp}/bench.db"
+            args.reset_db = True
+        configure_env(args, args.database_url)
+        result = asyncio.run(run(args))
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    if args.save_baseline:
+        BASELINE_FILE.write_text(text + "\n")
+        print(f"Baseline saved to {BASELINE_FILE}", file=sys.stderr)
+    if args.check:
+        baseline = json.loads(BASELINE_FILE.read_text())
+        if baseline["config"] != result["config"]:
+            print("WARNING baseline was recorded with a different config", file=sys.stderr)
+        problems = compare(result, baseline)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems or result["errors"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
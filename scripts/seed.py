@@ -1,13 +1,40 @@
-"""Seed script to populate the database with sample data for testing."""
+"""Seed script to populate the database with sample data for testing.
+
+    python scripts/seed.py                      # 3 members, 3 movies
+    python scripts/seed.py --large --reset      # production-scale synthetic club
+    python scripts/seed.py --large --reset --scale 0.05 --profile
+
+``--large`` generates a club with years of history (see LARGE_VOLUMES; each
+volume can be overridden, e.g. ``--messages 5000000``) with skewed activity:
+a few groups, members and movies account for most rows. Postgres is loaded
+with COPY; other databases fall back to batched inserts. ``--profile`` then
+times the hot read queries.
+"""
+import argparse
 import asyncio
+import bisect
+import itertools
+import json
+import random
 import sys
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot" / "src"))
 
-from core.database import get_db  # noqa: E402
+from sqlalchemy import Table, func, select, text  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+
+from core.database import engine, get_db  # noqa: E402
+from core.token_budget import get_token_counter  # noqa: E402
+from models import Base  # noqa: E402
+from models.conversation import ConversationMessage  # noqa: E402
 from models.member import Member  # noqa: E402
 from models.movie import Movie  # noqa: E402
+from models.poll import Poll, PollVote  # noqa: E402
 from models.rating import Rating  # noqa: E402
 from models.watchlist import Watchlist  # noqa: E402
 
@@ -67,5 +94,326 @@ async def seed():
         print(f"  {len(ratings_data)} ratings")
 
 
+
+# --- Synthetic large club ---------------------------------------------------
+
+LARGE_VOLUMES = {
+    "groups": 2_000,
+    "members": 20_000,
+    "movies": 100_000,
+    "watched": 20_000,
+    "messages": 2_000_000,
+    "ratings": 400_000,
+    "polls": 20_000,
+    "votes": 200_000,
+}
+
+GENRES = [  # (name, weight): drama and comedy dominate, like TMDb
+    ("Drame", 30), ("Comedie", 22), ("Thriller", 12), ("Action", 11),
+    ("Romance", 9), ("Horreur", 7), ("Science-Fiction", 6), ("Crime", 6),
+    ("Aventure", 5), ("Animation", 4), ("Fantastique", 4), ("Documentaire", 3),
+    ("Guerre", 1),
+]
+FIRST_NAMES = [
+    "Marie", "Paul", "Lucas", "Emma", "Hugo", "Lea", "Louis", "Chloe", "Jules",
+    "Ines", "Adam", "Sarah", "Nathan", "Camille", "Tom", "Manon", "Arthur", "Zoe",
+]
+WORDS = (
+    "film soiree cinema genial nul revoir acteur scene fin suspense rire "
+    "pleurer popcorn samedi ce soir demain vote sondage affiche netflix "
+    "realisateur bande-annonce culte chef-d'oeuvre lent long court"
+).split()
+BOT_REPLIES = [
+    "Bonne idee ! Je vous propose quelques films dans la meme veine.",
+    "Voici ce qui est a l'affiche en ce moment.",
+    "Le club a deja vu ce film, note moyenne 4.2/5 !",
+    "Sondage cree, a vos votes !",
+]
+SCORE_WEIGHTS = [5, 10, 25, 35, 25]  # ratings 1..5 skew positive
+CHUNK = 50_000
+
+
+class Zipf:
+    """Draws indexes in [0, n) with P(i) ~ 1 / (i + 1) ** s."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cum = list(itertools.accumulate(1 / (i + 1) ** s for i in range(n)))
+
+    def __call__(self) -> int:
+        return bisect.bisect(self.cum, self.rng.random() * self.cum[-1])
+
+
+def _timestamp(rng: random.Random, start: datetime, span: float) -> datetime:
+    return start + timedelta(seconds=rng.random() * span)
+
+
+def _sentence(rng: random.Random) -> str:
+    # Message lengths are long-tailed: mostly a few words, sometimes a paragraph
+    length = min(120, int(rng.paretovariate(1.2) * 3))
+    return " ".join(rng.choices(WORDS, k=length)).capitalize()
+
+
+def generate_club(volumes: dict[str, int], years: int, seed: int) -> dict[str, Iterable[dict]]:
+    """Row generators per table, in foreign-key order."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    start, span = now - timedelta(days=365 * years), 365 * years * 86400.0
+    genre_names = [g for g, _ in GENRES]
+    genre_cum = list(itertools.accumulate(w for _, w in GENRES))
+
+    member_ids = [uuid.uuid4() for _ in range(volumes["members"])]
+    member_names = [f"{rng.choice(FIRST_NAMES)} {i}" for i in range(len(member_ids))]
+    movie_ids = [uuid.uuid4() for _ in range(volumes["movies"])]
+    watched = rng.sample(range(len(movie_ids)), min(volumes["watched"], len(movie_ids)))
+    watch_ids = [uuid.uuid4() for _ in watched]
+    poll_ids = [uuid.uuid4() for _ in range(volumes["polls"])]
+    groups = [f"{120363000000000000 + i}@g.us" for i in range(volumes["groups"])]
+
+    pick_member = Zipf(len(member_ids), 0.9, rng)
+    pick_group = Zipf(len(groups), 1.1, rng)
+    pick_watch = Zipf(len(watch_ids), 0.7, rng)
+    pick_poll = Zipf(len(poll_ids), 0.8, rng)
+
+    def members() -> Iterator[dict]:
+        for i, (member_id, name) in enumerate(zip(member_ids, member_names)):
+            yield {
+                "id": member_id,
+                "created_at": _timestamp(rng, start, span),
+                "phone_hash": f"synthetic_{seed}_{i:08d}",
+                "display_name": name,
+            }
+
+    def movies() -> Iterator[dict]:
+        for i, movie_id in enumerate(movie_ids):
+            genres = sorted(set(rng.choices(genre_names, cum_weights=genre_cum, k=rng.randint(1, 3))))
+            year = rng.randint(1950, now.year)
+            yield {
+                "id": movie_id,
+                "created_at": _timestamp(rng, start, span),
+                "tmdb_id": 1_000_000 + i,
+                "title": f"Film synthetique {i}",
+                "original_title": f"Synthetic Movie {i}",
+                "year": year,
+                "genres": genres,
+                # Details only for a slice, as if the bot looked them up
+                "metadata": {
+                    "details": {"title": f"Film synthetique {i}", "year": str(year), "genres": genres},
+                    "fetched_at": now.isoformat(),
+                } if rng.random() < 0.1 else None,
+            }
+
+    def watchlist() -> Iterator[dict]:
+        for watch_id, movie_index in zip(watch_ids, watched):
+            yield {
+                "id": watch_id,
+                "created_at": _timestamp(rng, start, span),
+                "movie_id": movie_ids[movie_index],
+                "suggested_by": member_ids[pick_member()] if rng.random() < 0.6 else None,
+                "watched_at": (start + timedelta(seconds=rng.random() * span)).date(),
+            }
+
+    def ratings() -> Iterator[dict]:
+        seen: set[tuple[int, int]] = set()
+        for _ in range(volumes["ratings"] * 3):
+            if len(seen) >= volumes["ratings"]:
+                break
+            pair = (pick_watch(), pick_member())
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield {
+                "id": uuid.uuid4(),
+                "created_at": _timestamp(rng, start, span),
+                "watchlist_id": watch_ids[pair[0]],
+                "member_id": member_ids[pair[1]],
+                "score": rng.choices(range(1, 6), weights=SCORE_WEIGHTS)[0],
+                "comment": _sentence(rng) if rng.random() < 0.1 else None,
+            }
+
+    poll_sizes = [rng.randint(2, 5) for _ in poll_ids]
+
+    def polls() -> Iterator[dict]:
+        for i, poll_id in enumerate(poll_ids):
+            options = {str(n + 1): f"Film synthetique {rng.randrange(len(movie_ids))}"
+                       for n in range(poll_sizes[i])}
+            yield {
+                "id": poll_id,
+                "created_at": _timestamp(rng, start, span),
+                "question": "Quel film ce samedi ?",
+                "options": options,
+                "created_by": member_ids[pick_member()],
+                "closes_at": None,
+                # The most recent polls (low indexes) are still open
+                "is_closed": i >= 20 and rng.random() < 0.95,
+                "wa_message_id": f"synthetic-wa-{i}" if rng.random() < 0.5 else None,
+            }
+
+    def poll_votes() -> Iterator[dict]:
+        seen: set[tuple[int, int]] = set()
+        for _ in range(volumes["votes"] * 3):
+            if len(seen) >= volumes["votes"]:
+                break
+            pair = (pick_poll(), pick_member())
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield {
+                "id": uuid.uuid4(),
+                "created_at": _timestamp(rng, start, span),
+                "poll_id": poll_ids[pair[0]],
+                "member_id": member_ids[pair[1]],
+                "option_id": str(rng.randint(1, poll_sizes[pair[0]])),
+            }
+
+    counter = get_token_counter()
+
+    def messages() -> Iterator[dict]:
+        for _ in range(volumes["messages"]):
+            is_bot = rng.random() < 0.3
+            content = rng.choice(BOT_REPLIES) if is_bot else _sentence(rng)
+            yield {
+                "id": uuid.uuid4(),
+                "created_at": _timestamp(rng, start, span),
+                "group_id": groups[pick_group()],
+                "role": "bot" if is_bot else "user",
+                "sender_name": None if is_bot else member_names[pick_member()],
+                "content": content,
+                "token_count": counter.count(content),
+            }
+
+    return {
+        "members": members(),
+        "movies": movies(),
+        "watchlist": watchlist(),
+        "ratings": ratings(),
+        "polls": polls(),
+        "poll_votes": poll_votes(),
+        "conversation_messages": messages(),
+    }
+
+
+async def bulk_load(table: Table, rows: Iterable[dict]) -> int:
+    """Load rows (keyed by column name) in chunks: COPY on Postgres,
+    executemany elsewhere. Columns a row leaves out load as NULL."""
+    columns = [c.name for c in table.columns]
+    json_columns = {c.name for c in table.columns if isinstance(c.type, JSONB)}
+    total = 0
+    async with engine.begin() as conn:
+        copy = None
+        if conn.dialect.name == "postgresql":
+            raw = await conn.get_raw_connection()
+            copy = raw.driver_connection.copy_records_to_table
+
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, CHUNK)):
+            if copy is not None:
+                records = [
+                    tuple(
+                        json.dumps(row[name])
+                        if name in json_columns and row.get(name) is not None else row.get(name)
+                        for name in columns
+                    )
+                    for row in chunk
+                ]
+                await copy(table.name, records=records, columns=columns)
+            else:
+                await conn.execute(table.insert(), chunk)
+            total += len(chunk)
+    return total
+
+
+async def seed_large(volumes: dict[str, int], years: int, seed: int, reset: bool) -> None:
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        existing = await conn.scalar(select(func.count()).select_from(Member.__table__))
+    if existing:
+        sys.exit("Tables are not empty: rerun with --reset (drops all data) to regenerate.")
+
+    tables = {
+        "members": Member.__table__,
+        "movies": Movie.__table__,
+        "watchlist": Watchlist.__table__,
+        "ratings": Rating.__table__,
+        "polls": Poll.__table__,
+        "poll_votes": PollVote.__table__,
+        "conversation_messages": ConversationMessage.__table__,
+    }
+    for name, rows in generate_club(volumes, years, seed).items():
+        started = time.perf_counter()
+        count = await bulk_load(tables[name], rows)
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<22} {count:>10,} rows  {elapsed:6.1f}s  ({count / max(elapsed, 1e-9):,.0f}/s)")
+
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+
+async def profile_queries(runs: int = 5) -> None:
+    """Time the read paths the bot hits on every message."""
+    from agents.subagents.poll import PollAgent
+    from agents.subagents.stats import StatsAgent
+    from services.conversation import ConversationService
+
+    async with get_db() as db:
+        busiest = await db.scalar(
+            select(ConversationMessage.group_id)
+            .group_by(ConversationMessage.group_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        )
+        stats = StatsAgent(db)
+        checks = {
+            "get_stats": stats.get_stats,
+            "get_history": stats.get_history,
+            "get_recent_history (busiest group)": lambda: ConversationService(db).get_recent_history(busiest),
+            "poll get_results (latest open)": PollAgent(db).get_results,
+        }
+        for label, call in checks.items():
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                await call()
+                timings.append(1000 * (time.perf_counter() - started))
+            print(f"  {label:<36} min {min(timings):8.1f} ms  max {max(timings):8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--large", action="store_true", help="generate a synthetic large club")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every volume")
+    for name, default in LARGE_VOLUMES.items():
+        parser.add_argument(f"--{name}", type=int, help=f"default {default:,}")
+    parser.add_argument("--years", type=int, default=3, help="history span")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="drop all tables first (DESTROYS DATA)")
+    parser.add_argument("--profile", action="store_true", help="time hot queries afterwards")
+    args = parser.parse_args()
+
+    if not args.large:
+        asyncio.run(seed())
+        return
+
+    volumes = {
+        name: getattr(args, name) or max(1, int(default * args.scale))
+        for name, default in LARGE_VOLUMES.items()
+    }
+    print("Generating synthetic club:", ", ".join(f"{k}={v:,}" for k, v in volumes.items()))
+
+    async def run() -> None:
+        await seed_large(volumes, args.years, args.seed, args.reset)
+        if args.profile:
+            print("Query profile:")
+            await profile_queries()
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
 if __name__ == "__main__":
-    asyncio.run(seed())
+    main()
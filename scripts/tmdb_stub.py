@@ -0,0 +1,250 @@
+"""Local TMDb stand-in for offline benchmarks and soak tests.
+
+Serves recorded fixtures for the endpoints the bot uses, with injectable
+latency and error rates. Requests without a matching fixture get a
+deterministic synthetic response, so any query works offline.
+
+    # Replay (default fixtures: scripts/fixtures/tmdb)
+    python scripts/tmdb_stub.py --port 8100 --latency lognormal:80:0.5 --error-rate 0.02
+
+    # Record real responses into the fixture corpus
+    TMDB_API_KEY=... python scripts/tmdb_stub.py --record https://api.themoviedb.org/3
+
+Then point the bot at it with TMDB_BASE_URL=http://localhost:8100/3.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger("tmdb_stub")
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "tmdb"
+ERROR_STATUSES = (429, 500, 502, 503)
+
+_ROUTES = [
+    re.compile(p)
+    for p in (
+        r"^/search/movie$",
+        r"^/movie/\d+$",
+        r"^/movie/\d+/similar$",
+        r"^/discover/movie$",
+        r"^/trending/movie/(day|week)$",
+        r"^/movie/now_playing$",
+        r"^/configuration$",
+    )
+]
+
+
+def fixture_key(path: str, params: dict) -> str:
+    """Stable key for a request, ignoring the API key and param order."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k != "api_key")
+    return f"{path}?{query}"
+
+
+def fixture_filename(key: str) -> str:
+    path = key.split("?", 1)[0].strip("/").replace("/", "_") or "root"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:10]
+    return f"{path}__{digest}.json"
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Latency sampler in seconds from a spec in milliseconds.
+
+    ``none`` | ``fixed:MS`` | ``uniform:LO:HI`` | ``lognormal:MEDIAN:SIGMA``
+    """
+    kind, *args = spec.split(":")
+    values = [float(a) for a in args]
+    if kind in ("", "none", "0"):
+        return lambda: 0.0
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(*values) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda: random.lognormvariate(0, sigma) * median / 1000
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+def load_fixtures(directory: Path) -> dict[str, dict]:
+    fixtures = {}
+    for file in sorted(directory.glob("*.json")):
+        data = json.loads(file.read_text())
+        fixtures[data["key"]] = data
+    return fixtures
+
+
+def synthesize(path: str, params: dict) -> dict:
+    """Deterministic TMDb-shaped body for requests with no fixture."""
+    seed = int(hashlib.sha1(fixture_key(path, params).encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+
+    if match := re.fullmatch(r"/movie/(\d+)", path):
+        return _movie(int(match.group(1)), rng, details=True)
+    if path == "/configuration":
+        return {"images": {"secure_base_url": "https://image.tmdb.org/t/p/"}}
+    if path == "/search/movie":
+        title = (params.get("query") or "Film").strip().title()
+        results = [_movie(rng.randint(1, 999_999), rng, title=title)]
+        results += [_movie(rng.randint(1, 999_999), rng) for _ in range(rng.randint(0, 4))]
+    else:
+        results = [_movie(rng.randint(1, 999_999), rng) for _ in range(20)]
+    return {"page": 1, "results": results, "total_pages": 1, "total_results": len(results)}
+
+
+def _movie(
+    movie_id: int, rng: random.Random, title: str | None = None, details: bool = False
+) -> dict:
+    title = title or f"Film {movie_id}"
+    released = f"{rng.randint(1960, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    movie = {
+        "id": movie_id,
+        "title": title,
+        "original_title": title,
+        "release_date": released,
+        "overview": f"Synopsis de {title}. " * rng.randint(2, 6),
+        "vote_average": round(rng.uniform(4, 9), 1),
+        "vote_count": rng.randint(50, 30_000),
+        "genre_ids": rng.sample([28, 12, 16, 35, 80, 18, 14, 27, 10749, 878, 53], 2),
+        "poster_path": f"/poster{movie_id}.jpg",
+    }
+    if details:
+        movie.update(
+            runtime=rng.randint(80, 180),
+            genres=[{"id": 18, "name": "Drame"}, {"id": 53, "name": "Thriller"}],
+            credits={
+                "crew": [{"job": "Director", "name": f"Realisateur {movie_id % 97}"}],
+                "cast": [{"name": f"Acteur {movie_id % 89 + i}"} for i in range(8)],
+            },
+            videos={"results": [{"type": "Trailer", "site": "YouTube", "key": f"t{movie_id}"}]},
+        )
+        movie["watch/providers"] = {
+            "results": {"FR": {"flatrate": [{"provider_name": "Netflix"}]}}
+        }
+    return movie
+
+
+def create_app(
+    fixtures_dir: Path = DEFAULT_FIXTURES,
+    latency: str = "none",
+    error_rate: float = 0.0,
+    record_upstream: str | None = None,
+    api_key: str | None = None,
+) -> FastAPI:
+    fixtures = load_fixtures(fixtures_dir) if fixtures_dir.is_dir() else {}
+    sample_latency = parse_latency(latency)
+    upstream = httpx.AsyncClient(timeout=10) if record_upstream else None
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        if upstream is not None:
+            await upstream.aclose()
+
+    app = FastAPI(title="TMDb stand-in", lifespan=lifespan)
+    stats = {"requests": 0, "fixture_hits": 0, "synthetic": 0, "errors": 0, "recorded": 0}
+    logger.info("Loaded %d fixtures from %s", len(fixtures), fixtures_dir)
+
+    @app.get("/_stats")
+    async def get_stats():
+        return stats
+
+    @app.get("/{full_path:path}")
+    async def tmdb(full_path: str, request: Request):
+        path = "/" + full_path
+        if path.startswith("/3/"):
+            path = path[2:]
+        params = dict(request.query_params)
+        stats["requests"] += 1
+
+        delay = sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            status = random.choice(ERROR_STATUSES)
+            headers = {"Retry-After": "1"} if status == 429 else None
+            return JSONResponse({"status_message": "injected error"}, status, headers=headers)
+
+        if not any(route.match(path) for route in _ROUTES):
+            return JSONResponse({"status_message": "Not found", "status_code": 34}, 404)
+
+        key = fixture_key(path, params)
+        if upstream is not None:
+            return await _record(path, params, key)
+        if key in fixtures:
+            stats["fixture_hits"] += 1
+            return JSONResponse(fixtures[key]["body"], fixtures[key].get("status", 200))
+        stats["synthetic"] += 1
+        return JSONResponse(synthesize(path, params))
+
+    async def _record(path: str, params: dict, key: str) -> JSONResponse:
+        response = await upstream.get(
+            f"{record_upstream.rstrip('/')}{path}", params={**params, "api_key": api_key}
+        )
+        body = response.json()
+        if response.status_code == 200:
+            fixtures_dir.mkdir(parents=True, exist_ok=True)
+            fixture = {
+                "key": key,
+                "path": path,
+                "params": {k: v for k, v in params.items() if k != "api_key"},
+                "status": 200,
+                "body": body,
+            }
+            (fixtures_dir / fixture_filename(key)).write_text(
+                json.dumps(fixture, ensure_ascii=False, indent=1)
+            )
+            fixtures[key] = fixture
+            stats["recorded"] += 1
+        return JSONResponse(body, response.status_code)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument(
+        "--latency", default="none",
+        help="none | fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0,
+        help="share of requests answered with 429/5xx",
+    )
+    parser.add_argument(
+        "--record", metavar="UPSTREAM",
+        help="proxy to this TMDb base URL and save responses",
+    )
+    args = parser.parse_args()
+
+    api_key = os.environ.get("TMDB_API_KEY")
+    if args.record and not api_key:
+        parser.error("--record needs TMDB_API_KEY in the environment")
+
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(args.fixtures, args.latency, args.error_rate, args.record, api_key)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()